@@ -0,0 +1,43 @@
+"""Relabel lease search documents
+
+Leases were labelled with their start date alone, so lease hits and
+breadcrumbs showed a bare date. They are now labelled with their unit number
+and term, e.g. 'Unit 4B: 2024-01-01 to 2024-12-31'.
+
+Revision ID: 0a7d4b2c5e93
+Revises: 9e6c3f1a4b82
+Create Date: 2026-10-21 09:14:52.206318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a7d4b2c5e93'
+down_revision: Union[str, None] = '9e6c3f1a4b82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _relabel(label: str) -> None:
+    op.execute(f"""
+        UPDATE search_documents
+        SET label = {label},
+            document = setweight(to_tsvector('simple', {label}), 'A') || setweight(to_tsvector('simple', search_documents.content), 'B')
+        FROM leases JOIN units ON units.id = leases.unit_id
+        WHERE search_documents.resource = 'lease' AND search_documents.resource_id = leases.id
+    """)
+
+
+def upgrade() -> None:
+    _relabel(
+        "'Unit ' || coalesce(CAST(units.unit_number AS VARCHAR), '') || ': ' || coalesce(CAST(leases.start_date AS VARCHAR), '')"
+        " || ' to ' || coalesce(CAST(leases.end_date AS VARCHAR), '')"
+    )
+
+
+def downgrade() -> None:
+    _relabel("coalesce(CAST(leases.start_date AS VARCHAR), '')")
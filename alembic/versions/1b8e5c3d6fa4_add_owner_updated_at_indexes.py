@@ -0,0 +1,35 @@
+"""Add (owner_id, updated_at, id) indexes
+
+The version probes of the conditional GETs read the owner's latest
+updated_at of every table a response loads. These indexes answer it with
+one index entry instead of reading every row of the owner, and serve the
+updated_at sorts. The probes now take their row counts from row_counters.
+
+Revision ID: 1b8e5c3d6fa4
+Revises: 0a7d4b2c5e93
+Create Date: 2026-10-21 15:40:08.917364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b8e5c3d6fa4'
+down_revision: Union[str, None] = '0a7d4b2c5e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ['properties', 'buildings', 'units', 'leases', 'tenants', 'insurances']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_index(f'ix_{table}_owner_id_updated_at_id', table, ['owner_id', 'updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_owner_id_updated_at_id', table_name=table)
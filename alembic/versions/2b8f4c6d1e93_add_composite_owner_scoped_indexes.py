@@ -0,0 +1,92 @@
+"""Add composite owner-scoped indexes
+
+Replaces the single-column owner_id / id / is_vacant indexes with composite
+indexes matching the controllers' queries (owner_id, then the parent key, then
+the id used as keyset tie-breaker), partial indexes for vacant units and active
+leases/policies, and BRIN indexes on the lease and insurance dates.
+
+Revision ID: 2b8f4c6d1e93
+Revises: 9d3e6b1f4a20
+Create Date: 2026-10-18 14:21:40.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b8f4c6d1e93'
+down_revision: Union[str, None] = '9d3e6b1f4a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RESOURCE_TABLES = ['properties', 'buildings', 'units', 'leases', 'tenants', 'insurances']
+
+
+def upgrade() -> None:
+    for table in RESOURCE_TABLES:
+        op.create_index(f'ix_{table}_owner_id_id', table, ['owner_id', 'id'], unique=False,
+            postgresql_include=['name'] if table == 'properties' else [])
+
+    op.create_index('ix_properties_owner_id_name_id', 'properties', ['owner_id', 'name', 'id'], unique=False)
+    op.create_index('ix_buildings_owner_id_property_id_id', 'buildings', ['owner_id', 'property_id', 'id'], unique=False,
+        postgresql_include=['name'])
+    op.create_index('ix_units_owner_id_building_id_id', 'units', ['owner_id', 'building_id', 'id'], unique=False,
+        postgresql_include=['unit_number', 'is_vacant'])
+    op.create_index('ix_units_vacant_owner_id_building_id_id', 'units', ['owner_id', 'building_id', 'id'], unique=False,
+        postgresql_where=sa.text('is_vacant'), sqlite_where=sa.text('is_vacant = 1'))
+    op.create_index('ix_leases_owner_id_unit_id_id', 'leases', ['owner_id', 'unit_id', 'id'], unique=False,
+        postgresql_include=['start_date', 'end_date', 'rent'])
+    op.create_index('ix_leases_owner_id_end_date_id', 'leases', ['owner_id', 'end_date', 'id'], unique=False)
+    op.create_index('ix_leases_active_unit_id_rent', 'leases', ['unit_id', 'rent'], unique=False,
+        postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active = 1'))
+    op.create_index('ix_tenants_owner_id_lease_id_id', 'tenants', ['owner_id', 'lease_id', 'id'], unique=False,
+        postgresql_include=['name'])
+    op.create_index('ix_insurances_owner_id_tenant_id_id', 'insurances', ['owner_id', 'tenant_id', 'id'], unique=False,
+        postgresql_include=['policy_number'])
+    op.create_index('ix_insurances_owner_id_expiration_date_id', 'insurances', ['owner_id', 'expiration_date', 'id'], unique=False)
+    op.create_index('ix_insurances_active_tenant_id', 'insurances', ['tenant_id'], unique=False,
+        postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active = 1'))
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index('ix_leases_start_date_brin', 'leases', ['start_date'], unique=False, postgresql_using='brin')
+        op.create_index('ix_leases_end_date_brin', 'leases', ['end_date'], unique=False, postgresql_using='brin')
+        op.create_index('ix_insurances_expiration_date_brin', 'insurances', ['expiration_date'], unique=False,
+            postgresql_using='brin')
+
+    # Superseded: owner_id leads the composite indexes, the primary key covers id,
+    # and the partial index covers vacant units
+    for table in RESOURCE_TABLES:
+        op.drop_index(f'ix_{table}_owner_id', table_name=table)
+        op.drop_index(f'ix_{table}_id', table_name=table)
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_units_is_vacant', table_name='units')
+
+
+def downgrade() -> None:
+    op.create_index('ix_units_is_vacant', 'units', ['is_vacant'], unique=False)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+    for table in RESOURCE_TABLES:
+        op.create_index(f'ix_{table}_id', table, ['id'], unique=False)
+        op.create_index(f'ix_{table}_owner_id', table, ['owner_id'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_insurances_expiration_date_brin', table_name='insurances')
+        op.drop_index('ix_leases_end_date_brin', table_name='leases')
+        op.drop_index('ix_leases_start_date_brin', table_name='leases')
+
+    op.drop_index('ix_insurances_active_tenant_id', table_name='insurances')
+    op.drop_index('ix_insurances_owner_id_expiration_date_id', table_name='insurances')
+    op.drop_index('ix_insurances_owner_id_tenant_id_id', table_name='insurances')
+    op.drop_index('ix_tenants_owner_id_lease_id_id', table_name='tenants')
+    op.drop_index('ix_leases_active_unit_id_rent', table_name='leases')
+    op.drop_index('ix_leases_owner_id_end_date_id', table_name='leases')
+    op.drop_index('ix_leases_owner_id_unit_id_id', table_name='leases')
+    op.drop_index('ix_units_vacant_owner_id_building_id_id', table_name='units')
+    op.drop_index('ix_units_owner_id_building_id_id', table_name='units')
+    op.drop_index('ix_buildings_owner_id_property_id_id', table_name='buildings')
+    op.drop_index('ix_properties_owner_id_name_id', table_name='properties')
+    for table in RESOURCE_TABLES:
+        op.drop_index(f'ix_{table}_owner_id_id', table_name=table)
@@ -0,0 +1,55 @@
+"""Add row_counters table
+
+Revision ID: 5c1f0d8e2a47
+Revises: 2183f12175fd
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f0d8e2a47'
+down_revision: Union[str, None] = '2183f12175fd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Resource tables and the foreign key to their parent resource
+resource_tables = {
+    'properties': None,
+    'buildings': 'property_id',
+    'units': 'building_id',
+    'leases': 'unit_id',
+    'tenants': 'lease_id',
+    'insurances': 'tenant_id',
+}
+
+
+def upgrade() -> None:
+    op.create_table('row_counters',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=63), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=False),
+    sa.Column('row_count', sa.BigInteger(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('owner_id', 'table_name', 'parent_id')
+    )
+
+    # Backfill the counters from the existing rows (parent_id 0 = owner's total)
+    for table_name, parent_key in resource_tables.items():
+        op.execute(
+            f"INSERT INTO row_counters (owner_id, table_name, parent_id, row_count) "
+            f"SELECT owner_id, '{table_name}', 0, count(*) FROM {table_name} GROUP BY owner_id"
+        )
+        if parent_key:
+            op.execute(
+                f"INSERT INTO row_counters (owner_id, table_name, parent_id, row_count) "
+                f"SELECT owner_id, '{table_name}', {parent_key}, count(*) FROM {table_name} GROUP BY owner_id, {parent_key}"
+            )
+
+
+def downgrade() -> None:
+    op.drop_table('row_counters')
@@ -0,0 +1,63 @@
+"""Add search_documents table
+
+Revision ID: 6f2a9c3e7b15
+Revises: 2b8f4c6d1e93
+Create Date: 2026-10-18 15:40:12.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f2a9c3e7b15'
+down_revision: Union[str, None] = '2b8f4c6d1e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# resource -> (table, parent key, searchable columns; the first one is the label)
+SEARCHABLE = {
+    'property': ('properties', None, ['name', 'address', 'city', 'state', 'zip_code', 'manager']),
+    'building': ('buildings', 'property_id', ['name']),
+    'unit': ('units', 'building_id', ['unit_number']),
+    'lease': ('leases', 'unit_id', ['start_date', 'end_date']),
+    'tenant': ('tenants', 'lease_id', ['name', 'email', 'phone']),
+    'insurance': ('insurances', 'tenant_id', ['policy_number', 'provider', 'policy_type']),
+}
+
+
+def upgrade() -> None:
+    op.create_table('search_documents',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('resource', sa.String(), nullable=False),
+    sa.Column('resource_id', sa.Integer(), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('label', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('document', postgresql.TSVECTOR(), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('resource', 'resource_id', name='uq_search_documents_resource_resource_id')
+    )
+    op.create_index('ix_search_documents_document', 'search_documents', ['document'], unique=False, postgresql_using='gin')
+
+    # Backfill one document per existing resource row
+    for resource, (table, parent_key, columns) in SEARCHABLE.items():
+        fields = [f"coalesce(CAST({name} AS VARCHAR), '')" for name in columns]
+        label, content = fields[0], " || ' ' || ".join(fields)
+        op.execute(f"""
+            INSERT INTO search_documents (resource, resource_id, parent_id, owner_id, label, content, document)
+            SELECT
+                '{resource}', id, {parent_key or 'NULL'}, owner_id, {label}, {content},
+                setweight(to_tsvector('simple', {label}), 'A') || setweight(to_tsvector('simple', {content}), 'B')
+            FROM {table}
+        """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_search_documents_document', table_name='search_documents', postgresql_using='gin')
+    op.drop_table('search_documents')
@@ -0,0 +1,35 @@
+"""Lead the vacant units index with building_id
+
+The building vacancy stats (Building.vacant_unit_count) count a building's
+vacant units by building_id alone, so an index leading with owner_id cannot
+serve them. (building_id, id) still serves the owner-scoped vacant unit lists
+of a building, since owner_id only narrows that building's rows.
+
+Revision ID: 7c4e1a9d2f60
+Revises: 6f2a9c3e7b15
+Create Date: 2026-10-19 09:12:31.540218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e1a9d2f60'
+down_revision: Union[str, None] = '6f2a9c3e7b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_units_vacant_building_id_id', 'units', ['building_id', 'id'], unique=False,
+        postgresql_where=sa.text('is_vacant'), sqlite_where=sa.text('is_vacant = 1'))
+    op.drop_index('ix_units_vacant_owner_id_building_id_id', table_name='units')
+
+
+def downgrade() -> None:
+    op.create_index('ix_units_vacant_owner_id_building_id_id', 'units', ['owner_id', 'building_id', 'id'], unique=False,
+        postgresql_where=sa.text('is_vacant'), sqlite_where=sa.text('is_vacant = 1'))
+    op.drop_index('ix_units_vacant_building_id_id', table_name='units')
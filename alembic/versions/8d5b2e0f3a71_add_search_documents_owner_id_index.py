@@ -0,0 +1,31 @@
+"""Add search_documents owner_id index
+
+Every search filters on owner_id. With only the GIN index on document,
+PostgreSQL matches the tsquery against every owner's documents and discards
+the other owners' rows afterwards. A btree on owner_id lets the planner
+combine both indexes (BitmapAnd). The owner-scoped rebuild uses it too.
+
+Revision ID: 8d5b2e0f3a71
+Revises: 7c4e1a9d2f60
+Create Date: 2026-10-19 09:40:05.281964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d5b2e0f3a71'
+down_revision: Union[str, None] = '7c4e1a9d2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_search_documents_owner_id', 'search_documents', ['owner_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_search_documents_owner_id', table_name='search_documents')
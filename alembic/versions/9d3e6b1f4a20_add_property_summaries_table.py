@@ -0,0 +1,68 @@
+"""Add property_summaries table
+
+Revision ID: 9d3e6b1f4a20
+Revises: 5c1f0d8e2a47
+Create Date: 2026-10-18 11:02:17.550931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3e6b1f4a20'
+down_revision: Union[str, None] = '5c1f0d8e2a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('property_summaries',
+    sa.Column('property_id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('building_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('unit_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('vacant_unit_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('active_rent_total', sa.Float(), server_default='0', nullable=False),
+    sa.Column('average_sqft', sa.Float(), server_default='0', nullable=False),
+    sa.Column('tenant_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('insured_tenant_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('refreshed_at', sa.TIMESTAMP(timezone=True), server_default=sa.text("timezone('utc', now())"), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['property_id'], ['properties.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('property_id')
+    )
+    op.create_index(op.f('ix_property_summaries_owner_id'), 'property_summaries', ['owner_id'], unique=False)
+
+    # Backfill one summary per existing property
+    op.execute("""
+        INSERT INTO property_summaries (
+            property_id, owner_id, building_count, unit_count, vacant_unit_count,
+            active_rent_total, average_sqft, tenant_count, insured_tenant_count
+        )
+        SELECT
+            p.id,
+            p.owner_id,
+            (SELECT count(b.id) FROM buildings b WHERE b.property_id = p.id),
+            (SELECT count(u.id) FROM units u JOIN buildings b ON u.building_id = b.id WHERE b.property_id = p.id),
+            (SELECT count(u.id) FROM units u JOIN buildings b ON u.building_id = b.id
+                WHERE b.property_id = p.id AND u.is_vacant),
+            (SELECT coalesce(sum(l.rent), 0) FROM leases l JOIN units u ON l.unit_id = u.id
+                JOIN buildings b ON u.building_id = b.id
+                WHERE b.property_id = p.id AND u.is_active AND l.is_active),
+            (SELECT coalesce(avg(u.sqft), 0) FROM units u JOIN buildings b ON u.building_id = b.id
+                WHERE b.property_id = p.id),
+            (SELECT count(t.id) FROM tenants t JOIN leases l ON t.lease_id = l.id JOIN units u ON l.unit_id = u.id
+                JOIN buildings b ON u.building_id = b.id WHERE b.property_id = p.id),
+            (SELECT count(t.id) FROM tenants t JOIN leases l ON t.lease_id = l.id JOIN units u ON l.unit_id = u.id
+                JOIN buildings b ON u.building_id = b.id WHERE b.property_id = p.id
+                AND EXISTS (SELECT 1 FROM insurances i WHERE i.tenant_id = t.id AND i.is_active))
+        FROM properties p
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_property_summaries_owner_id'), table_name='property_summaries')
+    op.drop_table('property_summaries')
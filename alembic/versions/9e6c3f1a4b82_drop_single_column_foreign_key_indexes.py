@@ -0,0 +1,47 @@
+"""Drop single-column foreign key indexes
+
+The composite (owner_id, <parent key>, id) indexes serve every lookup of a
+row's children: the parent/child relationships, the building stats and the
+property summaries now match on the owner as well as the foreign key. The
+single-column foreign key indexes only added write cost. The index on
+properties.type is replaced by an owner-scoped (owner_id, type, id) index,
+which serves the owner's type filters and sorts.
+
+Revision ID: 9e6c3f1a4b82
+Revises: 8d5b2e0f3a71
+Create Date: 2026-10-20 11:02:37.514820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e6c3f1a4b82'
+down_revision: Union[str, None] = '8d5b2e0f3a71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FOREIGN_KEYS = [
+    ('buildings', 'property_id'),
+    ('units', 'building_id'),
+    ('leases', 'unit_id'),
+    ('tenants', 'lease_id'),
+    ('insurances', 'tenant_id'),
+]
+
+
+def upgrade() -> None:
+    op.create_index('ix_properties_owner_id_type_id', 'properties', ['owner_id', 'type', 'id'], unique=False)
+    op.drop_index('ix_properties_type', table_name='properties')
+    for table, column in FOREIGN_KEYS:
+        op.drop_index(f'ix_{table}_{column}', table_name=table)
+
+
+def downgrade() -> None:
+    for table, column in FOREIGN_KEYS:
+        op.create_index(f'ix_{table}_{column}', table, [column], unique=False)
+    op.create_index('ix_properties_type', 'properties', ['type'], unique=False)
+    op.drop_index('ix_properties_owner_id_type_id', table_name='properties')
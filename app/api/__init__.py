@@ -22,6 +22,7 @@ def register_error_handlers(app: FastAPI) -> None:
     common_http_exception_handler(app)
     common_validation_exception_handler(app)
     common_sqlalchemy_exception_handler(app)
+    common_invalid_query_exception_handler(app)
     common_unhandled_exception_handler(app)
 
     # Uncomment the lines below to include v1-specific error handlers
@@ -3,6 +3,7 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import IntegrityError
+from core.exceptions import InvalidQueryError
 from core.logger import log_middleware_exception
 
 def common_http_exception_handler(app: FastAPI) -> None:
@@ -40,6 +41,14 @@ def common_sqlalchemy_exception_handler(app: FastAPI) -> None:
         )
     app.add_exception_handler(IntegrityError, handler) # type: ignore (only IntegrityError is allowed)
 
+def common_invalid_query_exception_handler(app: FastAPI) -> None:
+    def handler(request: Request, exc: InvalidQueryError) -> JSONResponse:
+        return JSONResponse(
+            status_code=400,
+            content={'detail': str(exc)},
+        )
+    app.add_exception_handler(InvalidQueryError, handler) # type: ignore (only InvalidQueryError is allowed)
+
 def common_unhandled_exception_handler(app: FastAPI) -> None:
     def handler(request: Request, exc: Exception) -> JSONResponse:
         log_middleware_exception(exc, request)
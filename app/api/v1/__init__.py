@@ -2,11 +2,11 @@ from types import ModuleType
 from fastapi import FastAPI, APIRouter
 from .errors import *
 from .middleware import *
-from .endpoints import auth, users, properties, buildings, units, leases, tenants, insurances
+from .endpoints import auth, users, properties, buildings, units, leases, tenants, insurances, search, typeahead
 
 router = APIRouter()
 
-modules: list[ModuleType] = [auth, users, properties, buildings, units, leases, tenants, insurances]
+modules: list[ModuleType] = [auth, users, properties, buildings, units, leases, tenants, insurances, search, typeahead]
 
 for module in modules:
     module_name: str = module.__name__.split('.')[-1]  # Get the module name without the package name
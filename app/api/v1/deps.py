@@ -1,18 +1,45 @@
-from fastapi import Depends
+import re
+import anyio
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import sha1
+from fastapi import Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Type
-from core.oauth2 import get_current_user, get_current_user_optional
-from schemas.user import Read as CurrentUser
-from schemas.request import PaginatedResults, RequestContext
+from typing import Any, AsyncIterator, Iterable, Iterator, Type, TypeVar
+from pydantic_core import to_json
+from core.oauth2 import get_current_identity, get_current_identity_async, get_current_user_optional
+from schemas.user import Identity, Read as CurrentUser
+from core.exceptions import InvalidQueryError
+from schemas.request import (
+    AsyncRequestContext, BatchResults, BulkResults, BulkUpdateResults, CountMode, ExportFormat, FilterParam, PaginatedResults, RequestContext, SearchResults, SubtreeResults,
+    UserContext,
+)
 from schemas.base import T
-from db import get_db
+from schemas.utils.sparse_models import make_sparse_model
+from controllers import response_cache
+from controllers.versions import Version
+from db import get_db, get_async_db, routing
 
-# Get the current active user and a new database session
+# Get the current active user (from the access token claims) and a new database session
 def get_request_context(
     db: Session = Depends(get_db),
-    current_user: CurrentUser = Depends(get_current_user)
+    current_user: Identity = Depends(get_current_identity)
 ) -> RequestContext:
-    return RequestContext(db=db, current_user=current_user)
+    context = RequestContext(db=db, current_user=current_user)
+    routing.bind_user(db, context.get_user_id())  # Reads stick to the primary after this user's writes
+    return context
+
+# Async variant of get_request_context, for endpoints running on the event loop (new async session)
+async def get_async_request_context(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Identity = Depends(get_current_identity_async)
+) -> AsyncRequestContext:
+    context = AsyncRequestContext(db=db, current_user=current_user)
+    routing.bind_user(db.sync_session, context.get_user_id())
+    return context
 
 # Get the current active user and a new database session if user is found and token is valid,
 # otherwise return only the database session without raising an exception
@@ -20,12 +47,174 @@ def get_request_context_optional(
     db: Session = Depends(get_db),
     current_user: CurrentUser | None = Depends(get_current_user_optional)
 ) -> RequestContext:
-    return RequestContext(db=db, current_user=current_user)
+    context = RequestContext(db=db, current_user=current_user)
+    routing.bind_user(db, context.get_user_id())
+    return context
 
-# Serialize resultset
+# Serialize resultset: the rows are validated once, into results typed with `schema`
 def serialize_results(
     results: PaginatedResults,
     schema: Type[T],
-) -> PaginatedResults:
+) -> PaginatedResults[T]:
+    return PaginatedResults[schema].model_validate(results, from_attributes=True)  # type: ignore[valid-type]
+
+# JSON response of validated content (or its encoded bytes), dumped in one pass by pydantic-core.
+# Endpoints return it instead of the content, so FastAPI neither validates it against the
+# response_model again nor re-encodes it with jsonable_encoder.
+class ModelResponse(Response):
+    media_type = 'application/json'
+
+    def render(self, content: Any) -> bytes:
+        return content if isinstance(content, bytes) else to_json(content)
+
+AnyResponse = TypeVar('AnyResponse', bound=Response)
+
+# Copy the headers set on the endpoint's `response` (validators, refreshed token cookies) to `result`,
+# which replaces it when returned
+def _keep_headers(result: AnyResponse, response: Response | None) -> AnyResponse:
+    if response is not None:
+        result.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers
+            if name not in (b'content-length', b'content-type') and (name, value) not in result.raw_headers
+        )
+    return result
+
+# ModelResponse with the headers set on the endpoint's `response`
+def model_response(content: Any, response: Response | None = None) -> ModelResponse:
+    return _keep_headers(ModelResponse(content), response)
+
+RowsResults = TypeVar('RowsResults', BatchResults, BulkUpdateResults)
+
+# Serialize batch or bulk resultset
+def serialize_batch(
+    results: RowsResults,
+    schema: Type[T],
+) -> RowsResults:
     results.rows = [schema.model_validate(item) for item in results.rows]
     return results
+
+# Schema to read and serialize with for `?fields=` (comma-separated, dotted for nested fields, e.g. name,building.name):
+# a generated subset of `schema`, or `schema` itself when no fields are requested
+def sparse_schema(schema: Type[T], fields: str | None) -> Type[T]:
+    if not fields:
+        return schema
+    try:
+        return make_sparse_model(schema, fields.split(','))  # type: ignore
+    except ValueError as exc:
+        raise InvalidQueryError(f'Invalid fields: {exc}') from exc
+
+_VALIDATOR_HEADERS = ('etag', 'last-modified', 'cache-control')
+
+def _http_date(value: datetime) -> str:
+    return format_datetime((value if value.tzinfo else value.replace(tzinfo=timezone.utc)).astimezone(timezone.utc), usegmt=True)
+
+def _modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return True  # Invalid dates are ignored
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) > since  # HTTP dates have a one-second resolution
+
+# Whether the request's If-None-Match matches `etag` (or, without If-None-Match and when `modified_since`
+# is allowed, whether If-Modified-Since is not older than `last_modified`)
+def _unchanged(request: Request, etag: str, last_modified: datetime | None, modified_since: bool) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        # Weak comparison: the W/ prefix is ignored
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or etag.removeprefix('W/') in tags
+    if modified_since and last_modified is not None and (since := request.headers.get('if-modified-since')):
+        return not _modified_since(since, last_modified)
+    return False
+
+# Conditional GET: a 304 response when the request's validators match `version` (see _unchanged).
+# Otherwise None, and the validators are set on `response` for the full response.
+# If-Modified-Since is only meaningful for single resources: a list's max(updated_at) misses deletes.
+def not_modified(request: Request, response: Response, version: Version | None, modified_since: bool = False) -> Response | None:
+    if version is None:
+        return None
+    digest = sha1(f'{request.url.path}?{request.url.query}|{version.tag}'.encode()).hexdigest()
+    headers = {'etag': f'W/"{digest}"', 'cache-control': 'private, no-cache'}
+    if version.last_modified is not None:
+        headers['last-modified'] = _http_date(version.last_modified)
+    if _unchanged(request, headers['etag'], version.last_modified, modified_since):
+        return _keep_headers(Response(status_code=304, headers=headers), response)
+    response.headers.update(headers)
+    return None
+
+# Response cache lookup for this request, with the tables its response reads: the cache key (None when
+# the cache is off or unavailable) and the cached response if any (a 304 when the request's validators match).
+# The cached response carries the headers set on the endpoint's `response` too (e.g. refreshed token cookies).
+def cached_response(
+    request: Request,
+    response: Response,
+    context: UserContext,
+    tables: Iterable[str],
+    modified_since: bool = False,
+) -> tuple[str | None, Response | None]:
+    key = response_cache.key(context.get_user_id(), f'{request.url.path}?{request.url.query}', tables)
+    entry = response_cache.get(key) if key is not None else None
+    if entry is None:
+        return key, None
+    body, headers = entry
+    if 'etag' in headers:
+        last_modified = parsedate_to_datetime(headers['last-modified']) if 'last-modified' in headers else None
+        if _unchanged(request, headers['etag'], last_modified, modified_since):
+            return key, _keep_headers(Response(status_code=304, headers=headers), response)
+    result = model_response(body, response)
+    result.headers.update(headers)
+    return key, result
+
+# Encode `content` (validated with `schema` first, when given) and return it as a ModelResponse.
+# With a cache key, the body is also cached with the validators set on `response`.
+def cache_response(key: str | None, content: Any, response: Response, schema: Type[T] | None = None) -> Any:
+    if content is None:
+        return content
+    body = to_json(schema.model_validate(content) if schema is not None else content)
+    if key is not None:
+        response_cache.store(key, body, {name: response.headers[name] for name in _VALIDATOR_HEADERS if name in response.headers})
+    return model_response(body, response)
+
+# Parse a comma-separated list of ids (e.g. ?ids=1,2,3)
+def parse_ids(ids: str = Query(..., description='Comma-separated list of ids')) -> list[int]:
+    try:
+        return [int(id) for id in ids.split(',') if id.strip()]
+    except ValueError as exc:
+        raise InvalidQueryError(f'Invalid ids: {ids}') from exc
+
+_FILTER_PARAM = re.compile(r'^filter\[(\w+)\](?:\[(\w+)\])?$')
+
+# Collect `filter[field]=value` / `filter[field][op]=value` query parameters
+def get_filters(request: Request) -> list[FilterParam]:
+    filters: list[FilterParam] = []
+    for key, value in request.query_params.multi_items():
+        if not key.startswith('filter'):
+            continue
+        if (match := _FILTER_PARAM.match(key)) is None:
+            raise InvalidQueryError(f'Invalid filter parameter: {key} (expected filter[field] or filter[field][op])')
+        filters.append(FilterParam(field=match[1], op=match[2] or 'eq', value=value))
+    return filters
+
+_EXPORT_MEDIA_TYPES: dict[str, str] = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+# Pull the chunks in the threadpool; when the stream stops early (the client disconnected and
+# the response was cancelled) close them, which closes their cursor and session
+async def _stream_chunks(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in iterate_in_threadpool(chunks):
+            yield chunk
+    finally:
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(getattr(chunks, 'close', lambda: None))
+
+# Stream the chunks of an export controller as a file download
+def export_response(chunks: Iterator[bytes], format: ExportFormat, name: str) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_chunks(chunks),
+        media_type=_EXPORT_MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="{name}.{format}"'},
+    )
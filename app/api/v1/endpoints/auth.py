@@ -1,36 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from core.oauth2 import create_and_set_token_cookie, delete_token_cookies
-from core.security import verify_password
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.oauth2 import create_and_set_token_cookie, delete_token_cookies, revoke_tokens, token_claims
+from core.security import verify_and_rehash_async
 from core.logger import log_exception
 from controllers import UserController
 from schemas import UserSchema
-from db import get_db
+from db import get_async_db
 from api.v1.deps import get_request_context_optional
 from schemas.request import RequestContext
 
 router: APIRouter = APIRouter()
 
+# Runs on the event loop: the user is loaded on the async session and bcrypt runs in the hashing
+# pool without holding a threadpool thread
 @router.post('/login', response_model=UserSchema.Read)
-def login_for_access_token(
+async def login_for_access_token(
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ):
-    user = UserController.get_by_email(db=db, email=form_data.username)
-    if not user or not verify_password(plain_password=form_data.password, hashed_password=user.password):
+    user = await db.run_sync(lambda session: UserController.get_by_email(db=session, email=form_data.username))
+    verified, new_hash = await verify_and_rehash_async(form_data.password, user.password) if user else (False, None)
+    if not user or not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Incorrect email or password.',
             headers={'WWW-Authenticate': 'Bearer'},
         )
-    create_and_set_token_cookie(response=response, token_type='access', data={'sub': user.email})
-    create_and_set_token_cookie(response=response, token_type='refresh', data={'sub': user.email})
+    if new_hash is not None:
+        # Stored with outdated hash settings (e.g. fewer bcrypt rounds)
+        await db.run_sync(lambda session: UserController.rehash_and_commit(db=session, id=user.id, hashed_password=new_hash))
+    create_and_set_token_cookie(response=response, token_type='access', data=token_claims(user, 'access'))
+    create_and_set_token_cookie(response=response, token_type='refresh', data=token_claims(user, 'refresh'))
     return user
 
 @router.post('/logout', response_model=dict)
-def logout(response: Response):
+def logout(request: Request, response: Response):
+    revoke_tokens(request)
     delete_token_cookies(response)
     return {'message': 'Logout successful'}
 
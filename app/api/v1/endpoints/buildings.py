@@ -1,11 +1,32 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Any
 from app.api.v1.deps import (
+    get_async_request_context,
     get_request_context,
+    get_filters,
+    not_modified,
+    cached_response,
+    cache_response,
+    export_response,
     serialize_results,
+    serialize_batch,
+    sparse_schema,
+    parse_ids,
+    AsyncRequestContext,
+    BatchResults,
+    BulkResults,
+    BulkUpdateResults,
+    CountMode,
+    ExportFormat,
+    FilterParam,
     PaginatedResults,
     RequestContext,
+    SubtreeResults,
 )
 from controllers import BuildingController, UnitController
+from controllers.async_base import run
 from schemas import BuildingSchema, UnitSchema
 
 router: APIRouter = APIRouter()
@@ -17,20 +38,77 @@ def create(
 ):
     return BuildingController.create_and_commit(context=context, schema=building, parent_id=property_id)
 
-@router.get('/', response_model=PaginatedResults)
-def index(
-    skip: int = 0, limit: int = 10,
+@router.post('/bulk', response_model=BulkResults)
+def bulk_create(
+    buildings: list[BuildingSchema.Create], property_id: int | None = None,
     context: RequestContext = Depends(get_request_context),
 ):
-    results = BuildingController.get_all(context=context, skip=skip, limit=limit)
-    return serialize_results(results, BuildingSchema.Read)
+    return BuildingController.bulk_create_and_commit(context=context, rows=buildings, parent_id=property_id)
+
+@router.patch('/bulk', response_model=BulkUpdateResults)
+def bulk_update(
+    buildings: list[dict[str, Any]],
+    context: RequestContext = Depends(get_request_context),
+):
+    results = BuildingController.bulk_update_and_commit(context=context, rows=buildings)
+    return serialize_batch(results, BuildingSchema.Base)
+
+@router.get('/', response_model=PaginatedResults[BuildingSchema.Read])
+async def index(
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 10, cursor: str | None = None, count: CountMode = 'exact',
+    sort: str | None = None, fields: str | None = None, filters: list[FilterParam] = Depends(get_filters),
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(BuildingSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, BuildingController.get_tables(schema))
+    if cached is not None:
+        return cached
+    version = await run(context, BuildingController.get_version, read_schema=schema, filters=filters)
+    if (unchanged := not_modified(request, response, version)) is not None:
+        return unchanged
+    results = await run(context, BuildingController.get_all, skip=skip, limit=limit, cursor=cursor, count=count, filters=filters, sort=sort, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, serialize_results(results, schema), response)
+
+# Every matching row, streamed as NDJSON or CSV (constant memory, whatever the row count)
+@router.get('/export', response_class=StreamingResponse)
+def export(
+    format: ExportFormat = 'ndjson', filters: list[FilterParam] = Depends(get_filters),
+    context: RequestContext = Depends(get_request_context),
+):
+    return export_response(BuildingController.export(context=context, format=format, filters=filters), format, 'buildings')
+
+@router.get('/batch', response_model=BatchResults)
+async def batch(
+    ids: list[int] = Depends(parse_ids), fields: str | None = None,
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(BuildingSchema.Read, fields)
+    results = await run(context, BuildingController.get_by_ids, ids=ids, read_schema=schema)
+    return serialize_batch(results, schema)
 
 @router.get('/{building_id}', response_model=BuildingSchema.Read)
-def read(
+async def read(
+    request: Request, response: Response,
+    building_id: int, fields: str | None = None,
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(BuildingSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, BuildingController.get_tables(schema), modified_since=True)
+    if cached is not None:
+        return cached
+    version = await run(context, BuildingController.get_version, id=building_id, read_schema=schema)
+    if (unchanged := not_modified(request, response, version, modified_since=True)) is not None:
+        return unchanged
+    item = await run(context, BuildingController.get_by_id, id=building_id, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, item, response, schema)
+
+@router.get('/{building_id}/stats', response_model=BuildingSchema.ReadWithStats)
+async def read_stats(
     building_id: int,
-    context: RequestContext = Depends(get_request_context),
+    context: AsyncRequestContext = Depends(get_async_request_context),
 ):
-    return BuildingController.get_by_id(context=context, id=building_id)
+    return await run(context, BuildingController.get_by_id, id=building_id, read_schema=BuildingSchema.ReadWithStats)
 
 @router.put('/{building_id}', response_model=BuildingSchema.Read)
 def update(
@@ -39,10 +117,39 @@ def update(
 ):
     return BuildingController.update_and_commit(context=context, schema=building, id=building_id)
 
-@router.get('/{building_id}/units/', response_model=PaginatedResults)
-def subindex(
-    building_id: int, skip: int = 0, limit: int = 10,
+@router.delete('/{building_id}', response_model=SubtreeResults)
+def delete(
+    building_id: int,
+    context: RequestContext = Depends(get_request_context),
+):
+    results = BuildingController.delete_and_commit(context=context, id=building_id)
+    if results is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Building not found')
+    return results
+
+@router.post('/{building_id}/archive', response_model=SubtreeResults)
+def archive(
+    building_id: int,
     context: RequestContext = Depends(get_request_context),
 ):
-    results = UnitController.get_all_from_parent(context=context, parent_id=building_id, skip=skip, limit=limit)
-    return serialize_results(results, UnitSchema.Read)
+    results = BuildingController.archive_and_commit(context=context, id=building_id)
+    if results is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Building not found')
+    return results
+
+@router.get('/{building_id}/units/', response_model=PaginatedResults[UnitSchema.Read])
+async def subindex(
+    request: Request, response: Response,
+    building_id: int, skip: int = 0, limit: int = 10, cursor: str | None = None, count: CountMode = 'exact',
+    sort: str | None = None, fields: str | None = None, filters: list[FilterParam] = Depends(get_filters),
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(UnitSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, UnitController.get_tables(schema))
+    if cached is not None:
+        return cached
+    version = await run(context, UnitController.get_version_from_parent, parent_id=building_id, read_schema=schema, filters=filters)
+    if (unchanged := not_modified(request, response, version)) is not None:
+        return unchanged
+    results = await run(context, UnitController.get_all_from_parent, parent_id=building_id, skip=skip, limit=limit, cursor=cursor, count=count, filters=filters, sort=sort, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, serialize_results(results, schema), response)
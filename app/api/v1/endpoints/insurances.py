@@ -1,11 +1,32 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Any
 from app.api.v1.deps import (
+    get_async_request_context,
     get_request_context,
+    get_filters,
+    not_modified,
+    cached_response,
+    cache_response,
+    export_response,
     serialize_results,
+    serialize_batch,
+    sparse_schema,
+    parse_ids,
+    AsyncRequestContext,
+    BatchResults,
+    BulkResults,
+    BulkUpdateResults,
+    CountMode,
+    ExportFormat,
+    FilterParam,
     PaginatedResults,
     RequestContext,
+    SubtreeResults,
 )
 from controllers import InsuranceController
+from controllers.async_base import run
 from schemas import InsuranceSchema
 
 router: APIRouter = APIRouter()
@@ -17,20 +38,70 @@ def create(
 ):
     return InsuranceController.create_and_commit(context=context, schema=insurance, parent_id=tenant_id)
 
-@router.get('/', response_model=PaginatedResults)
-def index(
-    skip: int = 0, limit: int = 10,
+@router.post('/bulk', response_model=BulkResults)
+def bulk_create(
+    insurances: list[InsuranceSchema.Create], tenant_id: int | None = None,
     context: RequestContext = Depends(get_request_context),
 ):
-    results = InsuranceController.get_all(context=context, skip=skip, limit=limit)
-    return serialize_results(results, InsuranceSchema.Read)
+    return InsuranceController.bulk_create_and_commit(context=context, rows=insurances, parent_id=tenant_id)
 
-@router.get('/{insurance_id}', response_model=InsuranceSchema.Read)
-def read(
-    insurance_id: int,
+@router.patch('/bulk', response_model=BulkUpdateResults)
+def bulk_update(
+    insurances: list[dict[str, Any]],
+    context: RequestContext = Depends(get_request_context),
+):
+    results = InsuranceController.bulk_update_and_commit(context=context, rows=insurances)
+    return serialize_batch(results, InsuranceSchema.Base)
+
+@router.get('/', response_model=PaginatedResults[InsuranceSchema.Read])
+async def index(
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 10, cursor: str | None = None, count: CountMode = 'exact',
+    sort: str | None = None, fields: str | None = None, filters: list[FilterParam] = Depends(get_filters),
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(InsuranceSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, InsuranceController.get_tables(schema))
+    if cached is not None:
+        return cached
+    version = await run(context, InsuranceController.get_version, read_schema=schema, filters=filters)
+    if (unchanged := not_modified(request, response, version)) is not None:
+        return unchanged
+    results = await run(context, InsuranceController.get_all, skip=skip, limit=limit, cursor=cursor, count=count, filters=filters, sort=sort, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, serialize_results(results, schema), response)
+
+# Every matching row, streamed as NDJSON or CSV (constant memory, whatever the row count)
+@router.get('/export', response_class=StreamingResponse)
+def export(
+    format: ExportFormat = 'ndjson', filters: list[FilterParam] = Depends(get_filters),
     context: RequestContext = Depends(get_request_context),
 ):
-    return InsuranceController.get_by_id(context=context, id=insurance_id)
+    return export_response(InsuranceController.export(context=context, format=format, filters=filters), format, 'insurances')
+
+@router.get('/batch', response_model=BatchResults)
+async def batch(
+    ids: list[int] = Depends(parse_ids), fields: str | None = None,
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(InsuranceSchema.Read, fields)
+    results = await run(context, InsuranceController.get_by_ids, ids=ids, read_schema=schema)
+    return serialize_batch(results, schema)
+
+@router.get('/{insurance_id}', response_model=InsuranceSchema.Read)
+async def read(
+    request: Request, response: Response,
+    insurance_id: int, fields: str | None = None,
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(InsuranceSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, InsuranceController.get_tables(schema), modified_since=True)
+    if cached is not None:
+        return cached
+    version = await run(context, InsuranceController.get_version, id=insurance_id, read_schema=schema)
+    if (unchanged := not_modified(request, response, version, modified_since=True)) is not None:
+        return unchanged
+    item = await run(context, InsuranceController.get_by_id, id=insurance_id, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, item, response, schema)
 
 @router.put('/{insurance_id}', response_model=InsuranceSchema.Read)
 def update(
@@ -38,3 +109,23 @@ def update(
     context: RequestContext = Depends(get_request_context),
 ):
     return InsuranceController.update_and_commit(context=context, schema=insurance, id=insurance_id)
+
+@router.delete('/{insurance_id}', response_model=SubtreeResults)
+def delete(
+    insurance_id: int,
+    context: RequestContext = Depends(get_request_context),
+):
+    results = InsuranceController.delete_and_commit(context=context, id=insurance_id)
+    if results is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Insurance not found')
+    return results
+
+@router.post('/{insurance_id}/archive', response_model=SubtreeResults)
+def archive(
+    insurance_id: int,
+    context: RequestContext = Depends(get_request_context),
+):
+    results = InsuranceController.archive_and_commit(context=context, id=insurance_id)
+    if results is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Insurance not found')
+    return results
@@ -1,11 +1,32 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Any
 from app.api.v1.deps import (
+    get_async_request_context,
     get_request_context,
+    get_filters,
+    not_modified,
+    cached_response,
+    cache_response,
+    export_response,
     serialize_results,
+    serialize_batch,
+    sparse_schema,
+    parse_ids,
+    AsyncRequestContext,
+    BatchResults,
+    BulkResults,
+    BulkUpdateResults,
+    CountMode,
+    ExportFormat,
+    FilterParam,
     PaginatedResults,
     RequestContext,
+    SubtreeResults,
 )
 from controllers import PropertyController, BuildingController
+from controllers.async_base import run
 from schemas import PropertySchema, BuildingSchema
 
 router: APIRouter = APIRouter()
@@ -17,20 +38,85 @@ def create(
 ):
     return PropertyController.create_and_commit(context=context, schema=property)
 
-@router.get('/', response_model=PaginatedResults)
-def index(
-    skip: int = 0, limit: int = 10,
+@router.post('/bulk', response_model=BulkResults)
+def bulk_create(
+    properties: list[PropertySchema.Create],
     context: RequestContext = Depends(get_request_context),
 ):
-    results = PropertyController.get_all(context=context, skip=skip, limit=limit)
-    return serialize_results(results, PropertySchema.Read)
+    return PropertyController.bulk_create_and_commit(context=context, rows=properties)
+
+@router.patch('/bulk', response_model=BulkUpdateResults)
+def bulk_update(
+    properties: list[dict[str, Any]],
+    context: RequestContext = Depends(get_request_context),
+):
+    results = PropertyController.bulk_update_and_commit(context=context, rows=properties)
+    return serialize_batch(results, PropertySchema.Base)
+
+# Reads run on the event loop (async session), in every resource router. Writes stay on the threadpool: their commits
+# invalidate the typeahead and response caches with blocking Redis calls
+@router.get('/', response_model=PaginatedResults[PropertySchema.Read])
+async def index(
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 10, cursor: str | None = None, count: CountMode = 'exact',
+    sort: str | None = None, fields: str | None = None, filters: list[FilterParam] = Depends(get_filters),
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(PropertySchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, PropertyController.get_tables(schema))
+    if cached is not None:
+        return cached
+    version = await run(context, PropertyController.get_version, read_schema=schema, filters=filters)
+    if (unchanged := not_modified(request, response, version)) is not None:
+        return unchanged
+    results = await run(context, PropertyController.get_all, skip=skip, limit=limit, cursor=cursor, count=count, filters=filters, sort=sort, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, serialize_results(results, schema), response)
+
+# Every matching row, streamed as NDJSON or CSV (constant memory, whatever the row count)
+@router.get('/export', response_class=StreamingResponse)
+def export(
+    format: ExportFormat = 'ndjson', filters: list[FilterParam] = Depends(get_filters),
+    context: RequestContext = Depends(get_request_context),
+):
+    return export_response(PropertyController.export(context=context, format=format, filters=filters), format, 'properties')
+
+@router.get('/batch', response_model=BatchResults)
+async def batch(
+    ids: list[int] = Depends(parse_ids), fields: str | None = None,
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(PropertySchema.Read, fields)
+    results = await run(context, PropertyController.get_by_ids, ids=ids, read_schema=schema)
+    return serialize_batch(results, schema)
 
 @router.get('/{property_id}', response_model=PropertySchema.Read)
-def read(
+async def read(
+    request: Request, response: Response,
+    property_id: int, fields: str | None = None,
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(PropertySchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, PropertyController.get_tables(schema), modified_since=True)
+    if cached is not None:
+        return cached
+    version = await run(context, PropertyController.get_version, id=property_id, read_schema=schema)
+    if (unchanged := not_modified(request, response, version, modified_since=True)) is not None:
+        return unchanged
+    item = await run(context, PropertyController.get_by_id, id=property_id, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, item, response, schema)
+
+@router.get('/{property_id}/stats', response_model=PropertySchema.ReadWithStats)
+async def read_stats(
+    request: Request, response: Response,
     property_id: int,
-    context: RequestContext = Depends(get_request_context),
+    context: AsyncRequestContext = Depends(get_async_request_context),
 ):
-    return PropertyController.get_by_id(context=context, id=property_id)
+    schema = PropertySchema.ReadWithStats
+    key, cached = await run_in_threadpool(cached_response, request, response, context, PropertyController.get_tables(schema))
+    if cached is not None:
+        return cached
+    item = await run(context, PropertyController.get_by_id, id=property_id, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, item, response, schema)
 
 @router.put('/{property_id}', response_model=PropertySchema.Read)
 def update(
@@ -39,10 +125,39 @@ def update(
 ):
     return PropertyController.update_and_commit(context=context, schema=property, id=property_id)
 
-@router.get('/{property_id}/buildings/', response_model=PaginatedResults)
-def subindex(
-    property_id: int, skip: int = 0, limit: int = 10,
+@router.delete('/{property_id}', response_model=SubtreeResults)
+def delete(
+    property_id: int,
+    context: RequestContext = Depends(get_request_context),
+):
+    results = PropertyController.delete_and_commit(context=context, id=property_id)
+    if results is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Property not found')
+    return results
+
+@router.post('/{property_id}/archive', response_model=SubtreeResults)
+def archive(
+    property_id: int,
     context: RequestContext = Depends(get_request_context),
 ):
-    results = BuildingController.get_all_from_parent(context=context, parent_id=property_id, skip=skip, limit=limit)
-    return serialize_results(results, BuildingSchema.Read)
+    results = PropertyController.archive_and_commit(context=context, id=property_id)
+    if results is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Property not found')
+    return results
+
+@router.get('/{property_id}/buildings/', response_model=PaginatedResults[BuildingSchema.Read])
+async def subindex(
+    request: Request, response: Response,
+    property_id: int, skip: int = 0, limit: int = 10, cursor: str | None = None, count: CountMode = 'exact',
+    sort: str | None = None, fields: str | None = None, filters: list[FilterParam] = Depends(get_filters),
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(BuildingSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, BuildingController.get_tables(schema))
+    if cached is not None:
+        return cached
+    version = await run(context, BuildingController.get_version_from_parent, parent_id=property_id, read_schema=schema, filters=filters)
+    if (unchanged := not_modified(request, response, version)) is not None:
+        return unchanged
+    results = await run(context, BuildingController.get_all_from_parent, parent_id=property_id, skip=skip, limit=limit, cursor=cursor, count=count, filters=filters, sort=sort, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, serialize_results(results, schema), response)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Query
+from app.api.v1.deps import (
+    get_request_context,
+    RequestContext,
+    SearchResults,
+)
+from controllers import SearchController
+
+router: APIRouter = APIRouter()
+
+@router.get('/', response_model=SearchResults)
+def search(
+    q: str, limit: int = Query(20, ge=1, le=100),
+    context: RequestContext = Depends(get_request_context),
+):
+    return SearchController.search(context=context, q=q, limit=limit)
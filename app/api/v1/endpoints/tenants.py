@@ -1,11 +1,32 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Any
 from app.api.v1.deps import (
+    get_async_request_context,
     get_request_context,
+    get_filters,
+    not_modified,
+    cached_response,
+    cache_response,
+    export_response,
     serialize_results,
+    serialize_batch,
+    sparse_schema,
+    parse_ids,
+    AsyncRequestContext,
+    BatchResults,
+    BulkResults,
+    BulkUpdateResults,
+    CountMode,
+    ExportFormat,
+    FilterParam,
     PaginatedResults,
     RequestContext,
+    SubtreeResults,
 )
 from controllers import TenantController, InsuranceController
+from controllers.async_base import run
 from schemas import TenantSchema, InsuranceSchema
 
 router: APIRouter = APIRouter()
@@ -17,20 +38,70 @@ def create(
 ):
     return TenantController.create_and_commit(context=context, schema=tenant, parent_id=lease_id)
 
-@router.get('/', response_model=PaginatedResults)
-def index(
-    skip: int = 0, limit: int = 10,
+@router.post('/bulk', response_model=BulkResults)
+def bulk_create(
+    tenants: list[TenantSchema.Create], lease_id: int | None = None,
     context: RequestContext = Depends(get_request_context),
 ):
-    results = TenantController.get_all(context=context, skip=skip, limit=limit)
-    return serialize_results(results, TenantSchema.Read)
+    return TenantController.bulk_create_and_commit(context=context, rows=tenants, parent_id=lease_id)
 
-@router.get('/{tenant_id}', response_model=TenantSchema.Read)
-def read(
-    tenant_id: int,
+@router.patch('/bulk', response_model=BulkUpdateResults)
+def bulk_update(
+    tenants: list[dict[str, Any]],
+    context: RequestContext = Depends(get_request_context),
+):
+    results = TenantController.bulk_update_and_commit(context=context, rows=tenants)
+    return serialize_batch(results, TenantSchema.Base)
+
+@router.get('/', response_model=PaginatedResults[TenantSchema.Read])
+async def index(
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 10, cursor: str | None = None, count: CountMode = 'exact',
+    sort: str | None = None, fields: str | None = None, filters: list[FilterParam] = Depends(get_filters),
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(TenantSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, TenantController.get_tables(schema))
+    if cached is not None:
+        return cached
+    version = await run(context, TenantController.get_version, read_schema=schema, filters=filters)
+    if (unchanged := not_modified(request, response, version)) is not None:
+        return unchanged
+    results = await run(context, TenantController.get_all, skip=skip, limit=limit, cursor=cursor, count=count, filters=filters, sort=sort, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, serialize_results(results, schema), response)
+
+# Every matching row, streamed as NDJSON or CSV (constant memory, whatever the row count)
+@router.get('/export', response_class=StreamingResponse)
+def export(
+    format: ExportFormat = 'ndjson', filters: list[FilterParam] = Depends(get_filters),
     context: RequestContext = Depends(get_request_context),
 ):
-    return TenantController.get_by_id(context=context, id=tenant_id)
+    return export_response(TenantController.export(context=context, format=format, filters=filters), format, 'tenants')
+
+@router.get('/batch', response_model=BatchResults)
+async def batch(
+    ids: list[int] = Depends(parse_ids), fields: str | None = None,
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(TenantSchema.Read, fields)
+    results = await run(context, TenantController.get_by_ids, ids=ids, read_schema=schema)
+    return serialize_batch(results, schema)
+
+@router.get('/{tenant_id}', response_model=TenantSchema.Read)
+async def read(
+    request: Request, response: Response,
+    tenant_id: int, fields: str | None = None,
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(TenantSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, TenantController.get_tables(schema), modified_since=True)
+    if cached is not None:
+        return cached
+    version = await run(context, TenantController.get_version, id=tenant_id, read_schema=schema)
+    if (unchanged := not_modified(request, response, version, modified_since=True)) is not None:
+        return unchanged
+    item = await run(context, TenantController.get_by_id, id=tenant_id, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, item, response, schema)
 
 @router.put('/{tenant_id}', response_model=TenantSchema.Read)
 def update(
@@ -39,10 +110,39 @@ def update(
 ):
     return TenantController.update_and_commit(context=context, schema=tenant, id=tenant_id)
 
-@router.get('/{tenant_id}/insurances/', response_model=PaginatedResults)
-def subindex(
-    tenant_id: int, skip: int = 0, limit: int = 10,
+@router.delete('/{tenant_id}', response_model=SubtreeResults)
+def delete(
+    tenant_id: int,
     context: RequestContext = Depends(get_request_context),
 ):
-    results = InsuranceController.get_all_from_parent(context=context, parent_id=tenant_id, skip=skip, limit=limit)
-    return serialize_results(results, InsuranceSchema.Read)
+    results = TenantController.delete_and_commit(context=context, id=tenant_id)
+    if results is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Tenant not found')
+    return results
+
+@router.post('/{tenant_id}/archive', response_model=SubtreeResults)
+def archive(
+    tenant_id: int,
+    context: RequestContext = Depends(get_request_context),
+):
+    results = TenantController.archive_and_commit(context=context, id=tenant_id)
+    if results is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Tenant not found')
+    return results
+
+@router.get('/{tenant_id}/insurances/', response_model=PaginatedResults[InsuranceSchema.Read])
+async def subindex(
+    request: Request, response: Response,
+    tenant_id: int, skip: int = 0, limit: int = 10, cursor: str | None = None, count: CountMode = 'exact',
+    sort: str | None = None, fields: str | None = None, filters: list[FilterParam] = Depends(get_filters),
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(InsuranceSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, InsuranceController.get_tables(schema))
+    if cached is not None:
+        return cached
+    version = await run(context, InsuranceController.get_version_from_parent, parent_id=tenant_id, read_schema=schema, filters=filters)
+    if (unchanged := not_modified(request, response, version)) is not None:
+        return unchanged
+    results = await run(context, InsuranceController.get_all_from_parent, parent_id=tenant_id, skip=skip, limit=limit, cursor=cursor, count=count, filters=filters, sort=sort, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, serialize_results(results, schema), response)
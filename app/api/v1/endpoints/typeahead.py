@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse
+from app.api.v1.deps import (
+    get_request_context,
+    RequestContext,
+)
+from controllers import TypeaheadController
+
+router: APIRouter = APIRouter()
+
+# [[id, label], ...] pairs, returned as-is (no response model to validate against)
+@router.get('/{resource}', response_class=JSONResponse)
+def lookup(
+    resource: str, prefix: str = '', limit: int = Query(10, ge=1, le=50), parent_id: int | None = None,
+    context: RequestContext = Depends(get_request_context),
+):
+    pairs = TypeaheadController.lookup(context=context, resource=resource, prefix=prefix, limit=limit, parent_id=parent_id)
+    return JSONResponse(pairs)
@@ -1,11 +1,32 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Any
 from app.api.v1.deps import (
+    get_async_request_context,
     get_request_context,
+    get_filters,
+    not_modified,
+    cached_response,
+    cache_response,
+    export_response,
     serialize_results,
+    serialize_batch,
+    sparse_schema,
+    parse_ids,
+    AsyncRequestContext,
+    BatchResults,
+    BulkResults,
+    BulkUpdateResults,
+    CountMode,
+    ExportFormat,
+    FilterParam,
     PaginatedResults,
     RequestContext,
+    SubtreeResults,
 )
 from controllers import UnitController, LeaseController
+from controllers.async_base import run
 from schemas import UnitSchema, LeaseSchema
 
 router: APIRouter = APIRouter()
@@ -17,20 +38,70 @@ def create(
 ):
     return UnitController.create_and_commit(context=context, schema=unit, parent_id=building_id)
 
-@router.get('/', response_model=PaginatedResults)
-def index(
-    skip: int = 0, limit: int = 10,
+@router.post('/bulk', response_model=BulkResults)
+def bulk_create(
+    units: list[UnitSchema.Create], building_id: int | None = None,
     context: RequestContext = Depends(get_request_context),
 ):
-    results = UnitController.get_all(context=context, skip=skip, limit=limit)
-    return serialize_results(results, UnitSchema.Read)
+    return UnitController.bulk_create_and_commit(context=context, rows=units, parent_id=building_id)
 
-@router.get('/{unit_id}', response_model=UnitSchema.Read)
-def read(
-    unit_id: int,
+@router.patch('/bulk', response_model=BulkUpdateResults)
+def bulk_update(
+    units: list[dict[str, Any]],
+    context: RequestContext = Depends(get_request_context),
+):
+    results = UnitController.bulk_update_and_commit(context=context, rows=units)
+    return serialize_batch(results, UnitSchema.Base)
+
+@router.get('/', response_model=PaginatedResults[UnitSchema.Read])
+async def index(
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 10, cursor: str | None = None, count: CountMode = 'exact',
+    sort: str | None = None, fields: str | None = None, filters: list[FilterParam] = Depends(get_filters),
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(UnitSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, UnitController.get_tables(schema))
+    if cached is not None:
+        return cached
+    version = await run(context, UnitController.get_version, read_schema=schema, filters=filters)
+    if (unchanged := not_modified(request, response, version)) is not None:
+        return unchanged
+    results = await run(context, UnitController.get_all, skip=skip, limit=limit, cursor=cursor, count=count, filters=filters, sort=sort, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, serialize_results(results, schema), response)
+
+# Every matching row, streamed as NDJSON or CSV (constant memory, whatever the row count)
+@router.get('/export', response_class=StreamingResponse)
+def export(
+    format: ExportFormat = 'ndjson', filters: list[FilterParam] = Depends(get_filters),
     context: RequestContext = Depends(get_request_context),
 ):
-    return UnitController.get_by_id(context=context, id=unit_id)
+    return export_response(UnitController.export(context=context, format=format, filters=filters), format, 'units')
+
+@router.get('/batch', response_model=BatchResults)
+async def batch(
+    ids: list[int] = Depends(parse_ids), fields: str | None = None,
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(UnitSchema.Read, fields)
+    results = await run(context, UnitController.get_by_ids, ids=ids, read_schema=schema)
+    return serialize_batch(results, schema)
+
+@router.get('/{unit_id}', response_model=UnitSchema.Read)
+async def read(
+    request: Request, response: Response,
+    unit_id: int, fields: str | None = None,
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(UnitSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, UnitController.get_tables(schema), modified_since=True)
+    if cached is not None:
+        return cached
+    version = await run(context, UnitController.get_version, id=unit_id, read_schema=schema)
+    if (unchanged := not_modified(request, response, version, modified_since=True)) is not None:
+        return unchanged
+    item = await run(context, UnitController.get_by_id, id=unit_id, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, item, response, schema)
 
 @router.put('/{unit_id}', response_model=UnitSchema.Read)
 def update(
@@ -39,10 +110,39 @@ def update(
 ):
     return UnitController.update_and_commit(context=context, schema=unit, id=unit_id)
 
-@router.get('/{unit_id}/leases/', response_model=PaginatedResults)
-def subindex(
-    unit_id: int, skip: int = 0, limit: int = 10,
+@router.delete('/{unit_id}', response_model=SubtreeResults)
+def delete(
+    unit_id: int,
     context: RequestContext = Depends(get_request_context),
 ):
-    results = LeaseController.get_all_from_parent(context=context, parent_id=unit_id, skip=skip, limit=limit)
-    return serialize_results(results, LeaseSchema.Read)
+    results = UnitController.delete_and_commit(context=context, id=unit_id)
+    if results is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Unit not found')
+    return results
+
+@router.post('/{unit_id}/archive', response_model=SubtreeResults)
+def archive(
+    unit_id: int,
+    context: RequestContext = Depends(get_request_context),
+):
+    results = UnitController.archive_and_commit(context=context, id=unit_id)
+    if results is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Unit not found')
+    return results
+
+@router.get('/{unit_id}/leases/', response_model=PaginatedResults[LeaseSchema.Read])
+async def subindex(
+    request: Request, response: Response,
+    unit_id: int, skip: int = 0, limit: int = 10, cursor: str | None = None, count: CountMode = 'exact',
+    sort: str | None = None, fields: str | None = None, filters: list[FilterParam] = Depends(get_filters),
+    context: AsyncRequestContext = Depends(get_async_request_context),
+):
+    schema = sparse_schema(LeaseSchema.Read, fields)
+    key, cached = await run_in_threadpool(cached_response, request, response, context, LeaseController.get_tables(schema))
+    if cached is not None:
+        return cached
+    version = await run(context, LeaseController.get_version_from_parent, parent_id=unit_id, read_schema=schema, filters=filters)
+    if (unchanged := not_modified(request, response, version)) is not None:
+        return unchanged
+    results = await run(context, LeaseController.get_all_from_parent, parent_id=unit_id, skip=skip, limit=limit, cursor=cursor, count=count, filters=filters, sort=sort, read_schema=schema)
+    return await run_in_threadpool(cache_response, key, serialize_results(results, schema), response)
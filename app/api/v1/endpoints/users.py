@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from app.api.v1.deps import (
     get_request_context,
+    model_response,
     serialize_results,
+    CountMode,
     PaginatedResults,
     RequestContext,
 )
@@ -22,13 +24,14 @@ def create_user(
         )
     return UserController.create_and_commit(db=context.db, schema=user)
 
-@router.get('/', response_model=PaginatedResults)
+@router.get('/', response_model=PaginatedResults[UserSchema.Read])
 def read_users(
-    skip: int = 0, limit: int = 10,
+    response: Response,
+    skip: int = 0, limit: int = 10, count: CountMode = 'exact',
     context: RequestContext = Depends(get_request_context),
 ):
-    results = UserController.get_all_paginated(db=context.db, skip=skip, limit=limit)
-    return serialize_results(results, UserSchema.Read)
+    results = UserController.get_all_paginated(db=context.db, skip=skip, limit=limit, count=count)
+    return model_response(serialize_results(results, UserSchema.Read), response)
 
 @router.get('/{user_id}', response_model=UserSchema.Read)
 def read_user(
@@ -6,6 +6,8 @@ from . import (
     lease as LeaseController,
     tenant as TenantController,
     insurance as InsuranceController,
+    search as SearchController,
+    typeahead as TypeaheadController,
 )
 
 __all__ = [
@@ -16,4 +18,6 @@ __all__ = [
     'LeaseController',
     'TenantController',
     'InsuranceController',
+    'SearchController',
+    'TypeaheadController',
 ]
@@ -0,0 +1,138 @@
+'''
+Async variants of the `base` operations, for routers running on the event loop
+
+Each operation runs its `base` counterpart through `AsyncSession.run_sync`. The
+ORM code (including the counter, summary, search and typeahead hooks) runs in a
+greenlet on the event loop, and every database round trip is awaited on the
+async driver (psycopg's async connection). No threadpool thread is held while
+the database works, and both paths share one implementation.
+
+`run` does the same for any sync controller operation taking a `context`, e.g.
+`await run(context, PropertyController.get_all, limit=20)`, which keeps the
+resource controllers' defaults (read schema, parent key).
+
+Rows come back with the relationships needed by `read_schema` loaded (async
+sessions do not expire them on commit). Loading any other relationship after
+the call raises MissingGreenlet.
+'''
+from typing import Any, Callable, Sequence, Type, TypeVar
+from schemas.base import BaseModel
+from schemas.request import (
+    AllResults, AsyncRequestContext, BatchResults, BulkResults, BulkUpdateResults, CountMode, FilterParam, PaginatedResults, SubtreeResults,
+)
+from db import T
+from . import base
+
+R = TypeVar('R')
+
+# Run a sync controller operation (called with `context=` and `kwargs`) on the request's async session
+async def run(context: AsyncRequestContext, operation: Callable[..., R], /, **kwargs: Any) -> R:
+    return await context.db.run_sync(lambda db: operation(context=context.bind(db), **kwargs))
+
+async def exists_where(context: AsyncRequestContext, model: Type[T], key: str, val: Any) -> bool:
+    return await run(context, base.exists_where, model=model, key=key, val=val)
+
+async def get_by(
+    context: AsyncRequestContext,
+    model: Type[T],
+    key: str,
+    val: Any,
+    read_schema: Type[BaseModel] | None = None,
+) -> T | None:
+    return await run(context, base.get_by, model=model, key=key, val=val, read_schema=read_schema)
+
+async def get_by_id(context: AsyncRequestContext, model: Type[T], id: int, read_schema: Type[BaseModel] | None = None) -> T | None:
+    return await run(context, base.get_by_id, model=model, id=id, read_schema=read_schema)
+
+async def get_by_ids(
+    context: AsyncRequestContext,
+    model: Type[T],
+    ids: Sequence[int],
+    read_schema: Type[BaseModel] | None = None,
+) -> BatchResults:
+    return await run(context, base.get_by_ids, model=model, ids=ids, read_schema=read_schema)
+
+async def get_all_unpaginated(context: AsyncRequestContext, model: Type[T], read_schema: Type[BaseModel] | None = None) -> AllResults:
+    return await run(context, base.get_all_unpaginated, model=model, read_schema=read_schema)
+
+async def get_all(
+    context: AsyncRequestContext,
+    model: Type[T],
+    skip: int = 0,
+    limit: int = 10,
+    cursor: str | None = None,
+    count: CountMode = 'exact',
+    read_schema: Type[BaseModel] | None = None,
+    filters: Sequence[FilterParam] = (),
+    sort: str | None = None,
+) -> PaginatedResults:
+    return await run(
+        context, base.get_all, model=model, skip=skip, limit=limit, cursor=cursor, count=count,
+        read_schema=read_schema, filters=filters, sort=sort,
+    )
+
+async def get_all_from_parent(
+    context: AsyncRequestContext,
+    model: Type[T],
+    parent_key: str,
+    parent_value: int,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: str | None = None,
+    count: CountMode = 'exact',
+    read_schema: Type[BaseModel] | None = None,
+    filters: Sequence[FilterParam] = (),
+    sort: str | None = None,
+) -> PaginatedResults:
+    return await run(
+        context, base.get_all_from_parent, model=model, parent_key=parent_key, parent_value=parent_value,
+        skip=skip, limit=limit, cursor=cursor, count=count, read_schema=read_schema, filters=filters, sort=sort,
+    )
+
+async def create_and_commit(
+    context: AsyncRequestContext,
+    model: Type[T],
+    schema: BaseModel,
+    parent_key: str | None,
+    parent_value: int | None,
+    read_schema: Type[BaseModel] | None = None,
+) -> T | None:
+    return await run(
+        context, base.create_and_commit, model=model, schema=schema,
+        parent_key=parent_key, parent_value=parent_value, read_schema=read_schema,
+    )
+
+async def bulk_create_and_commit(
+    context: AsyncRequestContext,
+    model: Type[T],
+    rows: Sequence[BaseModel],
+    parent_key: str | None,
+    parent_value: int | None = None,
+) -> BulkResults:
+    return await run(
+        context, base.bulk_create_and_commit, model=model, rows=rows,
+        parent_key=parent_key, parent_value=parent_value,
+    )
+
+async def update_and_commit(
+    context: AsyncRequestContext,
+    model: Type[T],
+    schema: BaseModel,
+    id: int,
+    read_schema: Type[BaseModel] | None = None,
+) -> T | None:
+    return await run(context, base.update_and_commit, model=model, schema=schema, id=id, read_schema=read_schema)
+
+async def bulk_update_and_commit(
+    context: AsyncRequestContext,
+    model: Type[T],
+    update_schema: Type[BaseModel],
+    rows: Sequence[dict[str, Any]],
+) -> BulkUpdateResults:
+    return await run(context, base.bulk_update_and_commit, model=model, update_schema=update_schema, rows=rows)
+
+async def delete_and_commit(context: AsyncRequestContext, model: Type[T], id: int) -> bool:
+    return await run(context, base.delete_and_commit, model=model, id=id)
+
+async def delete_subtree_and_commit(context: AsyncRequestContext, model: Type[T], id: int, archive: bool = False) -> SubtreeResults | None:
+    return await run(context, base.delete_subtree_and_commit, model=model, id=id, archive=archive)
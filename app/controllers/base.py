@@ -1,32 +1,64 @@
-from sqlalchemy import select, func
+from pydantic import ValidationError
+from sqlalchemy import ColumnElement, FromClause, Select, bindparam, select, insert, update, delete, values, column, literal, union_all, func, null, true
 from sqlalchemy.exc import NoResultFound, MultipleResultsFound, IntegrityError
-from typing import Type, Any
+from sqlalchemy.orm import Session, undefer
+from typing import Type, Any, Sequence
+from core import settings
+from core.exceptions import InvalidQueryError
 from core.logger import log_exception
 from schemas.base import BaseModel
-from schemas.request import AllResults, PaginatedResults, RequestContext
-from db import T
+from schemas.request import (
+    AllResults, BatchResults, BulkResults, BulkRowError, BulkUpdateResults, CountMode, FilterParam,
+    PaginatedResults, RequestContext, SubtreeResults,
+)
+from db import T, routing
+from db.loaders import loader_options
+from . import counter, filtering, response_cache, search, statements, summary, typeahead
+from .pagination import apply_keyset, decode_cursor, edge_values, encode_cursor, estimate_count, key_order
 
 def _owned_by(model: Type[T], context: RequestContext):
     return getattr(model, 'owner_id') == context.get_user_id()
 
+# Owner criteria for registered statements (the owner is passed as the 'owner_id' parameter)
+def _owned_by_param(model: Type[T]):
+    return getattr(model, 'owner_id') == bindparam('owner_id')
+
 def exists_where(context: RequestContext, model: Type[T], key: str, val: Any) -> bool:
     session = context.db
-    stmt = select(func.count("*")).select_from(model).where(
-        getattr(model, key) == val,
-        _owned_by(model, context)
-    )
-    count = session.scalar(stmt)
+    stmt = statements.statement(('exists_where', model, key), lambda: select(func.count("*")).select_from(model).where(
+        getattr(model, key) == bindparam('value'),
+        _owned_by_param(model)
+    ))
+    with routing.read_only(session):
+        count = session.scalar(stmt, {'value': val, 'owner_id': context.get_user_id()})
     return (count or 0) > 0
 
-def get_by(context: RequestContext, model: Type[T], key: str, val: Any) -> T | None:
+def _reload(context: RequestContext, model: Type[T], db_obj: T, read_schema: Type[BaseModel] | None) -> T:
+    # Refresh the row together with the relationships needed to serialize it with `read_schema`
+    stmt = statements.statement(('reload', model, read_schema), lambda: (
+        select(model)
+        .where(getattr(model, 'id') == bindparam('id'))
+        .options(*loader_options(model, read_schema))
+        .execution_options(populate_existing=True)
+    ))
+    return context.db.scalars(stmt, {'id': getattr(db_obj, 'id')}).one()
+
+def get_by(
+    context: RequestContext,
+    model: Type[T],
+    key: str,
+    val: Any,
+    read_schema: Type[BaseModel] | None = None,
+) -> T | None:
     session = context.db
     try:
-        stmt = select(model).where(
-            getattr(model, key) == val,
-            _owned_by(model, context)
-        )
+        stmt = statements.statement(('get_by', model, key, read_schema), lambda: select(model).where(
+            getattr(model, key) == bindparam('value'),
+            _owned_by_param(model)
+        ).options(*loader_options(model, read_schema)))
         # scalar_one() or scalars(...).one() both raise NoResultFound / MultipleResultsFound
-        return session.scalars(stmt).one()
+        with routing.read_only(session):
+            return session.scalars(stmt, {'value': val, 'owner_id': context.get_user_id()}).one()
     except NoResultFound as exc:
         log_exception(exc, f'No {model.__name__} record found where {key} = {val}')
         return None
@@ -34,90 +66,222 @@ def get_by(context: RequestContext, model: Type[T], key: str, val: Any) -> T | N
         log_exception(exc, f'Multiple {model.__name__} records found where {key} = {val}')
         return None
 
-def get_by_id(context: RequestContext, model: Type[T], id: int) -> T | None:
-    return get_by(context=context, model=model, key='id', val=id)
+def get_by_id(context: RequestContext, model: Type[T], id: int, read_schema: Type[BaseModel] | None = None) -> T | None:
+    return get_by(context=context, model=model, key='id', val=id, read_schema=read_schema)
 
-def get_all_unpaginated(context: RequestContext, model: Type[T]) -> AllResults:
-    session = context.db
-    # Count
-    count_stmt = select(func.count('*')).select_from(model).where(_owned_by(model, context))
-    row_count = session.scalar(count_stmt) or 0
+# Fetch several records by id in one query, keeping the requested order and reporting ids that were not found
+def get_by_ids(
+    context: RequestContext,
+    model: Type[T],
+    ids: Sequence[int],
+    read_schema: Type[BaseModel] | None = None,
+) -> BatchResults:
+    ids = list(dict.fromkeys(ids))  # Drop duplicates, keep order
+    if len(ids) > settings.api_batch_max_size:
+        raise InvalidQueryError(f'Too many ids requested ({len(ids)}), the maximum is {settings.api_batch_max_size}')
+    if not ids:
+        return BatchResults(rows=[], missing=[])
 
-    # Rows
-    select_stmt = select(model).where(_owned_by(model, context))
-    rows = session.scalars(select_stmt).all()
+    stmt = statements.statement(('get_by_ids', model, read_schema), lambda: select(model).where(
+        getattr(model, 'id').in_(bindparam('ids', expanding=True)),
+        _owned_by_param(model)
+    ).options(*loader_options(model, read_schema)))
+    with routing.read_only(context.db):
+        found = {getattr(row, 'id'): row for row in context.db.scalars(stmt, {'ids': ids, 'owner_id': context.get_user_id()})}
 
-    return AllResults(rows=rows, rowCount=row_count)
+    return BatchResults(
+        rows=[found[id] for id in ids if id in found],
+        missing=[id for id in ids if id not in found],
+    )
 
-def get_all(context: RequestContext, model: Type[T], skip: int = 0, limit: int = 10) -> PaginatedResults:
+def get_all_unpaginated(context: RequestContext, model: Type[T], read_schema: Type[BaseModel] | None = None) -> AllResults:
     session = context.db
-    # Count
-    # count_stmt = select(func.count('*')).select_from(model).where(_owned_by(model, context))
-    # row_count = session.scalar(count_stmt) or 0
-    row_count = 100
-
-    # Paginated rows
+    # Rows + Count (in one statement)
+    total = counter.count_column(model, owner_id=context.get_user_id())
     select_stmt = (
-        select(model)
+        select(model, total.label('row_count'))
         .where(_owned_by(model, context))
-        .offset(skip)
-        .limit(limit)
+        .options(*loader_options(model, read_schema))
     )
-    print('+'*50)
-    print('GET_ALL SELECT START')
-    print('-'*50)
-    rows = session.scalars(select_stmt).all()
-    print('-'*50)
-    print('GET_ALL SELECT END')
-    print('+'*50)
+    with routing.read_only(session):
+        results = session.execute(select_stmt).all()
 
+    return AllResults(rows=[result[0] for result in results], rowCount=results[0].row_count if results else 0)
 
-    return PaginatedResults(
-        rows=rows,
-        rowCount=row_count,
-        pageStart=min(skip, row_count),
-        pageEnd=min(skip + limit, row_count)
-    )
-
-def get_all_from_parent(
+def _get_page(
     context: RequestContext,
     model: Type[T],
-    parent_key: str,
-    parent_value: int,
-    skip: int = 0,
-    limit: int = 10
+    scope: dict[str, Any],
+    skip: int,
+    limit: int,
+    cursor: str | None,
+    count: CountMode,
+    read_schema: Type[BaseModel] | None,
+    filters: Sequence[FilterParam] = (),
+    sort: str | None = None,
 ) -> PaginatedResults:
     session = context.db
-    # Count
-    count_stmt = select(func.count('*')).select_from(model).where(
-        getattr(model, parent_key) == parent_value,
-        _owned_by(model, context)
+
+    # `scope` maps the owner (and parent) columns to their values, which are passed as parameters
+    params: dict[str, Any] = dict(scope)
+    parent_key = next((name for name in scope if name != 'owner_id'), None)
+    criteria: list[ColumnElement[bool]] = [getattr(model, name) == bindparam(name) for name in scope]
+    total: ColumnElement[int] | None = counter.count_column(
+        model, owner_id=bindparam('owner_id'), parent_id=bindparam(parent_key) if parent_key else None,  # type: ignore
     )
-    row_count = session.scalar(count_stmt) or 0
 
-    # Paginated rows
-    select_stmt = (
-        select(model)
-        .where(getattr(model, parent_key) == parent_value)
-        .where(_owned_by(model, context))
-        .offset(skip)
-        .limit(limit)
+    # Filters narrow the criteria (so a precomputed total no longer applies), and the sort column
+    # leads the keyset with the id as tie-breaker
+    if filters:
+        criteria = [*criteria, *filtering.compile_filters(model, filters)]  # type: ignore
+        total = None
+    sort_col, descending = filtering.parse_sort(model, sort)  # type: ignore
+    key_columns = (sort_col, getattr(model, 'id')) if sort_col is not None else (getattr(model, 'id'),)
+    sort_key = sort or ''
+    seek = decode_cursor(cursor, key_columns, sort_key) if cursor else None
+
+    # A sort no index can serve is limited to `api_unindexed_sort_max_rows` rows. Without filters the scope's
+    # row counter already knows its size, so the page statement checks it (and skips the page when it is too
+    # large); filtered results need a bounded count first, which only has to tell whether there are more rows.
+    sort_scope = {*scope, *filtering.equality_fields(filters)}
+    if total is None:
+        bounded = select(getattr(model, 'id')).where(*criteria).limit(settings.api_unindexed_sort_max_rows + 1)
+        filtering.check_sort(
+            model, sort_col, sort_scope,  # type: ignore
+            row_count=lambda: session.scalar(select(func.count()).select_from(bounded.subquery()), params) or 0,
+        )
+    limit_sort = total is not None and sort_col is not None and not filtering.is_indexed(model, sort_col, sort_scope)  # type: ignore
+
+    # Total row count, fetched in the same statement as the page: either a precomputed `total` expression
+    # (e.g. a row counter) or a COUNT over the rows matching the criteria. It comes from a one-row source that
+    # the page is LEFT JOINed to, so it is returned in either direction and for empty pages too.
+    # With count='estimate' the planner's estimate is used instead (when the database provides one).
+    estimate = estimate_count(session, select(getattr(model, 'id')).where(*criteria), params) if count == 'estimate' and total is None else None
+
+    # Keyset seek when a cursor is given, OFFSET otherwise (kept for compatibility).
+    # One extra row is fetched to find out whether there is another page in that direction.
+    def build_page() -> Select[Any]:
+        if estimate is not None:
+            counts = select(null().label('row_count'))
+        elif total is not None:
+            counts = select(total.label('row_count'))
+        else:
+            counts = select(func.count().label('row_count')).select_from(model).where(*criteria)
+        keyset = seek._replace(values=tuple(bindparam(f'key_{i}', type_=col.type) for i, col in enumerate(key_columns))) if seek else None
+        page = select(*(col.label(f'sort_{i}') for i, col in enumerate(key_columns))).where(*criteria)
+        if limit_sort:
+            page = page.where(total <= settings.api_unindexed_sort_max_rows)  # type: ignore
+        page = apply_keyset(page, key_columns, descending=descending, cursor=keyset)
+        if seek is None:
+            page = page.offset(bindparam('offset'))
+        page_keys = list(page.limit(bindparam('limit')).subquery('page').c)
+
+        counts_row = counts.subquery('counts')
+        stmt = (
+            select(model, counts_row.c.row_count)
+            .select_from(counts_row)
+            .outerjoin(page_keys[-1].table, true())
+            .outerjoin(model, getattr(model, 'id') == page_keys[-1])
+            .options(*loader_options(model, read_schema))
+        )
+        if sort_col is not None:
+            stmt = stmt.options(undefer(sort_col))  # Read for the cursors, even when a sparse schema leaves it out
+        return stmt.order_by(*key_order(page_keys, descending, keyset))
+
+    # Unfiltered pages reuse one registered statement per shape (filter values are inlined, so those are built per request)
+    select_stmt = build_page() if filters else statements.statement(
+        ('page', model, tuple(scope), read_schema, sort_key, seek.direction if seek else None, estimate is not None),
+        build_page,
     )
-    rows = session.scalars(select_stmt).all()
+    params.update(offset=skip, limit=limit + 1)
+    if seek is not None:
+        params.update({f'key_{i}': value for i, value in enumerate(seek.values)})
+    results = session.execute(select_stmt, params).all()
+    row_count = estimate if estimate is not None else results[0].row_count
+    if limit_sort and row_count > settings.api_unindexed_sort_max_rows:
+        raise filtering.unsupported_sort(model, sort_col, row_count)
+    page_rows = [result[0] for result in results if result[0] is not None]
+    rows = page_rows[:limit]
+    has_more = len(page_rows) > limit
+
+    if seek is None:
+        start, has_prev, has_next = skip, skip > 0, has_more
+    elif seek.direction == 'next':
+        start, has_prev, has_next = seek.offset, True, has_more
+    else:
+        rows.reverse()
+        # The page ends where the cursor's edge row was (it may differ from the limit the cursor was issued with)
+        start, has_prev, has_next = (max(seek.offset - len(rows), 0) if has_more else 0), has_more, True
 
     return PaginatedResults(
         rows=rows,
         rowCount=row_count,
-        pageStart=min(skip, row_count),
-        pageEnd=min(skip + limit, row_count)
+        rowCountExact=estimate is None,
+        pageStart=min(start, row_count),
+        pageEnd=min(start + limit, row_count),
+        nextCursor=encode_cursor(edge_values(rows[-1], key_columns), 'next', start + len(rows), sort_key) if rows and has_next else None,
+        prevCursor=encode_cursor(edge_values(rows[0], key_columns), 'prev', start, sort_key) if rows and has_prev else None,
     )
 
+def get_all(
+    context: RequestContext,
+    model: Type[T],
+    skip: int = 0,
+    limit: int = 10,
+    cursor: str | None = None,
+    count: CountMode = 'exact',
+    read_schema: Type[BaseModel] | None = None,
+    filters: Sequence[FilterParam] = (),
+    sort: str | None = None,
+) -> PaginatedResults:
+    with routing.read_only(context.db):
+        return _get_page(
+            context=context,
+            model=model,
+            scope={'owner_id': context.get_user_id()},
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            count=count,
+            read_schema=read_schema,
+            filters=filters,
+            sort=sort,
+        )
+
+def get_all_from_parent(
+    context: RequestContext,
+    model: Type[T],
+    parent_key: str,
+    parent_value: int,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: str | None = None,
+    count: CountMode = 'exact',
+    read_schema: Type[BaseModel] | None = None,
+    filters: Sequence[FilterParam] = (),
+    sort: str | None = None,
+) -> PaginatedResults:
+    with routing.read_only(context.db):
+        return _get_page(
+            context=context,
+            model=model,
+            scope={'owner_id': context.get_user_id(), parent_key: parent_value},
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            count=count,
+            read_schema=read_schema,
+            filters=filters,
+            sort=sort,
+        )
+
 def create_and_commit(
     context: RequestContext,
     model: Type[T],
     schema: BaseModel,
     parent_key: str | None,
-    parent_value: int | None
+    parent_value: int | None,
+    read_schema: Type[BaseModel] | None = None,
 ) -> T | None:
     """Create a new record and commit the changes."""
     session = context.db
@@ -131,9 +295,14 @@ def create_and_commit(
 
     try:
         session.add(db_obj)
+        session.flush()
+        counter.record_created(session, model, [db_obj])
+        summary.record_changed(session, model, [db_obj])
+        search.refresh(session, model, [getattr(db_obj, 'id')])
         session.commit()
-        session.refresh(db_obj)
-        return db_obj
+        typeahead.invalidate(context.get_user_id(), model)
+        response_cache.invalidate(context.get_user_id(), model)
+        return _reload(context, model, db_obj, read_schema)
     except IntegrityError as exc:
         log_exception(exc, 'Database integrity error occurred')
         session.rollback()
@@ -143,7 +312,85 @@ def create_and_commit(
         session.rollback()
         return None
 
-def update_and_commit(context: RequestContext, model: Type[T], schema: BaseModel, id: int) -> T | None:
+def _check_batch_size(size: int) -> None:
+    if size > settings.api_batch_max_size:
+        raise InvalidQueryError(f'Too many rows ({size}), the maximum per request is {settings.api_batch_max_size}')
+
+def _format_errors(exc: ValidationError) -> list[str]:
+    return [f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in exc.errors()]
+
+def bulk_create_and_commit(
+    context: RequestContext,
+    model: Type[T],
+    rows: Sequence[BaseModel],
+    parent_key: str | None,
+    parent_value: int | None = None,
+) -> BulkResults:
+    """Insert many validated records in one multi-row INSERT, reporting errors per row."""
+    _check_batch_size(len(rows))
+    session = context.db
+    owner_id = context.get_user_id()
+    columns = {col.key for col in model.__table__.columns} - {col.key for col in model.__table__.primary_key}
+    errors: list[BulkRowError] = []
+
+    # Ownership + Hierarchical relationships (the parent, if given for all rows)
+    valid: list[tuple[int, dict[str, Any]]] = []
+    for index, row in enumerate(rows):
+        data = {key: val for key, val in row.model_dump(exclude_unset=True).items() if key in columns}
+        data['owner_id'] = owner_id
+        if parent_key is not None and parent_value is not None:
+            data[parent_key] = parent_value
+        valid.append((index, data))
+
+    ids: list[int | None] = [None] * len(rows)
+    try:
+        # Parents must exist and belong to the owner
+        parent_model = getattr(model, '_resource_parent_model')()
+        if parent_key is not None and parent_model is not None and valid:
+            requested = {values[parent_key] for _, values in valid}
+            owned = set(session.scalars(select(parent_model.id).where(
+                parent_model.id.in_(requested),
+                _owned_by(parent_model, context)
+            )))
+            for index, values in valid:
+                if values[parent_key] not in owned:
+                    errors.append(BulkRowError(index=index, errors=[f'{parent_key}: {parent_model.__name__} {values[parent_key]} not found']))
+            valid = [(index, values) for index, values in valid if values[parent_key] in owned]
+
+        if valid:
+            stmt = insert(model).returning(getattr(model, 'id'), sort_by_parameter_order=True)
+            new_ids = session.scalars(stmt, [values for _, values in valid]).all()
+            parent_ids = [values[parent_key] if parent_key else None for _, values in valid]
+            counter.adjust(session, model, ((owner_id, parent_id) for parent_id in parent_ids))  # type: ignore
+            summary.refresh(session, new_ids if parent_key is None else summary.property_ids_above(session, model, parent_ids))  # type: ignore
+            search.refresh(session, model, new_ids)  # type: ignore
+            session.commit()
+            typeahead.invalidate(owner_id, model)
+            response_cache.invalidate(owner_id, model)
+            for (index, _), id in zip(valid, new_ids):
+                ids[index] = id
+    except IntegrityError as exc:
+        log_exception(exc, 'Database integrity error occurred')
+        session.rollback()
+        errors.extend(BulkRowError(index=index, errors=['Database integrity error, no rows were written']) for index, _ in valid)
+    except Exception as exc:
+        log_exception(exc, 'An error occurred')
+        session.rollback()
+        errors.extend(BulkRowError(index=index, errors=['Database error, no rows were written']) for index, _ in valid)
+
+    return BulkResults(
+        ids=ids,
+        count=sum(id is not None for id in ids),
+        errors=sorted(errors, key=lambda error: error.index),
+    )
+
+def update_and_commit(
+    context: RequestContext,
+    model: Type[T],
+    schema: BaseModel,
+    id: int,
+    read_schema: Type[BaseModel] | None = None,
+) -> T | None:
     session = context.db
 
     try:
@@ -164,9 +411,12 @@ def update_and_commit(context: RequestContext, model: Type[T], schema: BaseModel
         ).items():
             setattr(db_obj, key, value)
 
+        summary.record_changed(session, model, [db_obj])
+        search.refresh(session, model, [id])  # type: ignore
         session.commit()
-        session.refresh(db_obj)
-        return db_obj
+        typeahead.invalidate(context.get_user_id(), model)
+        response_cache.invalidate(context.get_user_id(), model)
+        return _reload(context, model, db_obj, read_schema)
     except NoResultFound as exc:
         log_exception(exc, f'No record found for id {id}')
         return None
@@ -182,6 +432,92 @@ def update_and_commit(context: RequestContext, model: Type[T], schema: BaseModel
         session.rollback()
         return None
 
+# Inline table of `rows` for UPDATE ... FROM: a VALUES list on PostgreSQL, UNION ALL of SELECTs elsewhere (e.g. SQLite)
+def _values_source(session: Session, model: Type[T], names: Sequence[str], rows: Sequence[dict[str, Any]]) -> FromClause:
+    table_columns = getattr(model, '__table__').c
+    if session.get_bind().dialect.name == 'postgresql':
+        return values(*(column(name, table_columns[name].type) for name in names), name='v').data(
+            [tuple(row[name] for name in names) for row in rows]
+        )
+    selects = [select(*(literal(row[name], table_columns[name].type).label(name) for name in names)) for row in rows]
+    return (union_all(*selects) if len(selects) > 1 else selects[0]).subquery('v')
+
+def bulk_update_and_commit(
+    context: RequestContext,
+    model: Type[T],
+    update_schema: Type[BaseModel],
+    rows: Sequence[dict[str, Any]],
+) -> BulkUpdateResults:
+    """Apply many partial updates with one UPDATE ... FROM statement per distinct set of columns."""
+    _check_batch_size(len(rows))
+    session = context.db
+    table = getattr(model, '__table__')
+    primary_keys = {col.name for col in table.primary_key}
+    foreign_keys = {fk.parent.name for fk in table.foreign_keys}
+    columns = {col.key for col in table.columns} - primary_keys - foreign_keys
+    errors: list[BulkRowError] = []
+
+    # Group the payloads by the columns they set (payloads must carry the id of the row to update)
+    groups: dict[tuple[str, ...], list[tuple[int, dict[str, Any]]]] = {}
+    requested: dict[int, int] = {}  # id -> index
+    for index, row in enumerate(rows):
+        id = row.get('id')
+        if not isinstance(id, int) or isinstance(id, bool):
+            errors.append(BulkRowError(index=index, errors=['id: Field required']))
+            continue
+        if id in requested:
+            errors.append(BulkRowError(index=index, errors=[f'id: Duplicate of row {requested[id]}']))
+            continue
+        try:
+            payload = update_schema.model_validate(row).model_dump(exclude_unset=True)
+        except ValidationError as exc:
+            errors.append(BulkRowError(index=index, errors=_format_errors(exc)))
+            continue
+        payload = {key: val for key, val in payload.items() if key in columns}
+        if not payload:
+            errors.append(BulkRowError(index=index, errors=['No updatable fields given']))
+            continue
+        requested[id] = index
+        groups.setdefault(tuple(sorted(payload)), []).append((index, {'id': id, **payload}))
+
+    ids: list[int | None] = [None] * len(rows)
+    updated: dict[int, T] = {}
+    try:
+        for names, group in groups.items():
+            source = _values_source(session, model, ('id', *names), [payload for _, payload in group])
+            stmt = (
+                update(model)
+                .where(getattr(model, 'id') == source.c.id, _owned_by(model, context))
+                .values({name: source.c[name] for name in names})
+                .returning(model)
+                .execution_options(synchronize_session=False, populate_existing=True)
+            )
+            updated.update((getattr(row, 'id'), row) for row in session.scalars(stmt))
+        summary.record_changed(session, model, updated.values())  # type: ignore
+        search.refresh(session, model, updated.keys())  # type: ignore
+        session.commit()
+        typeahead.invalidate(context.get_user_id(), model)
+        response_cache.invalidate(context.get_user_id(), model)
+    except IntegrityError as exc:
+        log_exception(exc, 'Database integrity error occurred')
+        session.rollback()
+        errors.extend(BulkRowError(index=index, errors=['Database integrity error, no rows were written']) for index in requested.values())
+        updated = {}
+        requested = {}
+
+    for id, index in requested.items():
+        if id in updated:
+            ids[index] = id
+        else:
+            errors.append(BulkRowError(index=index, errors=[f'id: {model.__name__} {id} not found']))
+
+    return BulkUpdateResults(
+        ids=ids,
+        count=len(updated),
+        errors=sorted(errors, key=lambda error: error.index),
+        rows=[updated[id] for id in ids if id is not None],
+    )
+
 def delete_and_commit(context: RequestContext, model: Type[T], id: int) -> bool:
     session = context.db
 
@@ -192,8 +528,14 @@ def delete_and_commit(context: RequestContext, model: Type[T], id: int) -> bool:
         )
         db_obj = session.scalars(stmt).one()
 
+        affected_properties = summary.affected_property_ids(session, model, [db_obj])
+        search.remove(session, model, [id])  # type: ignore
         session.delete(db_obj)
+        counter.record_deleted(session, model, [db_obj])
+        summary.refresh(session, affected_properties)
         session.commit()
+        typeahead.invalidate(context.get_user_id(), model)
+        response_cache.invalidate(context.get_user_id(), model)
         return True
     except NoResultFound as exc:
         log_exception(exc, f'No record found for id {id}')
@@ -205,3 +547,51 @@ def delete_and_commit(context: RequestContext, model: Type[T], id: int) -> bool:
         log_exception(exc, 'An error occurred')
         session.rollback()
         return False
+
+# Id subqueries for every level of the subtree under a row, from the root down (owner-scoped at each level)
+def _subtree_levels(context: RequestContext, model: Type[T], id: int) -> list[tuple[Any, Select[Any]]]:
+    levels: list[tuple[Any, Select[Any]]] = [(model, select(getattr(model, 'id')).where(getattr(model, 'id') == id, _owned_by(model, context)))]
+    while (child := getattr(levels[-1][0], '_resource_child_model')()) is not None:
+        parent_ids = levels[-1][1]
+        levels.append((child, select(child.id).where(getattr(child, child._resource_parent_key()).in_(parent_ids), _owned_by(child, context))))
+    return levels
+
+def delete_subtree_and_commit(context: RequestContext, model: Type[T], id: int, archive: bool = False) -> SubtreeResults | None:
+    """Delete (or archive) a row and everything below it with one set-based statement per level."""
+    session = context.db
+    root = session.scalar(select(model).where(getattr(model, 'id') == id, _owned_by(model, context)))
+    if root is None:
+        log_exception(NoResultFound(), f'No record found for id {id}')
+        return None
+
+    levels = _subtree_levels(context, model, id)
+    affected_properties = summary.affected_property_ids(session, model, [root])  # type: ignore
+    counts: dict[str, int] = {}
+    try:
+        if archive:
+            search.remove_levels(session, levels)
+            for level_model, ids in levels:
+                stmt = update(level_model).where(level_model.id.in_(ids)).values(is_active=False)
+                counts[level_model.__tablename__] = session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+        else:
+            search.remove_levels(session, levels)
+            # Bottom-up, so every level is gone before the rows it references
+            for level_model, ids in reversed(levels):
+                parent_key = level_model._resource_parent_key()
+                stmt = delete(level_model).where(level_model.id.in_(ids))
+                stmt = stmt.returning(getattr(level_model, parent_key)) if parent_key else stmt.returning(level_model.id)
+                parent_ids = session.scalars(stmt.execution_options(synchronize_session=False)).all()
+                counter.adjust(session, level_model, ((context.get_user_id(), parent_id if parent_key else None) for parent_id in parent_ids), sign=-1)
+                counts[level_model.__tablename__] = len(parent_ids)
+            counts = dict(reversed(counts.items()))
+            session.expunge(root)
+        summary.refresh(session, affected_properties)
+        session.commit()
+        typeahead.invalidate(context.get_user_id(), *(level_model for level_model, _ in levels))
+        response_cache.invalidate(context.get_user_id(), *(level_model for level_model, _ in levels))
+    except Exception as exc:
+        log_exception(exc, 'An error occurred')
+        session.rollback()
+        return None
+
+    return SubtreeResults(id=id, archived=archive, counts=counts)
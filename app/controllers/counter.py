@@ -0,0 +1,98 @@
+'''
+Exact per-owner row counters for the resource tables
+
+Every create/delete that goes through the resource controllers adjusts the
+matching (owner_id, table, parent_id) rows of `row_counters` inside the same
+transaction, so reading a `rowCount` is a primary-key lookup instead of a
+COUNT(*) over the owner's rows. Use `rebuild` (or `./scripts/rebuild_counters`)
+after loading data that bypassed the controllers.
+'''
+from collections import Counter
+from typing import Iterable, Type
+from sqlalchemy import BindParameter, ColumnElement, Table, select, delete, insert, func, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from db import ResourceBase
+from db.models import RowCounter
+
+# parent_id used for the owner's total row count of a table
+ALL_ROWS = 0
+
+def _resource_models() -> list[Type[ResourceBase]]:
+    return sorted(ResourceBase.__subclasses__(), key=lambda m: m.__tablename__)
+
+def _parent_of(model: Type[ResourceBase], row: ResourceBase) -> int | None:
+    parent_key = model._resource_parent_key()
+    return getattr(row, parent_key) if parent_key else None
+
+# Add `sign` for every (owner_id, parent_id) pair, to both the parent's and the owner's total counter
+def adjust(
+    session: Session,
+    model: Type[ResourceBase],
+    keys: Iterable[tuple[int, int | None]],
+    sign: int = 1,
+) -> None:
+    deltas: Counter[tuple[int, int]] = Counter()
+    for owner_id, parent_id in keys:
+        deltas[(owner_id, ALL_ROWS)] += sign
+        if parent_id is not None:
+            deltas[(owner_id, parent_id)] += sign
+    values = [
+        {'owner_id': owner_id, 'table_name': model.__tablename__, 'parent_id': parent_id, 'row_count': delta}
+        for (owner_id, parent_id), delta in deltas.items() if delta
+    ]
+    if not values:
+        return
+
+    dialect = postgresql if session.get_bind().dialect.name == 'postgresql' else sqlite
+    stmt = dialect.insert(RowCounter).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RowCounter.owner_id, RowCounter.table_name, RowCounter.parent_id],
+        set_={'row_count': RowCounter.row_count + stmt.excluded.row_count},
+    )
+    session.execute(stmt)
+
+def record_created(session: Session, model: Type[ResourceBase], rows: Iterable[ResourceBase]) -> None:
+    adjust(session, model, ((row.owner_id, _parent_of(model, row)) for row in rows), sign=1)
+
+def record_deleted(session: Session, model: Type[ResourceBase], rows: Iterable[ResourceBase]) -> None:
+    adjust(session, model, ((row.owner_id, _parent_of(model, row)) for row in rows), sign=-1)
+
+# Scalar subquery reading a counter (of a resource model or its table), so the count can ride along with the page query
+def count_column(
+    model: Type[ResourceBase] | Table,
+    owner_id: int | BindParameter[int],
+    parent_id: int | BindParameter[int] | None = None,
+) -> ColumnElement[int]:
+    stmt = select(RowCounter.row_count).where(
+        RowCounter.owner_id == owner_id,
+        RowCounter.table_name == (model.name if isinstance(model, Table) else model.__tablename__),
+        RowCounter.parent_id == (ALL_ROWS if parent_id is None else parent_id),
+    )
+    return func.coalesce(stmt.scalar_subquery(), 0)
+
+def get_count(session: Session, model: Type[ResourceBase], owner_id: int, parent_id: int | None = None) -> int:
+    return session.scalar(select(count_column(model, owner_id, parent_id))) or 0
+
+# Recompute the counters from the resource tables (for one owner or everyone) and return the number of counter rows written
+def rebuild(session: Session, owner_id: int | None = None) -> int:
+    clear_stmt = delete(RowCounter)
+    if owner_id is not None:
+        clear_stmt = clear_stmt.where(RowCounter.owner_id == owner_id)
+    session.execute(clear_stmt)
+
+    written = 0
+    columns = [RowCounter.owner_id, RowCounter.table_name, RowCounter.parent_id, RowCounter.row_count]
+    for model in _resource_models():
+        owner_col = getattr(model, 'owner_id')
+        parent_key = model._resource_parent_key()
+        groupings = [literal(ALL_ROWS)] + ([getattr(model, parent_key)] if parent_key else [])
+        for parent_col in groupings:
+            source = select(owner_col, literal(model.__tablename__), parent_col, func.count()).group_by(owner_col)
+            if parent_col is not groupings[0]:
+                source = source.group_by(parent_col)
+            if owner_id is not None:
+                source = source.where(owner_col == owner_id)
+            written += session.execute(insert(RowCounter).from_select(columns, source)).rowcount or 0
+    session.commit()
+    return written
@@ -0,0 +1,67 @@
+'''
+Streaming export of a resource list (NDJSON or CSV)
+
+`stream` checks the filters, then returns an iterator of encoded chunks. The
+iterator runs a column-only query (the read schema's plain columns, no ORM
+objects or Pydantic models) with `yield_per`, which uses a server-side cursor on
+PostgreSQL. It encodes one chunk per `api_export_chunk_rows` rows, so memory
+stays flat whatever the row count. It uses a session of its own, because the
+request's session is closed before the response body is streamed. Closing the
+iterator (e.g. when the client disconnects) closes the cursor and the session.
+'''
+import csv
+import io
+from typing import Any, Iterator, Sequence, Type
+from pydantic_core import to_json
+from sqlalchemy import Column, Select, select
+from sqlalchemy.orm import Session
+from core import settings
+from db import ResourceBase, routing
+from schemas.base import BaseModel
+from schemas.request import ExportFormat, FilterParam, RequestContext
+from . import filtering
+
+def _columns(model: Type[ResourceBase], read_schema: Type[BaseModel]) -> list[Column[Any]]:
+    return [column for column in model.__table__.columns if column.name in read_schema.model_fields]
+
+# A session on the same engines as `session`, for work that outlives it
+def _own_session(session: Session) -> Session:
+    if isinstance(session, routing.RoutingSession):
+        return session.fork()
+    return Session(bind=session.get_bind(), autoflush=False)
+
+def _encode_ndjson(names: Sequence[str], rows: Sequence[Any]) -> bytes:
+    return b''.join(to_json(dict(zip(names, row))) + b'\n' for row in rows)
+
+def _encode_csv(rows: Sequence[Any]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+def _chunks(session: Session, stmt: Select[Any], names: list[str], format: ExportFormat) -> Iterator[bytes]:
+    try:
+        if format == 'csv':
+            yield _encode_csv([names])
+        with routing.read_only(session):
+            result = session.execute(stmt.execution_options(yield_per=settings.api_export_chunk_rows))
+            for rows in result.partitions():
+                yield _encode_ndjson(names, rows) if format == 'ndjson' else _encode_csv(rows)
+    finally:
+        session.close()
+
+# Encoded chunks of the owner's rows of `model` (matching `filters`), in id order
+def stream(
+    context: RequestContext,
+    model: Type[ResourceBase],
+    read_schema: Type[BaseModel],
+    format: ExportFormat = 'ndjson',
+    filters: Sequence[FilterParam] = (),
+) -> Iterator[bytes]:
+    columns = _columns(model, read_schema)
+    # Built before streaming starts, so that invalid filters are reported as errors
+    stmt = (
+        select(*columns)
+        .where(model.owner_id == context.get_user_id(), *filtering.compile_filters(model, filters))
+        .order_by(model.id)
+    )
+    return _chunks(_own_session(context.db), stmt, [column.name for column in columns], format)
@@ -0,0 +1,124 @@
+'''
+Filter and sort query language for index endpoints
+
+    ?filter[is_vacant]=true&filter[bedrooms][gte]=2&sort=-sqft
+
+Only the columns a model whitelists in `_filterable` / `_sortable` can be used.
+Filters compile to plain comparisons on the bare column (no functions or casts
+on the column side), so they can be answered from an index. A sort becomes the
+leading keyset column (with `id` as tie-breaker), which keeps cursor pagination
+working. Sorting a large result by a column that no index can serve is rejected
+instead of silently turning every page into a full sort.
+'''
+import operator
+from datetime import date, datetime
+from typing import Any, Callable, Sequence, Type
+from sqlalchemy import ColumnElement, Index, true, false
+from core import settings
+from core.exceptions import InvalidQueryError
+from db import ResourceBase
+from schemas.request import FilterParam
+
+_OPERATORS: dict[str, Callable[[Any, Any], ColumnElement[bool]]] = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'in': lambda column, values: column.in_(values),
+    'prefix': lambda column, value: column.startswith(value, autoescape=True),
+    'null': lambda column, value: column.is_(None) if value else column.is_not(None),
+}
+_BOOLEANS = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+
+def _column(model: Type[ResourceBase], name: str, allowed: Sequence[str], purpose: str) -> Any:
+    if name not in allowed:
+        raise InvalidQueryError(f"Cannot {purpose} {model.__tablename__} by '{name}' (allowed: {', '.join(allowed)})")
+    return getattr(model, name)
+
+def _coerce(column: Any, field: str, raw: str) -> Any:
+    python_type = column.type.python_type
+    try:
+        if python_type is bool:
+            return _BOOLEANS[raw.lower()]
+        if python_type is datetime:
+            return datetime.fromisoformat(raw)
+        if python_type is date:
+            return date.fromisoformat(raw)
+        return python_type(raw)
+    except (KeyError, ValueError) as exc:
+        raise InvalidQueryError(f"Invalid value for '{field}': {raw}") from exc
+
+def compile_filters(model: Type[ResourceBase], filters: Sequence[FilterParam]) -> list[ColumnElement[bool]]:
+    criteria: list[ColumnElement[bool]] = []
+    for field, op, raw in filters:
+        column = _column(model, field, model._filterable, 'filter')
+        if op not in _OPERATORS:
+            raise InvalidQueryError(f"Unknown filter operator '{op}' (allowed: {', '.join(_OPERATORS)})")
+        if op == 'in':
+            value: Any = [_coerce(column, field, item) for item in raw.split(',')]
+        elif op == 'null':
+            value = _BOOLEANS.get(raw.lower(), True)
+        elif op == 'prefix':
+            if column.type.python_type is not str:
+                raise InvalidQueryError(f"The 'prefix' operator only applies to text fields, not '{field}'")
+            value = raw
+        elif column.type.python_type is bool:
+            # Inline the literal so `is_vacant = true` matches the partial indexes' predicates
+            value = true() if _coerce(column, field, raw) else false()
+        else:
+            value = _coerce(column, field, raw)
+        criteria.append(_OPERATORS[op](column, value))
+    return criteria
+
+# Equality-filtered columns, which an index may lead with before the sort column
+def equality_fields(filters: Sequence[FilterParam]) -> set[str]:
+    return {field for field, op, _ in filters if op == 'eq'}
+
+# Parse `sort` ('field' or '-field') into the column and its direction (None = default order by id)
+def parse_sort(model: Type[ResourceBase], sort: str | None) -> tuple[Any, bool]:
+    if not sort:
+        return None, False
+    descending = sort.startswith('-')
+    name = sort.lstrip('-+')
+    if ',' in name:
+        raise InvalidQueryError('Only one sort field is supported')
+    column = _column(model, name, model._sortable, 'sort')
+    if column.nullable:
+        raise InvalidQueryError(f"Cannot sort by nullable field '{name}'")
+    return column, descending
+
+# Partial and BRIN indexes cannot return rows in order for an arbitrary query
+def _ordered_index(index: Index) -> bool:
+    options = index.dialect_options
+    if options['postgresql']['where'] is not None or options['sqlite']['where'] is not None:
+        return False
+    using = options['postgresql']['using']
+    return not using or using == 'btree'
+
+# True when an index (or the primary key) can return rows ordered by `column` once the `scope` columns are fixed
+def is_indexed(model: Type[ResourceBase], column: Any, scope: set[str]) -> bool:
+    table = model.__table__
+    candidates = [[col.name for col in index.columns] for index in table.indexes if _ordered_index(index)]  # type: ignore
+    candidates.append([col.name for col in table.primary_key])  # type: ignore
+    for names in candidates:
+        leading = 0
+        while leading < len(names) and names[leading] in scope and names[leading] != column.name:
+            leading += 1
+        if leading < len(names) and names[leading] == column.name:
+            return True
+    return False
+
+def unsupported_sort(model: Type[ResourceBase], column: Any, rows: int) -> InvalidQueryError:
+    return InvalidQueryError(
+        f"Sorting {rows} {model.__tablename__} by '{column.name}' is not supported (no index); "
+        f"narrow the results with filters or sort by an indexed field"
+    )
+
+# Reject sorting more than `api_unindexed_sort_max_rows` rows by a column no index can serve
+def check_sort(model: Type[ResourceBase], column: Any, scope: set[str], row_count: Callable[[], int]) -> None:
+    if column is None or is_indexed(model, column, scope):
+        return
+    if (rows := row_count()) > settings.api_unindexed_sort_max_rows:
+        raise unsupported_sort(model, column, rows)
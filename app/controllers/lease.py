@@ -1,19 +1,94 @@
+from typing import Type, Any, Iterator, Sequence
 from schemas import LeaseSchema
+from schemas.base import BaseModel
 from db.models import Lease
-from schemas.request import PaginatedResults, RequestContext
-from . import base
+from schemas.request import BatchResults, BulkResults, BulkUpdateResults, CountMode, ExportFormat, FilterParam, PaginatedResults, RequestContext, SubtreeResults
+from . import base, response_cache, versions
+from .export import stream as stream_export
+from .versions import Version
 
-def get_by_id(context: RequestContext, id: int) -> Lease | None:
-    return base.get_by_id(context=context, model=Lease, id=id)
+def get_by_id(context: RequestContext, id: int, read_schema: Type[BaseModel] = LeaseSchema.Read) -> Lease | None:
+    return base.get_by_id(context=context, model=Lease, id=id, read_schema=read_schema)
 
-def get_all(context: RequestContext, skip: int = 0, limit: int = 10) -> PaginatedResults:
-    return base.get_all(context=context, model=Lease, skip=skip, limit=limit)
+def get_by_ids(context: RequestContext, ids: Sequence[int], read_schema: Type[BaseModel] = LeaseSchema.Read) -> BatchResults:
+    return base.get_by_ids(context=context, model=Lease, ids=ids, read_schema=read_schema)
 
-def get_all_from_parent(context: RequestContext, parent_id: int, skip: int = 0, limit: int = 10) -> PaginatedResults:
-    return base.get_all_from_parent(context=context, model=Lease, parent_key='unit_id', parent_value=parent_id, skip=skip, limit=limit)
+def get_all(
+    context: RequestContext,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: str | None = None,
+    count: CountMode = 'exact',
+    read_schema: Type[BaseModel] = LeaseSchema.Read,
+    filters: Sequence[FilterParam] = (),
+    sort: str | None = None,
+) -> PaginatedResults:
+    return base.get_all(
+        context=context, model=Lease,
+        skip=skip, limit=limit, cursor=cursor, count=count, read_schema=read_schema,
+        filters=filters, sort=sort,
+    )
+
+def get_all_from_parent(
+    context: RequestContext,
+    parent_id: int,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: str | None = None,
+    count: CountMode = 'exact',
+    read_schema: Type[BaseModel] = LeaseSchema.Read,
+    filters: Sequence[FilterParam] = (),
+    sort: str | None = None,
+) -> PaginatedResults:
+    return base.get_all_from_parent(
+        context=context, model=Lease, parent_key='unit_id', parent_value=parent_id,
+        skip=skip, limit=limit, cursor=cursor, count=count, read_schema=read_schema,
+        filters=filters, sort=sort,
+    )
+
+# Version of the matching list (or of row `id`) for conditional GETs, None when `read_schema` is unversioned
+def get_version(
+    context: RequestContext,
+    id: int | None = None,
+    read_schema: Type[BaseModel] = LeaseSchema.Read,
+    filters: Sequence[FilterParam] = (),
+) -> Version | None:
+    return versions.probe(context=context, model=Lease, read_schema=read_schema, scope={'id': id} if id is not None else None, filters=filters)
+
+def get_version_from_parent(
+    context: RequestContext,
+    parent_id: int,
+    read_schema: Type[BaseModel] = LeaseSchema.Read,
+    filters: Sequence[FilterParam] = (),
+) -> Version | None:
+    return versions.probe(context=context, model=Lease, read_schema=read_schema, scope={'unit_id': parent_id}, filters=filters)
+
+# Tables read by a response serialized with `read_schema` (their generations key the response cache)
+def get_tables(read_schema: Type[BaseModel] = LeaseSchema.Read) -> tuple[str, ...]:
+    return response_cache.tables(Lease, read_schema)
+
+def export(
+    context: RequestContext,
+    format: ExportFormat = 'ndjson',
+    read_schema: Type[BaseModel] = LeaseSchema.Read,
+    filters: Sequence[FilterParam] = (),
+) -> Iterator[bytes]:
+    return stream_export(context=context, model=Lease, read_schema=read_schema, format=format, filters=filters)
 
 def create_and_commit(context: RequestContext, schema: LeaseSchema.Create, parent_id: int) -> Lease | None:
-    return base.create_and_commit(context=context, model=Lease, schema=schema, parent_key='unit_id', parent_value=parent_id)
+    return base.create_and_commit(context=context, model=Lease, schema=schema, parent_key='unit_id', parent_value=parent_id, read_schema=LeaseSchema.Read)
+
+def bulk_create_and_commit(context: RequestContext, rows: Sequence[LeaseSchema.Create], parent_id: int | None = None) -> BulkResults:
+    return base.bulk_create_and_commit(context=context, model=Lease, rows=rows, parent_key='unit_id', parent_value=parent_id)
 
 def update_and_commit(context: RequestContext, schema: LeaseSchema.Update, id: int) -> Lease | None:
-    return base.update_and_commit(context=context, model=Lease, schema=schema, id=id)
+    return base.update_and_commit(context=context, model=Lease, schema=schema, id=id, read_schema=LeaseSchema.Read)
+
+def bulk_update_and_commit(context: RequestContext, rows: Sequence[dict[str, Any]]) -> BulkUpdateResults:
+    return base.bulk_update_and_commit(context=context, model=Lease, update_schema=LeaseSchema.Update, rows=rows)
+
+def delete_and_commit(context: RequestContext, id: int) -> SubtreeResults | None:
+    return base.delete_subtree_and_commit(context=context, model=Lease, id=id)
+
+def archive_and_commit(context: RequestContext, id: int) -> SubtreeResults | None:
+    return base.delete_subtree_and_commit(context=context, model=Lease, id=id, archive=True)
@@ -0,0 +1,115 @@
+'''
+Keyset (cursor) pagination helpers
+
+Cursors are opaque, URL-safe tokens that encode the sort key values of the row
+at the edge of a page, the direction to move in and the absolute position of the
+edge. They are signed, since the position is used to compute row counts. Seeking with `(sort key, id) > (:key, :id)` lets the database jump
+straight to the next page through an index instead of scanning and discarding
+every preceding row like OFFSET does.
+'''
+import hashlib
+import hmac
+import json
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from binascii import Error as BinasciiError
+from datetime import date, datetime
+from typing import Any, Literal, NamedTuple, Sequence
+from sqlalchemy import ColumnElement, Select, tuple_
+from sqlalchemy.orm import Session
+from core import settings
+from core.exceptions import InvalidQueryError
+
+Direction = Literal['next', 'prev']
+
+class Cursor(NamedTuple):
+    values: tuple[Any, ...]  # Sort key values of the edge row (last column is always the id)
+    direction: Direction     # 'next' seeks past the edge row, 'prev' seeks before it
+    offset: int              # Absolute position just past the edge row, in the seek direction: where a 'next' page
+                             # starts, or where a 'prev' page ends (exclusive)
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _from_json(value: Any, column: ColumnElement[Any]) -> Any:
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+def encode_cursor(values: Sequence[Any], direction: Direction, offset: int, sort: str = '') -> str:
+    payload: dict[str, Any] = {'k': [_to_json(v) for v in values], 'd': direction, 'o': max(offset, 0)}
+    if sort:
+        payload['s'] = sort  # Cursors are only valid for the sort order they were issued for
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return f'{_b64encode(raw)}.{_b64encode(_sign(raw))}'
+
+def _b64encode(data: bytes) -> str:
+    return urlsafe_b64encode(data).decode().rstrip('=')
+
+def _b64decode(data: str) -> bytes:
+    return urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+def _sign(raw: bytes) -> bytes:
+    return hmac.new(settings.jwt_secret_key.encode(), b'cursor:' + raw, hashlib.sha256).digest()[:16]
+
+def decode_cursor(token: str, key_columns: Sequence[ColumnElement[Any]], sort: str = '') -> Cursor:
+    try:
+        data, _, signature = token.partition('.')
+        raw = _b64decode(data)
+        if not hmac.compare_digest(_b64decode(signature), _sign(raw)):
+            raise ValueError('bad signature')
+        payload = json.loads(raw)
+        values = payload['k']
+        direction = payload['d']
+        offset = max(int(payload['o']), 0)
+        if direction not in ('next', 'prev') or len(values) != len(key_columns) or payload.get('s', '') != sort:
+            raise ValueError('cursor does not match the requested sort order')
+        return Cursor(
+            values=tuple(_from_json(v, col) for v, col in zip(values, key_columns)),
+            direction=direction,
+            offset=offset,
+        )
+    except (BinasciiError, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+        raise InvalidQueryError(f'Invalid pagination cursor: {exc}') from exc
+
+def edge_values(row: Any, key_columns: Sequence[ColumnElement[Any]]) -> tuple[Any, ...]:
+    return tuple(getattr(row, col.key) for col in key_columns)  # type: ignore (columns are mapped attributes)
+
+# ORDER BY clauses for the keyset columns in the requested direction.
+# Pages in the 'prev' direction are fetched in reverse order and must be flipped by the caller.
+def key_order(key_columns: Sequence[ColumnElement[Any]], descending: bool, cursor: Cursor | None) -> list[ColumnElement[Any]]:
+    ascending = descending == (cursor is not None and cursor.direction == 'prev')
+    return [col.asc() if ascending else col.desc() for col in key_columns]
+
+# Apply ORDER BY and the keyset predicate for the requested direction
+def apply_keyset(
+    stmt: Select[Any],
+    key_columns: Sequence[ColumnElement[Any]],
+    descending: bool,
+    cursor: Cursor | None,
+) -> Select[Any]:
+    if cursor is not None:
+        key = tuple_(*key_columns)
+        ascending = descending == (cursor.direction == 'prev')
+        stmt = stmt.where(key > tuple_(*cursor.values) if ascending else key < tuple_(*cursor.values))
+    return stmt.order_by(*key_order(key_columns, descending, cursor))
+
+# Read the planner's row estimate for a statement (PostgreSQL only).
+# Returns None when the database cannot provide one, so callers fall back to an exact count.
+def estimate_count(session: Session, stmt: Select[Any], params: dict[str, Any] | None = None) -> int | None:
+    bind = session.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return None
+    # Render the post-compile parameters (e.g. the expanding IN list of an `in` filter) into the statement,
+    # since the EXPLAIN is run as driver SQL
+    compiled = stmt.params(params or {}).compile(dialect=bind.dialect, compile_kwargs={'render_postcompile': True})
+    plan = session.connection().exec_driver_sql(f'EXPLAIN (FORMAT JSON) {compiled}', compiled.construct_params()).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows']) if plan else None
@@ -1,16 +1,69 @@
+from typing import Type, Any, Iterator, Sequence
 from schemas import PropertySchema
+from schemas.base import BaseModel
 from db.models import Property
-from schemas.request import PaginatedResults, RequestContext
-from . import base
+from schemas.request import BatchResults, BulkResults, BulkUpdateResults, CountMode, ExportFormat, FilterParam, PaginatedResults, RequestContext, SubtreeResults
+from . import base, response_cache, versions
+from .export import stream as stream_export
+from .versions import Version
 
-def get_by_id(context: RequestContext, id: int) -> Property | None:
-    return base.get_by_id(context=context, model=Property, id=id)
+def get_by_id(context: RequestContext, id: int, read_schema: Type[BaseModel] = PropertySchema.Read) -> Property | None:
+    return base.get_by_id(context=context, model=Property, id=id, read_schema=read_schema)
 
-def get_all(context: RequestContext, skip: int = 0, limit: int = 10) -> PaginatedResults:
-    return base.get_all(context=context, model=Property, skip=skip, limit=limit)
+def get_by_ids(context: RequestContext, ids: Sequence[int], read_schema: Type[BaseModel] = PropertySchema.Read) -> BatchResults:
+    return base.get_by_ids(context=context, model=Property, ids=ids, read_schema=read_schema)
+
+def get_all(
+    context: RequestContext,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: str | None = None,
+    count: CountMode = 'exact',
+    read_schema: Type[BaseModel] = PropertySchema.Read,
+    filters: Sequence[FilterParam] = (),
+    sort: str | None = None,
+) -> PaginatedResults:
+    return base.get_all(
+        context=context, model=Property,
+        skip=skip, limit=limit, cursor=cursor, count=count, read_schema=read_schema,
+        filters=filters, sort=sort,
+    )
+
+# Version of the matching list (or of row `id`) for conditional GETs, None when `read_schema` is unversioned
+def get_version(
+    context: RequestContext,
+    id: int | None = None,
+    read_schema: Type[BaseModel] = PropertySchema.Read,
+    filters: Sequence[FilterParam] = (),
+) -> Version | None:
+    return versions.probe(context=context, model=Property, read_schema=read_schema, scope={'id': id} if id is not None else None, filters=filters)
+
+# Tables read by a response serialized with `read_schema` (their generations key the response cache)
+def get_tables(read_schema: Type[BaseModel] = PropertySchema.Read) -> tuple[str, ...]:
+    return response_cache.tables(Property, read_schema)
+
+def export(
+    context: RequestContext,
+    format: ExportFormat = 'ndjson',
+    read_schema: Type[BaseModel] = PropertySchema.Read,
+    filters: Sequence[FilterParam] = (),
+) -> Iterator[bytes]:
+    return stream_export(context=context, model=Property, read_schema=read_schema, format=format, filters=filters)
 
 def create_and_commit(context: RequestContext, schema: PropertySchema.Create) -> Property | None:
-    return base.create_and_commit(context=context, model=Property, schema=schema, parent_key=None, parent_value=None)
+    return base.create_and_commit(context=context, model=Property, schema=schema, parent_key=None, parent_value=None, read_schema=PropertySchema.Read)
+
+def bulk_create_and_commit(context: RequestContext, rows: Sequence[PropertySchema.Create]) -> BulkResults:
+    return base.bulk_create_and_commit(context=context, model=Property, rows=rows, parent_key=None)
 
 def update_and_commit(context: RequestContext, schema: PropertySchema.Update, id: int) -> Property | None:
-    return base.update_and_commit(context=context, model=Property, schema=schema, id=id)
+    return base.update_and_commit(context=context, model=Property, schema=schema, id=id, read_schema=PropertySchema.Read)
+
+def bulk_update_and_commit(context: RequestContext, rows: Sequence[dict[str, Any]]) -> BulkUpdateResults:
+    return base.bulk_update_and_commit(context=context, model=Property, update_schema=PropertySchema.Update, rows=rows)
+
+def delete_and_commit(context: RequestContext, id: int) -> SubtreeResults | None:
+    return base.delete_subtree_and_commit(context=context, model=Property, id=id)
+
+def archive_and_commit(context: RequestContext, id: int) -> SubtreeResults | None:
+    return base.delete_subtree_and_commit(context=context, model=Property, id=id, archive=True)
@@ -0,0 +1,161 @@
+'''
+Two-tier response cache for the read and index endpoints
+
+Entries are encoded JSON bodies (with their ETag/Last-Modified headers). They
+are keyed by owner, route and query string, plus the owner's current
+generation of every table the response reads (`tables`). After every committed
+write, the resource controllers bump the owner's generation of the written
+tables (`invalidate`). The next request then computes a new key and misses.
+Writes invalidate exactly the owner's responses that read those tables,
+without scanning or deleting keys; the orphaned entries simply expire.
+
+Tier 1 is a per-process LRU of `api_response_cache_l1_entries` entries. Tier 2
+is Redis (`core.cache`), shared by all workers. Both expire entries after
+`api_response_cache_ttl` seconds, which bounds staleness from writes made
+outside the controllers or read from a lagging replica. Generations live in
+Redis, and every lookup reads them with one MGET. A tier 1 hit needs no other
+round trip. Without the `redis` package the cache is tier 1 only, with
+process-local generations, which is only correct with a single worker. A Redis
+error bypasses the cache for that request (and is logged), it never fails it.
+
+`stats()` reports the hits per tier, misses, stores, invalidations and errors.
+'''
+import json
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from hashlib import sha1
+from threading import Lock
+from typing import Any, Iterable, Type
+from core import settings
+from core.cache import ERRORS as REDIS_ERRORS, client as redis_client
+from core.logger import log_exception
+from db import ResourceBase
+from db.loaders import loaded_tables
+from db.models import PropertySummary
+from schemas.base import BaseModel
+
+_PREFIX = 'response:'
+
+_entries: 'OrderedDict[str, tuple[float, bytes, dict[str, str]]]' = OrderedDict()  # key -> (expiry, body, headers)
+_generations: dict[str, int] = {}  # Process-local generations, used without Redis
+_stats: Counter[str] = Counter()
+_lock = Lock()
+
+def _count(name: str, amount: int = 1) -> None:
+    with _lock:
+        _stats[name] += amount
+
+def _generation_key(owner_id: int, table: str) -> str:
+    return f'{_PREFIX}gen:{owner_id}:{table}'
+
+# Names of the tables read by a response serialized with `read_schema`
+@lru_cache(maxsize=settings.api_schema_cache_max_entries)
+def tables(model: Type[ResourceBase], read_schema: Type[BaseModel]) -> tuple[str, ...]:
+    return tuple(sorted(table.name for table in loaded_tables(model, read_schema)))
+
+# Cache key of the owner's response to `route` (path and query string) reading `table_names`,
+# None when the cache is disabled or Redis is unavailable
+def key(owner_id: int, route: str, table_names: Iterable[str]) -> str | None:
+    if not settings.api_response_cache_enabled:
+        return None
+    names = sorted(table_names)
+    generation_keys = [_generation_key(owner_id, name) for name in names]
+    client = redis_client()
+    if client is None:
+        with _lock:
+            generations = [_generations.get(name, 0) for name in generation_keys]
+    else:
+        try:
+            generations = client.mget(generation_keys)
+        except REDIS_ERRORS as exc:
+            _count('errors')
+            log_exception(exc, 'response cache (generations)')
+            return None
+    versions = ','.join(f'{name}={int(generation or 0)}' for name, generation in zip(names, generations))
+    return f'{_PREFIX}{owner_id}:{sha1(f"{route}|{versions}".encode()).hexdigest()}'
+
+# Cached (body, headers) under `key`, from tier 1 or else tier 2
+def get(key: str) -> tuple[bytes, dict[str, str]] | None:
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] > now:
+            _entries.move_to_end(key)
+            _stats['l1_hits'] += 1
+            return entry[1], entry[2]
+    client = redis_client()
+    value = None
+    if client is not None:
+        try:
+            value = client.get(key)
+        except REDIS_ERRORS as exc:
+            _count('errors')
+            log_exception(exc, 'response cache (get)')
+    if value is None:
+        _count('misses')
+        return None
+    header_line, _, body = value.partition(b'\n')
+    headers: dict[str, str] = json.loads(header_line)
+    _store_local(key, body, headers)
+    _count('l2_hits')
+    return body, headers
+
+def _store_local(key: str, body: bytes, headers: dict[str, str]) -> None:
+    with _lock:
+        _entries[key] = (time.monotonic() + settings.api_response_cache_ttl, body, headers)
+        _entries.move_to_end(key)
+        while len(_entries) > settings.api_response_cache_l1_entries:
+            _entries.popitem(last=False)
+
+def store(key: str, body: bytes, headers: dict[str, str]) -> None:
+    _store_local(key, body, headers)
+    _count('stores')
+    client = redis_client()
+    if client is None:
+        return
+    try:
+        client.set(key, json.dumps(headers).encode() + b'\n' + body, ex=settings.api_response_cache_ttl)
+    except REDIS_ERRORS as exc:
+        _count('errors')
+        log_exception(exc, 'response cache (store)')
+
+# Bump the owner's generations of the models' tables (call after the write is committed).
+# Every resource write also refreshes the owner's property summaries.
+def invalidate(owner_id: int, *models: Any) -> None:
+    if not settings.api_response_cache_enabled:
+        return
+    names = {model.__table__.name for model in models} | {PropertySummary.__tablename__}
+    _count('invalidations')
+    client = redis_client()
+    if client is None:
+        with _lock:
+            for name in names:
+                generation_key = _generation_key(owner_id, name)
+                _generations[generation_key] = _generations.get(generation_key, 0) + 1
+        return
+    try:
+        for name in sorted(names):
+            client.incr(_generation_key(owner_id, name))
+    except REDIS_ERRORS as exc:
+        # Entries already cached for these tables are served until they expire
+        _count('errors')
+        log_exception(exc, 'response cache (invalidate)')
+
+def stats() -> dict[str, int]:
+    with _lock:
+        return {
+            'l1_entries': len(_entries),
+            'l1_hits': _stats['l1_hits'],
+            'l2_hits': _stats['l2_hits'],
+            'misses': _stats['misses'],
+            'stores': _stats['stores'],
+            'invalidations': _stats['invalidations'],
+            'errors': _stats['errors'],
+        }
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+        _generations.clear()
+        _stats.clear()
@@ -0,0 +1,206 @@
+'''
+Full-text search across all resource types (search_documents table)
+
+Every write that goes through the resource controllers re-indexes the rows it
+touched inside the same transaction: one document per row holding its label
+(the model's `_search_label` template, or else the first of its `_searchable`
+columns), the text of all of them, and the id of its parent. Labels that read
+the parent are re-indexed along with it. Only active rows are indexed, so
+archiving a subtree takes it out of the results (as the typeahead index does).
+On PostgreSQL the document is a weighted tsvector (label
+above content) behind a GIN index; elsewhere (SQLite, in the tests) an FTS5
+table kept in sync by triggers serves the same queries. Every query term is
+matched as a prefix, and results are owner-scoped and ranked. Breadcrumbs are
+resolved from the documents of the parents, one query per level. Use `rebuild`
+(or `./scripts/rebuild_counters`) after loading data that bypassed the
+controllers.
+'''
+import re
+from string import Formatter
+from typing import Any, Iterable, Sequence, Type
+from sqlalchemy import ColumnElement, Select, String, and_, or_, cast, column, delete, func, insert, literal, literal_column, null, select, table, text, true, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import Session
+from db import ResourceBase, routing
+from db.models import Property, Building, Unit, Lease, Tenant, Insurance, SearchDocument
+from schemas.request import RequestContext, SearchCrumb, SearchHit, SearchResults
+
+_MODELS: dict[str, Type[ResourceBase]] = {
+    model.__name__.lower(): model for model in (Property, Building, Unit, Lease, Tenant, Insurance)
+}
+_TERM = re.compile(r'\w+')
+_MAX_TERMS = 8
+_CONFIG = literal('simple', REGCONFIG)  # No stemming: names, addresses and policy numbers are matched as written
+_FTS = table('search_documents_fts', column('rowid'))
+
+def _is_postgresql(session: Session) -> bool:
+    return session.get_bind().dialect.name == 'postgresql'
+
+def _resource(model: Type[ResourceBase]) -> str:
+    return model.__name__.lower()
+
+def _text(column: ColumnElement[Any]) -> ColumnElement[str]:
+    return func.coalesce(cast(column, String), '')
+
+# A field of a label template: a column of the model, or a column of its parent ('unit.unit_number')
+def _label_field(model: Type[ResourceBase], field: str) -> ColumnElement[Any]:
+    relationship, _, name = field.rpartition('.')
+    if not relationship:
+        return getattr(model, name)
+    parent = model._resource_parent_model()
+    if parent is None or relationship != model._resource_parent:
+        raise ValueError(f"{model.__name__} search label field '{field}' is not a column of the model or its parent")
+    return select(getattr(parent, name)).where(parent.id == getattr(model, model._resource_parent_key())).scalar_subquery()
+
+def _label_source(model: Type[ResourceBase]) -> ColumnElement[str]:
+    if model._search_label is None:
+        return _text(getattr(model, model._searchable[0]))
+    parts: list[ColumnElement[str]] = []
+    for text_, field, _, _ in Formatter().parse(model._search_label):
+        if text_:
+            parts.append(literal(text_, String))
+        if field:
+            parts.append(_text(_label_field(model, field)))
+    label = parts[0]
+    for part in parts[1:]:
+        label = label + part
+    return label
+
+# Whether the labels of `model` read its parent's columns
+def _labelled_by_parent(model: Type[ResourceBase]) -> bool:
+    return model._search_label is not None and f'{{{model._resource_parent}.' in model._search_label
+
+def _document_source(session: Session, model: Type[ResourceBase], criteria: ColumnElement[bool] | None) -> tuple[list[Any], Select[Any]]:
+    fields = [_text(getattr(model, name)) for name in model._searchable]
+    label, content = _label_source(model), fields[0]
+    for field in fields[1:]:
+        content = content + ' ' + field
+    parent_key = model._resource_parent_key()
+    targets: list[Any] = [
+        SearchDocument.resource, SearchDocument.resource_id, SearchDocument.parent_id,
+        SearchDocument.owner_id, SearchDocument.label, SearchDocument.content,
+    ]
+    columns: list[Any] = [
+        literal(_resource(model)), model.id, getattr(model, parent_key) if parent_key else null(),
+        model.owner_id, label, content,
+    ]
+    if _is_postgresql(session):
+        targets.append(SearchDocument.document)
+        columns.append(
+            func.setweight(func.to_tsvector(_CONFIG, label), 'A').op('||')(func.setweight(func.to_tsvector(_CONFIG, content), 'B'))
+        )
+    source = select(*columns).where(model.is_active == true())
+    return targets, source.where(criteria) if criteria is not None else source
+
+# Re-index the given rows of `model` (flushes pending changes first)
+def refresh(session: Session, model: Type[ResourceBase], ids: Iterable[int] | Select[Any]) -> None:
+    if not isinstance(ids, Select):
+        ids = set(ids)
+        if not ids:
+            return
+    session.flush()
+    remove(session, model, ids)
+    targets, source = _document_source(session, model, model.id.in_(ids))
+    session.execute(insert(SearchDocument).from_select(targets, source))
+    # Children whose labels show these rows' columns
+    child = model._resource_child_model()
+    if child is not None and _labelled_by_parent(child):
+        refresh(session, child, select(child.id).where(getattr(child, child._resource_parent_key()).in_(ids)))  # type: ignore
+
+def _documents_of(model: Type[ResourceBase], ids: Iterable[int] | Select[Any]) -> ColumnElement[bool]:
+    return and_(
+        SearchDocument.resource == _resource(model),
+        SearchDocument.resource_id.in_(ids if isinstance(ids, Select) else set(ids)),
+    )
+
+# Drop the documents of the given rows of `model`
+def remove(session: Session, model: Type[ResourceBase], ids: Iterable[int] | Select[Any]) -> None:
+    session.execute(delete(SearchDocument).where(_documents_of(model, ids)))
+
+# Drop the documents of a whole subtree in one statement (call before deleting it, the id subqueries run over its rows)
+# Archived subtrees are dropped as well, since only active rows are indexed
+def remove_levels(session: Session, levels: Sequence[tuple[Type[ResourceBase], Select[Any]]]) -> None:
+    session.execute(delete(SearchDocument).where(or_(*(_documents_of(model, ids) for model, ids in levels))))
+
+# Re-index every row (for one owner or everyone) and return the number of documents written
+def rebuild(session: Session, owner_id: int | None = None) -> int:
+    clear_stmt = delete(SearchDocument)
+    if owner_id is not None:
+        clear_stmt = clear_stmt.where(SearchDocument.owner_id == owner_id)
+    session.execute(clear_stmt)
+    written = 0
+    for model in _MODELS.values():
+        targets, source = _document_source(session, model, model.owner_id == owner_id if owner_id is not None else None)
+        written += session.execute(insert(SearchDocument).from_select(targets, source)).rowcount or 0
+    session.commit()
+    return written
+
+def _matches(session: Session, terms: Sequence[str]) -> tuple[ColumnElement[bool], ColumnElement[float], Any]:
+    if _is_postgresql(session):
+        query = func.to_tsquery(_CONFIG, ' & '.join(f'{term}:*' for term in terms))
+        rank = func.ts_rank(SearchDocument.document, query)
+        return SearchDocument.document.bool_op('@@')(query), rank, rank.desc()
+    # bm25() is lower for better matches; the label column weighs 10x the content
+    rank = literal_column('bm25(search_documents_fts, 10.0, 1.0)')
+    match = text('search_documents_fts MATCH :fts_query').bindparams(fts_query=' '.join(f'"{term}"*' for term in terms))
+    return match, -rank, rank
+
+def _label(resource: str, id: int, label: str) -> str:
+    return label or f'{resource.capitalize()} {id}'
+
+# Ancestors of each document, from the root down
+def _breadcrumbs(session: Session, owner_id: int, documents: Sequence[SearchDocument]) -> dict[tuple[str, int], list[SearchCrumb]]:
+    parents: dict[tuple[str, int], tuple[str, int] | None] = {}
+    crumbs: dict[tuple[str, int], SearchCrumb] = {}
+    requested: set[tuple[str, int]] = set()
+    pending = {(doc.resource, doc.resource_id): doc.parent_id for doc in documents}
+    while pending:
+        lookup: set[tuple[str, int]] = set()
+        for (resource, id), parent_id in pending.items():
+            parent = _MODELS[resource]._resource_parent
+            parents[(resource, id)] = (parent, parent_id) if parent and parent_id is not None else None
+            if parent and parent_id is not None and (parent, parent_id) not in requested:
+                lookup.add((parent, parent_id))
+        requested |= lookup
+        pending = {}
+        if lookup:
+            stmt = select(SearchDocument.resource, SearchDocument.resource_id, SearchDocument.parent_id, SearchDocument.label).where(
+                tuple_(SearchDocument.resource, SearchDocument.resource_id).in_(lookup),
+                SearchDocument.owner_id == owner_id,
+            )
+            for resource, id, parent_id, label in session.execute(stmt):
+                crumbs[(resource, id)] = SearchCrumb(resource=resource, id=id, label=_label(resource, id, label))
+                pending[(resource, id)] = parent_id
+
+    paths: dict[tuple[str, int], list[SearchCrumb]] = {}
+    for doc in documents:
+        path: list[SearchCrumb] = []
+        key = parents.get((doc.resource, doc.resource_id))
+        while key is not None and key in crumbs:
+            path.append(crumbs[key])
+            key = parents.get(key)
+        paths[(doc.resource, doc.resource_id)] = path[::-1]
+    return paths
+
+# Ranked, owner-scoped search over every resource type (each term of `q` is matched as a prefix)
+def search(context: RequestContext, q: str, limit: int = 20) -> SearchResults:
+    session = context.db
+    terms = _TERM.findall(q.lower())[:_MAX_TERMS]
+    if not terms:
+        return SearchResults(rows=[])
+
+    match, score, order = _matches(session, terms)
+    stmt = select(SearchDocument, score.label('score')).where(match, SearchDocument.owner_id == context.get_user_id())
+    if not _is_postgresql(session):
+        stmt = stmt.join(_FTS, _FTS.c.rowid == SearchDocument.id)
+    with routing.read_only(session):
+        results = session.execute(stmt.order_by(order, SearchDocument.id).limit(limit)).all()
+        documents = [doc for doc, _ in results]
+        paths = _breadcrumbs(session, context.get_user_id(), documents)
+    return SearchResults(rows=[
+        SearchHit(
+            resource=doc.resource, id=doc.resource_id, label=_label(doc.resource, doc.resource_id, doc.label),
+            rank=float(score), breadcrumb=paths[(doc.resource, doc.resource_id)],
+        )
+        for doc, score in results
+    ])
@@ -0,0 +1,129 @@
+'''
+Per-property rollups (property_summaries table)
+
+Every write that goes through the resource controllers refreshes the summary
+row of the property it falls under, inside the same transaction. Only that
+property's rows are aggregated, so the cost of a refresh follows the size of one
+property, and reading `PropertySchema.ReadWithStats` is a single-row join that
+never touches the child tables. Use `rebuild` (or `./scripts/rebuild_counters`)
+after loading data that bypassed the controllers.
+
+Rows are written with an upsert, after locking the properties being
+refreshed: concurrent writes under one property queue on that lock, so each
+recomputes the summary from the rows committed before it.
+'''
+from typing import Any, Iterable, Type
+from sqlalchemy import ColumnElement, Select, and_, select, delete, func, exists, text, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from core import settings
+from db import ResourceBase
+from db.models import Property, Building, Unit, Lease, Tenant, Insurance, PropertySummary
+
+# Select the property ids above the given rows of `model`, joining up the parent chain
+def _property_id_query(model: Type[ResourceBase], ids: set[int]) -> Select[Any]:
+    stmt = select(Building.property_id).select_from(model).where(model.id.in_(ids))
+    current = model
+    while current is not Building:
+        parent = current._resource_parent_model()
+        stmt = stmt.join(parent, getattr(current, current._resource_parent_key()) == parent.id)  # type: ignore
+        current = parent  # type: ignore (every model below Building has a parent)
+    return stmt.distinct()
+
+# Property ids above the given parent rows of `model` (e.g. building ids for units)
+def property_ids_above(session: Session, model: Type[ResourceBase], parent_ids: Iterable[int | None]) -> set[int]:
+    parent = model._resource_parent_model()
+    ids = {id for id in parent_ids if id is not None}
+    if parent is None or not ids:
+        return set()
+    if parent is Property:
+        return ids
+    return set(session.scalars(_property_id_query(parent, ids)))
+
+# Property ids affected by writes to `rows`. Call before deleting them (the parent chain must still resolve).
+def affected_property_ids(session: Session, model: Type[ResourceBase], rows: Iterable[ResourceBase]) -> set[int]:
+    if model is Property:
+        return {row.id for row in rows if row.id is not None}
+    parent_key = model._resource_parent_key()
+    return property_ids_above(session, model, (getattr(row, parent_key) for row in rows)) if parent_key else set()
+
+def _summary_columns() -> list[ColumnElement[Any]]:
+    # Every level is matched on the owner too, which leads the child tables' (owner_id, parent key, id) indexes
+    units = (
+        select(Unit.id)
+        .join(Building, and_(Unit.owner_id == Building.owner_id, Unit.building_id == Building.id))
+        .where(Building.owner_id == Property.owner_id, Building.property_id == Property.id)
+    )
+    leases = units.join(Lease, and_(Lease.owner_id == Unit.owner_id, Lease.unit_id == Unit.id))
+    tenants = leases.join(Tenant, and_(Tenant.owner_id == Lease.owner_id, Tenant.lease_id == Lease.id))
+    insured = exists().where(Insurance.owner_id == Tenant.owner_id, Insurance.tenant_id == Tenant.id, Insurance.is_active == true())
+
+    def scalar(stmt: Select[Any], column: ColumnElement[Any], *criteria: ColumnElement[bool]) -> Any:
+        return stmt.with_only_columns(column).where(*criteria).correlate(Property).scalar_subquery()
+
+    return [
+        Property.id,
+        Property.owner_id,
+        select(func.count(Building.id)).where(Building.owner_id == Property.owner_id, Building.property_id == Property.id).correlate(Property).scalar_subquery(),
+        scalar(units, func.count(Unit.id)),
+        scalar(units, func.count(Unit.id), Unit.is_vacant == true()),
+        scalar(leases, func.coalesce(func.sum(Lease.rent), 0.0), Unit.is_active == true(), Lease.is_active == true()),
+        scalar(units, func.coalesce(func.avg(Unit.sqft), 0.0)),
+        scalar(tenants, func.count(Tenant.id)),
+        scalar(tenants, func.count(Tenant.id), insured),
+    ]
+
+_TARGET_COLUMNS = [
+    PropertySummary.property_id,
+    PropertySummary.owner_id,
+    PropertySummary.building_count,
+    PropertySummary.unit_count,
+    PropertySummary.vacant_unit_count,
+    PropertySummary.active_rent_total,
+    PropertySummary.average_sqft,
+    PropertySummary.tenant_count,
+    PropertySummary.insured_tenant_count,
+]
+
+def _write(session: Session, criteria: ColumnElement[bool] | None, clear_criteria: ColumnElement[bool] | None) -> int:
+    # Summaries of deleted properties (the foreign key cascade covers PostgreSQL)
+    orphans = delete(PropertySummary).where(~exists().where(Property.id == PropertySummary.property_id))
+    if clear_criteria is not None:
+        orphans = orphans.where(clear_criteria)
+    session.execute(orphans)
+
+    # SQLite needs a WHERE clause to parse INSERT ... SELECT ... ON CONFLICT
+    source = select(*_summary_columns()).where(criteria if criteria is not None else true())
+    dialect = postgresql if session.get_bind().dialect.name == 'postgresql' else sqlite
+    stmt = dialect.insert(PropertySummary).from_select(_TARGET_COLUMNS, source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PropertySummary.property_id],
+        set_={
+            **{column.key: stmt.excluded[column.key] for column in _TARGET_COLUMNS[1:]},
+            'refreshed_at': text(settings.database_timestamp_utc),
+        },
+    )
+    return session.execute(stmt).rowcount or 0
+
+# Recompute the summary rows of the given properties (flushes pending changes first)
+def refresh(session: Session, property_ids: Iterable[int]) -> None:
+    ids = set(property_ids)
+    if not ids:
+        return
+    session.flush()
+    # Serialize refreshes of the same property (in id order, so they cannot deadlock)
+    session.execute(select(Property.id).where(Property.id.in_(ids)).order_by(Property.id).with_for_update())
+    _write(session, Property.id.in_(ids), PropertySummary.property_id.in_(ids))
+
+def record_changed(session: Session, model: Type[ResourceBase], rows: Iterable[ResourceBase]) -> None:
+    refresh(session, affected_property_ids(session, model, rows))
+
+# Recompute every summary (for one owner or everyone) and return the number of rows written
+def rebuild(session: Session, owner_id: int | None = None) -> int:
+    written = _write(
+        session,
+        Property.owner_id == owner_id if owner_id is not None else None,
+        PropertySummary.owner_id == owner_id if owner_id is not None else None,
+    )
+    session.commit()
+    return written
@@ -0,0 +1,112 @@
+'''
+Prefix typeahead for the frontend pickers (property -> building -> unit, tenants)
+
+Each (owner, resource) pair gets an in-process index: the active rows' labels,
+case-folded and sorted, next to their ids and parent ids. A lookup is a binary
+search for the prefix and a short scan, so it never touches the database, the
+ORM or Pydantic. Indexes are built on first use with one column-only query,
+dropped by the resource controllers after every committed write
+(`invalidate`), and rebuilt after `api_typeahead_ttl` seconds at most. The
+TTL bounds how stale another worker process can be. Only the
+`api_typeahead_max_indexes` most recently used indexes are kept.
+'''
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, NamedTuple, Type
+from sqlalchemy import null, select, true
+from sqlalchemy.orm import Session
+from core import settings
+from core.exceptions import InvalidQueryError
+from db import ResourceBase, routing
+from db.models import Property, Building, Unit, Tenant
+from schemas.request import RequestContext
+
+# resource (as in the URL) -> model and the column used as label
+_RESOURCES: dict[str, tuple[Type[ResourceBase], str]] = {
+    'properties': (Property, 'name'),
+    'buildings': (Building, 'name'),
+    'units': (Unit, 'unit_number'),
+    'tenants': (Tenant, 'name'),
+}
+
+class _PrefixIndex(NamedTuple):
+    keys: list[str]               # Case-folded labels, sorted
+    ids: list[int]                # Aligned with keys
+    labels: list[str]
+    parent_ids: list[int | None]
+    built_at: float
+
+_indexes: 'OrderedDict[tuple[int, str], _PrefixIndex]' = OrderedDict()
+_lock = Lock()
+# (owner, resource) -> invalidation count, bumped by `invalidate`: an index built concurrently with a write
+# to its own rows is not stored (writes of other owners or resources do not matter)
+_generations: dict[tuple[int, str], int] = {}
+
+def _build(session: Session, owner_id: int, resource: str) -> _PrefixIndex:
+    model, label_name = _RESOURCES[resource]
+    label = getattr(model, label_name)
+    parent_key = model._resource_parent_key()
+    parent = getattr(model, parent_key) if parent_key else null()
+    stmt = select(model.id, label, parent).where(model.owner_id == owner_id, model.is_active == true(), label.is_not(None))
+    with routing.read_only(session):
+        rows = sorted((str(name).casefold(), id, str(name), parent_id) for id, name, parent_id in session.execute(stmt))
+    return _PrefixIndex(
+        keys=[row[0] for row in rows],
+        ids=[row[1] for row in rows],
+        labels=[row[2] for row in rows],
+        parent_ids=[row[3] for row in rows],
+        built_at=time.monotonic(),
+    )
+
+def _get_index(session: Session, owner_id: int, resource: str) -> _PrefixIndex:
+    key = (owner_id, resource)
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None and time.monotonic() - index.built_at < settings.api_typeahead_ttl:
+            _indexes.move_to_end(key)
+            return index
+        generation = _generations.get(key, 0)
+    index = _build(session, owner_id, resource)
+    with _lock:
+        if _generations.get(key, 0) != generation:
+            return index
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > settings.api_typeahead_max_indexes:
+            _indexes.popitem(last=False)
+    return index
+
+# (id, label) pairs of the owner's active rows whose label starts with `prefix` (case-insensitive), in label order
+def lookup(
+    context: RequestContext,
+    resource: str,
+    prefix: str,
+    limit: int = 10,
+    parent_id: int | None = None,
+) -> list[tuple[int, str]]:
+    if resource not in _RESOURCES:
+        raise InvalidQueryError(f"Typeahead is not available for '{resource}' (available: {', '.join(_RESOURCES)})")
+    index = _get_index(context.db, context.get_user_id(), resource)
+    prefix = prefix.casefold()
+    results: list[tuple[int, str]] = []
+    position = bisect_left(index.keys, prefix)
+    while position < len(index.keys) and len(results) < limit and index.keys[position].startswith(prefix):
+        if parent_id is None or index.parent_ids[position] == parent_id:
+            results.append((index.ids[position], index.labels[position]))
+        position += 1
+    return results
+
+# Drop the owner's indexes for the given models (call after the write is committed)
+def invalidate(owner_id: int, *models: Any) -> None:
+    with _lock:
+        for resource, (model, _) in _RESOURCES.items():
+            if model in models:
+                key = (owner_id, resource)
+                _generations[key] = _generations.get(key, 0) + 1
+                _indexes.pop(key, None)
+
+def clear() -> None:
+    with _lock:
+        _indexes.clear()
@@ -2,11 +2,14 @@ from typing import Any
 from sqlalchemy import select, exists, and_, func
 from sqlalchemy.exc import NoResultFound, MultipleResultsFound
 from contextlib import contextmanager
+from core import revocation, security
 from core.logger import log_exception
 from schemas import UserSchema
 from db.models import User
 from sqlalchemy.orm import Session
-from schemas.request import PaginatedResults, AllResults
+from schemas.request import CountMode, PaginatedResults, AllResults
+from . import user_cache
+from .pagination import estimate_count
 
 @contextmanager
 def transaction(session: Session):
@@ -46,24 +49,38 @@ def get_by_email(db: Session, email: str) -> User | None:
     return get_by(db=db, key='email', val=email)
 
 def get_all(db: Session) -> AllResults:
-    stmt = select(User)
-    count_stmt = select(func.count()).select_from(User)
+    # Rows + Count (in one statement)
+    stmt = select(User, func.count().over().label('row_count'))
+    results = db.execute(stmt).all()
     return AllResults(
-        rows=db.scalars(stmt).all(),
-        rowCount=db.scalar(count_stmt) or 0
+        rows=[result[0] for result in results],
+        rowCount=results[0].row_count if results else 0
     )
 
 def get_all_paginated(
     db: Session,
     skip: int = 0,
-    limit: int = 10
+    limit: int = 10,
+    count: CountMode = 'exact',
 ) -> PaginatedResults:
-    stmt = select(User).offset(skip).limit(limit)
-    count_stmt = select(func.count()).select_from(User)
-    rowCount = db.scalar(count_stmt) or 0
+    # Count from the planner's estimate, or exactly via a window over the same statement as the rows
+    estimate = estimate_count(db, select(User.id)) if count == 'estimate' else None
+    if estimate is not None:
+        rows = db.scalars(select(User).order_by(User.id).offset(skip).limit(limit)).all()
+        rowCount = estimate
+    else:
+        stmt = select(User, func.count().over().label('row_count')).order_by(User.id).offset(skip).limit(limit)
+        results = db.execute(stmt).all()
+        rows = [result[0] for result in results]
+        if results:
+            rowCount = results[0].row_count
+        else:
+            # Empty page (past the end): the window has nothing to report on
+            rowCount = 0 if skip == 0 else db.scalar(select(func.count()).select_from(User)) or 0
     return PaginatedResults(
-        rows=db.scalars(stmt).all(),
+        rows=rows,
         rowCount=rowCount,
+        rowCountExact=estimate is None,
         pageStart=min(skip, rowCount),
         pageEnd=min(skip + limit, rowCount)
     )
@@ -71,8 +88,11 @@ def get_all_paginated(
 def create_and_commit(db: Session, schema: UserSchema.Create) -> User | None:
     try:
         with transaction(db):
-            db_obj = User(**schema.model_dump(exclude_unset=True))
+            values = schema.model_dump(exclude_unset=True)
+            values['password'] = security.get_password_hash(values['password'])
+            db_obj = User(**values)
             db.add(db_obj)
+            db.flush()
             db.refresh(db_obj)
             return db_obj
     except Exception as exc:
@@ -87,14 +107,25 @@ def update_and_commit(db: Session, schema: UserSchema.Update, id: int) -> User |
             if not user:
                 raise NoResultFound
 
-            for key, value in schema.model_dump(
+            emails = {user.email}
+            changes = schema.model_dump(
                 exclude_unset=True,
                 exclude={'id'}
-            ).items():
+            )
+            if changes.get('password') is not None:
+                changes['password'] = security.get_password_hash(changes['password'])
+            for key, value in changes.items():
                 setattr(user, key, value)
+            emails.add(user.email)
 
+            db.flush()  # Refreshing unflushed changes would discard them
             db.refresh(user)
-            return user
+        # Cached under the old and the new email (e.g. deactivated or renamed)
+        user_cache.invalidate(*emails)
+        # Tokens carry the email and active status: revoke the ones issued before the change
+        if changes.keys() & {'email', 'is_active', 'password'}:
+            revocation.revoke_user(id)
+        return user
     except NoResultFound as exc:
         log_exception(exc, f'No user found with id {id}')
         return None
@@ -102,6 +133,24 @@ def update_and_commit(db: Session, schema: UserSchema.Update, id: int) -> User |
         log_exception(exc, f'Error updating user {id}')
         return None
 
+# Store a new hash of the user's unchanged password (see security.verify_and_rehash)
+def rehash_and_commit(db: Session, id: int, hashed_password: str) -> bool:
+    try:
+        with transaction(db):
+            user = db.get(User, id)
+            if not user:
+                raise NoResultFound
+            email = user.email
+            user.password = hashed_password
+        user_cache.invalidate(email)
+        return True
+    except NoResultFound as exc:
+        log_exception(exc, f'No user found with id {id}')
+        return False
+    except Exception as exc:
+        log_exception(exc, f'Error rehashing password of user {id}')
+        return False
+
 def delete_and_commit(db: Session, id: int) -> bool:
     try:
         with transaction(db):
@@ -110,8 +159,11 @@ def delete_and_commit(db: Session, id: int) -> bool:
             if not user:
                 raise NoResultFound
 
+            email = user.email
             db.delete(user)
-            return True
+        user_cache.invalidate(email)
+        revocation.revoke_user(id)
+        return True
     except NoResultFound as exc:
         log_exception(exc, f'No user found with id {id}')
         return False
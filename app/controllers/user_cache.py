@@ -0,0 +1,122 @@
+'''
+Cache of the authenticated users, keyed by token subject (email)
+
+`verify_token` looks the token's user up here before querying the users
+table. Authenticating a hot session is then a dictionary lookup. Tier 1 is a
+per-process LRU of `auth_user_cache_max_entries` users, each kept for
+`auth_user_cache_ttl` seconds. With Redis (`core.cache`) a tier 1 miss is
+looked up there before the database, so every worker shares each load.
+Neither tier holds the password hash: cached users come back with an empty
+`password`. Only the login route verifies passwords, and it loads the user
+from the database.
+
+`UserController.update_and_commit`/`delete_and_commit` invalidate the user in
+both tiers after the commit, which covers deactivation (is_active=False). The
+tier 1 entries of other workers only expire, so the TTL bounds how long they
+may still accept a changed user: keep it short.
+
+`stats()` reports the hits per tier, misses, invalidations and the hit rate.
+'''
+import json
+import time
+from collections import Counter, OrderedDict
+from threading import Lock
+from core import settings
+from core.cache import ERRORS as REDIS_ERRORS, client as redis_client
+from core.logger import log_exception
+from schemas import UserSchema
+
+_PREFIX = 'user:'
+
+_users: 'OrderedDict[str, tuple[float, UserSchema.Read]]' = OrderedDict()  # subject -> (expiry, user)
+_stats: Counter[str] = Counter()
+_lock = Lock()
+_invalidations = 0  # Bumped by `invalidate`, so a user loaded concurrently with a write is not stored
+
+def _store_local(subject: str, user: UserSchema.Read) -> None:
+    with _lock:
+        _users[subject] = (time.monotonic() + settings.auth_user_cache_ttl, user)
+        _users.move_to_end(subject)
+        while len(_users) > settings.auth_user_cache_max_entries:
+            _users.popitem(last=False)
+
+def _load_shared(subject: str) -> UserSchema.Read | None:
+    client = redis_client()
+    if client is None:
+        return None
+    try:
+        value = client.get(f'{_PREFIX}{subject}')
+    except REDIS_ERRORS as exc:
+        log_exception(exc, 'user cache (get)')
+        return None
+    # Validated before it was stored
+    return UserSchema.Read.model_construct(**{**json.loads(value), 'password': ''}) if value is not None else None
+
+# The cached user for `subject`, or None (then load it and `put` it)
+def get(subject: str) -> UserSchema.Read | None:
+    if settings.auth_user_cache_ttl <= 0:
+        return None
+    with _lock:
+        entry = _users.get(subject)
+        if entry is not None and entry[0] > time.monotonic():
+            _users.move_to_end(subject)
+            _stats['l1_hits'] += 1
+            return entry[1]
+    user = _load_shared(subject)
+    with _lock:
+        _stats['l2_hits' if user is not None else 'misses'] += 1
+    if user is not None:
+        _store_local(subject, user)
+    return user
+
+# Marker to pass to `put`, taken before the user is loaded
+def generation() -> int:
+    with _lock:
+        return _invalidations
+
+# Cache `user` for `subject`, unless it was invalidated since `loaded_at` (a `generation()`)
+def put(subject: str, user: UserSchema.Read, loaded_at: int) -> None:
+    if settings.auth_user_cache_ttl <= 0 or generation() != loaded_at:
+        return
+    _store_local(subject, user.model_copy(update={'password': ''}))
+    client = redis_client()
+    if client is None:
+        return
+    try:
+        client.set(f'{_PREFIX}{subject}', user.model_dump_json(), ex=settings.auth_user_cache_ttl)  # `password` is excluded
+    except REDIS_ERRORS as exc:
+        log_exception(exc, 'user cache (set)')
+
+# Drop the users (call after the write is committed)
+def invalidate(*subjects: str) -> None:
+    global _invalidations
+    with _lock:
+        _invalidations += 1
+        _stats['invalidations'] += 1
+        for subject in subjects:
+            _users.pop(subject, None)
+    client = redis_client()
+    if client is None or not subjects:
+        return
+    try:
+        client.delete(*(f'{_PREFIX}{subject}' for subject in subjects))
+    except REDIS_ERRORS as exc:
+        log_exception(exc, 'user cache (delete)')
+
+def stats() -> dict[str, int | float]:
+    with _lock:
+        hits = _stats['l1_hits'] + _stats['l2_hits']
+        lookups = hits + _stats['misses']
+        return {
+            'entries': len(_users),
+            'l1_hits': _stats['l1_hits'],
+            'l2_hits': _stats['l2_hits'],
+            'misses': _stats['misses'],
+            'invalidations': _stats['invalidations'],
+            'hit_rate': hits / lookups if lookups else 0.0,
+        }
+
+def clear() -> None:
+    with _lock:
+        _users.clear()
+        _stats.clear()
@@ -0,0 +1,76 @@
+'''
+Version probes for conditional GETs (ETag / Last-Modified)
+
+A response can only change when a row of a table it reads changes. `probe`
+reads, in one statement, max(updated_at) over the rows the request selects
+(the owner's rows, narrowed by id, parent and filters) and a row count, plus
+the same pair over the owner's rows of every other table the read schema
+loads: its relationships and the tables behind its computed columns (e.g.
+the unit aggregates of a building). The updated_at values change on every
+insert and update, the counts on deletes. The counts are the `row_counters`
+entries (the owner's, or the parent's for a sub-list), so they count deletes
+outside the filters too; a single row is counted directly. The owner-wide
+max(updated_at) values come from the (owner_id, updated_at, id) indexes, one
+index entry each. A sub-list reads its parent's children through their
+(owner_id, parent key, id) index. An unchanged resource can so be answered
+with a 304 before the page query runs.
+
+A schema reading a table without `owner_id` and `updated_at` columns (e.g. the
+property summaries) has no version, and its responses are always sent in full.
+'''
+from datetime import datetime
+from typing import Any, NamedTuple, Sequence, Type
+from sqlalchemy import ColumnElement, Select, Table, bindparam, func, select
+from schemas.base import BaseModel
+from schemas.request import FilterParam, RequestContext
+from db import ResourceBase, routing
+from db.loaders import loaded_tables
+from . import counter, filtering, statements
+
+class Version(NamedTuple):
+    tag: str                        # Changes whenever the response may have changed
+    last_modified: datetime | None  # Latest updated_at among the rows read (None when there are none)
+
+def _versioned(table: Table) -> bool:
+    return 'owner_id' in table.c and 'updated_at' in table.c
+
+def _build_probe(model: Type[ResourceBase], scope: tuple[str, ...], related: tuple[Table, ...]) -> Select[Any]:
+    owner_id = bindparam('owner_id')
+    if 'id' in scope:
+        count: Any = func.count()
+    else:
+        parent_key = model._resource_parent_key()
+        count = counter.count_column(model, owner_id, bindparam(parent_key) if parent_key in scope else None)
+    columns: list[Any] = [func.max(getattr(model, 'updated_at')), count]
+    for table in related:
+        columns.append(select(func.max(table.c.updated_at)).where(table.c.owner_id == owner_id).scalar_subquery())
+        columns.append(counter.count_column(table, owner_id))
+    return select(*columns).select_from(model).where(*(getattr(model, name) == bindparam(name) for name in scope))
+
+# Version of the response listing (or reading) the owner's `model` rows matching `scope` (column -> value,
+# e.g. {'id': 3} or {'building_id': 1}) and `filters`, serialized with `read_schema`. None when unversioned.
+def probe(
+    context: RequestContext,
+    model: Type[ResourceBase],
+    read_schema: Type[BaseModel],
+    scope: dict[str, Any] | None = None,
+    filters: Sequence[FilterParam] = (),
+) -> Version | None:
+    tables = loaded_tables(model, read_schema)
+    if not all(_versioned(table) for table in tables):
+        return None
+    related = tuple(sorted((table for table in tables if table is not model.__table__), key=lambda table: table.name))
+    params: dict[str, Any] = {'owner_id': context.get_user_id(), **(scope or {})}
+    names = tuple(params)
+
+    criteria: list[ColumnElement[bool]] = filtering.compile_filters(model, filters)
+    # Unfiltered probes reuse one registered statement per shape (filter values are inlined)
+    stmt = statements.statement(('version', model, names, related), lambda: _build_probe(model, names, related))
+    if criteria:
+        stmt = stmt.where(*criteria)
+    with routing.read_only(context.db):
+        row = context.db.execute(stmt, params).one()
+
+    stamps = [value for value in row[::2] if value is not None]
+    tag = ':'.join(str(value) for value in (params['owner_id'], *row))
+    return Version(tag=tag, last_modified=max(stamps) if stamps else None)
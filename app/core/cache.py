@@ -0,0 +1,33 @@
+'''
+Shared Redis client of the caches (`redis_cache_url`)
+
+The `redis` package is optional: without it `client()` returns None and every
+cache keeps to its in-process tier. Calls give up after `redis_cache_timeout`
+seconds; callers catch `ERRORS` and carry on without the shared tier.
+'''
+from typing import Any
+from .config import settings
+
+try:
+    import redis
+except ImportError:  # Optional: without it the caches are per process
+    redis = None  # type: ignore[assignment]
+
+ERRORS: tuple[type[Exception], ...] = (OSError, redis.RedisError) if redis is not None else (OSError,)
+
+_client: Any = None
+_client_ready = False
+
+# The Redis client, created on first use (None without the redis package)
+def client() -> Any:
+    global _client, _client_ready
+    if not _client_ready:
+        if redis is not None and settings.redis_cache_url:
+            _client = redis.Redis.from_url(settings.redis_cache_url, socket_timeout=settings.redis_cache_timeout)
+        _client_ready = True
+    return _client
+
+# Use `client` (a Redis client, or an object with the same methods) instead, None for in-process caches only
+def use_client(new_client: Any) -> None:
+    global _client, _client_ready
+    _client, _client_ready = new_client, True
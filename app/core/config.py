@@ -40,6 +40,9 @@ class Settings(BaseSettings):
     postgres_debug_log_queries: bool | None = Field(None, description='Log SQL queries for debugging')
     postgres_url: str = ''
     postgres_test_url: str = ''
+    postgres_replica_urls: list[str] = Field([], description='Read replica database URLs (read-only controller calls are routed to them)')
+    postgres_replica_sticky_seconds: float = Field(5.0, description="Max seconds a user's reads stay on the primary after a write")
+    postgres_replica_lsn_cache_seconds: float = Field(0.1, description="Seconds a replica's replay position is reused before it is read again")
     sqlalchemy_future: bool = True  # Use the latest features and deprecations
     sqlalchemy_echo: bool = False  # Implementation of postgres_log_queries
     # Specify the database-specific timestamp function
@@ -50,12 +53,27 @@ class Settings(BaseSettings):
     jwt_algorithm: str = Field(..., description='JWT algorithm')
     jwt_access_token_expire_minutes: int = Field(..., description='JWT access token expiry time in minutes')
     jwt_refresh_token_expire_days: int = Field(..., description='JWT refresh token expiry time in days')
+    jwt_claims_cache_max_entries: int = Field(10000, description='Max decoded tokens memoized (their signature is verified once)')
+    auth_user_cache_ttl: int = Field(30, description='Seconds an authenticated user is cached by token subject (0 disables the cache)')
+    auth_user_cache_max_entries: int = Field(10000, description='Max users cached in process')
+    password_bcrypt_rounds: int = Field(12, description='bcrypt cost of new password hashes (older hashes are rehashed on login)')
+    password_hash_workers: int = Field(4, description='Max concurrent password hashes/verifications per worker')
     # jwt_reset_password_token_expire_minutes: int = Field(..., description='JWT reset password token expiry time in minutes')
     # jwt_verify_email_token_expire_minutes: int = Field(..., description='JWT verify email token expiry time in minutes')
 
     # API Configuration
     api_cors_origins: list[str] = Field(..., description='List of allowed origins')
     api_v1_cors_origins: list[str] | None = Field(None, description='List of allowed origins specific for v1 API')
+    api_batch_max_size: int = Field(500, description='Max number of ids or rows accepted by batch/bulk endpoints')
+    api_unindexed_sort_max_rows: int = Field(10000, description='Max rows an index endpoint will sort by a column without an index')
+    api_typeahead_ttl: int = Field(60, description='Seconds an in-process typeahead index is used before it is rebuilt')
+    api_typeahead_max_indexes: int = Field(1000, description='Max (owner, resource) typeahead indexes kept in memory')
+    api_schema_cache_max_entries: int = Field(256, description='Max ?fields= schemas generated and kept per worker, and max entries of each cache keyed by schema')
+    api_statement_registry_max_entries: int = Field(2048, description='Max prebuilt statements kept per worker (least recently used are dropped)')
+    api_export_chunk_rows: int = Field(1000, description='Rows fetched and encoded at a time by the export endpoints')
+    api_response_cache_enabled: bool = Field(False, description='Cache read/index responses (tier 1 in process, tier 2 in Redis)')
+    api_response_cache_ttl: int = Field(300, description='Seconds a cached response is kept in either tier')
+    api_response_cache_l1_entries: int = Field(1000, description='Max responses cached in process (tier 1)')
 
     # Redis or Cache Configuration
     redis_host: str = Field(..., description='Redis server hostname or IP address')
@@ -64,6 +82,7 @@ class Settings(BaseSettings):
     redis_cache_db: int = Field(1, description='Redis cache database index')
     redis_db_url: str = ''
     redis_cache_url: str = ''
+    redis_cache_timeout: float = Field(0.25, description='Seconds before a Redis cache call is abandoned (the caller carries on without it)')
 
     # Email Configuration
     smtp_server: str | None = Field(None, description='Email host')
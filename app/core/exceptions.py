@@ -0,0 +1,8 @@
+'''
+Custom exceptions raised by the application layers (controllers, db helpers)
+and translated into HTTP responses by the handlers in app/api/errors.py
+'''
+
+# Raised when a client-supplied query parameter (cursor, filter, sort, etc.) is invalid
+class InvalidQueryError(ValueError):
+    pass
@@ -1,29 +1,71 @@
+import time
+import anyio.from_thread
+from collections import OrderedDict
+from threading import Lock
+from uuid import uuid4
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Callable, TypeVar
 from typing_extensions import Literal
 from fastapi import HTTPException, status, Request, Response, Depends
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 from jose import JWTError, jwt, ExpiredSignatureError
-from core import settings
+from core import revocation, settings
 from schemas import UserSchema
-from controllers import UserController
+from controllers import UserController, user_cache
 from core.logger import log_exception
-from db import get_db
+from db import get_db, get_async_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/api/v1/auth/login')
 
-# Generate JWT token
+U = TypeVar('U')
+
+_claims: 'OrderedDict[str, dict[str, Any]]' = OrderedDict()  # token -> decoded claims, most recently used last
+_claims_lock = Lock()
+
+# Generate JWT token (with a unique id and its issue time, checked against the revocation list)
 def create_token(data: dict[str, Any], token_type: Literal['access', 'refresh']) -> str:
-    expire = datetime.now(timezone.utc)
+    now = datetime.now(timezone.utc)
+    expire = now
     if token_type == 'access':
         expire += timedelta(minutes=settings.jwt_access_token_expire_minutes)
     elif token_type == 'refresh':
         expire += timedelta(days=settings.jwt_refresh_token_expire_days)
     to_encode = data.copy()
-    to_encode.update({'exp': expire})
+    to_encode.update({'exp': expire, 'iat': now.timestamp(), 'jti': uuid4().hex})
     return jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
 
+# Claims identifying `user` in its tokens. Access tokens also carry the active status,
+# so authenticating a request needs no user lookup (see verify_access_token).
+def token_claims(user: Any, token_type: Literal['access', 'refresh']) -> dict[str, Any]:
+    claims: dict[str, Any] = {'sub': user.email, 'uid': user.id}
+    if token_type == 'access':
+        claims['active'] = user.is_active
+    return claims
+
+# Decode `token`, checking its signature and expiry. The claims of the recently seen tokens
+# are memoized, so repeated requests with the same token only check its expiry.
+def decode_token(token: str) -> dict[str, Any]:
+    with _claims_lock:
+        claims = _claims.get(token)
+        if claims is not None:
+            _claims.move_to_end(token)
+    if claims is None:
+        claims = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+        with _claims_lock:
+            _claims[token] = claims
+            while len(_claims) > settings.jwt_claims_cache_max_entries:
+                _claims.popitem(last=False)
+    elif claims.get('exp', 0) <= time.time():
+        raise ExpiredSignatureError('Signature has expired.')
+    return claims
+
+def clear_claims_cache() -> None:
+    with _claims_lock:
+        _claims.clear()
+
 # Set tokens as HttpOnly cookies
 def set_token_cookie(response: Response, token_type: Literal['access', 'refresh'], token: str) -> None:
     response.set_cookie(
@@ -51,40 +93,69 @@ def credentials_exception(response: Response) -> HTTPException:
         headers={'WWW-Authenticate': 'Bearer'},
     )
 
-def verify_token(db: Session, token: str, response: Response) -> UserSchema.Read:
+# Claims of a valid, unrevoked token (ExpiredSignatureError is re-raised for the refresh flow)
+def _verified_claims(token: str, response: Response, name: str = 'token') -> dict[str, Any]:
     try:
-        # Decode token and validate 'exp' claim
-        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        email = payload.get('sub')
-        if not email:
-            raise credentials_exception(response)
-
+        claims = decode_token(token)
     except ExpiredSignatureError:
-        # Re-raise to allow get_current_user to handle token expiration
         raise
-
     except JWTError as exc:
         # Log and raise for any other JWT-related errors
-        log_exception(exc, 'Error decoding token')
+        log_exception(exc, f'Error decoding {name}')
         raise credentials_exception(response) from exc
+    if not claims.get('sub') or revocation.is_revoked(claims):
+        raise credentials_exception(response)
+    return claims
+
+# Loads the user row of a token subject (email), or None
+UserLoader = Callable[[str], Any]
 
-    user = UserController.get_by_email(db=db, email=email)
+def _loader(db: Session) -> UserLoader:
+    return lambda email: UserController.get_by_email(db=db, email=email)
+
+def _verify_token(load: UserLoader, token: str, response: Response) -> UserSchema.Read:
+    claims = _verified_claims(token, response)
+    return _get_user(load, claims['sub'], response)
+
+def verify_token(db: Session, token: str, response: Response) -> UserSchema.Read:
+    return _verify_token(_loader(db), token, response)
+
+# Identity of an access token, read from its claims without a user lookup
+# (tokens issued before the claims were added fall back to the lookup)
+def _verify_access_token(load: UserLoader, token: str, response: Response) -> UserSchema.Identity:
+    claims = _verified_claims(token, response)
+    if 'uid' in claims and 'active' in claims:
+        return UserSchema.Identity.model_construct(id=claims['uid'], email=claims['sub'], is_active=claims['active'])
+    user = _get_user(load, claims['sub'], response)
+    return UserSchema.Identity.model_construct(id=user.id, email=user.email, is_active=user.is_active)
+
+def verify_access_token(db: Session, token: str, response: Response) -> UserSchema.Identity:
+    return _verify_access_token(_loader(db), token, response)
+
+# The user of a token subject, from the user cache or else loaded with `load`
+def _get_user(load: UserLoader, email: str, response: Response) -> UserSchema.Read:
+    if (cached := user_cache.get(email)) is not None:
+        return cached
+    loaded_at = user_cache.generation()
+    user = load(email)
     if not user:
         raise credentials_exception(response)
+    current_user = UserSchema.Read.model_validate(user)
+    user_cache.put(email, current_user, loaded_at)
+    return current_user
 
-    return UserSchema.Read.model_validate(user)
+def get_user(db: Session, email: str, response: Response) -> UserSchema.Read:
+    return _get_user(_loader(db), email, response)
 
-def get_current_user(
-    request: Request,
-    response: Response,
-    db: Session = Depends(get_db),
-) -> UserSchema.Read:
+# Verify the access token cookie with `verify`. When it has expired, a new access token is issued
+# from the refresh token cookie (with the user's current claims) and verified instead.
+def _authenticate(request: Request, response: Response, load: UserLoader, verify: Callable[[UserLoader, str, Response], U]) -> U:
     token = request.cookies.get('access_token')
     if not token:
         raise credentials_exception(response)
 
     try:
-        return verify_token(db, token, response)
+        return verify(load, token, response)
 
     except ExpiredSignatureError:
         # Handle expired access token by using refresh token
@@ -93,34 +164,30 @@ def get_current_user(
             raise credentials_exception(response)
 
         try:
-            # Verify refresh token
-            refresh_payload = jwt.decode(
-                refresh_token,
-                settings.jwt_secret_key,
-                algorithms=[settings.jwt_algorithm]
-            )
-            email = refresh_payload.get('sub')
-            if not email:
-                raise credentials_exception(response)
-
-            user = UserController.get_by_email(db=db, email=email)
-            if not user:
-                raise credentials_exception(response)
-
-            # Set the new access token in response cookies
-            create_and_set_token_cookie(response=response, token_type='access', data={'sub': email})
-
-            return UserSchema.Read.model_validate(user)
-
+            claims = _verified_claims(refresh_token, response, 'refresh token')
         except ExpiredSignatureError:
             raise credentials_exception(response)
 
-        except JWTError as exc:
-            log_exception(exc, 'Error decoding refresh token')
-            raise credentials_exception(response)
+        user = _get_user(load, claims['sub'], response)
 
-    except JWTError:
-        raise credentials_exception(response)
+        # Set the new access token in response cookies
+        token = create_and_set_token_cookie(response=response, token_type='access', data=token_claims(user, 'access'))
+        return verify(load, token, response)
+
+def get_current_user(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+) -> UserSchema.Read:
+    return _authenticate(request, response, _loader(db), _verify_token)
+
+# Identity of the current user from the access token claims (no database query on the hot path)
+def get_current_identity(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+) -> UserSchema.Identity:
+    return _authenticate(request, response, _loader(db), _verify_access_token)
 
 # Get current user without raising an exception if not found or if token is invalid
 def get_current_user_optional(
@@ -135,3 +202,28 @@ def get_current_user_optional(
             return None
         else:
             raise exc
+
+# Async variant of get_current_identity. The token checks run in the threadpool, since the revocation list
+# and user cache lookups may block on Redis. Only a user lookup in the database goes back to the event loop,
+# on the request's async session.
+async def get_current_identity_async(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+) -> UserSchema.Identity:
+    def load(email: str) -> Any:
+        return anyio.from_thread.run(db.run_sync, lambda session: UserController.get_by_email(db=session, email=email))
+    return await run_in_threadpool(_authenticate, request, response, load, _verify_access_token)
+
+# Revoke the request's tokens until they expire (e.g. on logout)
+def revoke_tokens(request: Request) -> None:
+    for name in ('access_token', 'refresh_token'):
+        token = request.cookies.get(name)
+        if not token:
+            continue
+        try:
+            claims = decode_token(token)
+        except JWTError:
+            continue  # Invalid or expired: nothing to revoke
+        if 'jti' in claims:
+            revocation.revoke_token(claims['jti'], claims['exp'])
@@ -0,0 +1,96 @@
+'''
+Revocation list of the JWTs (access and refresh tokens)
+
+Tokens are stateless, so a token stays valid until it expires unless it is
+listed here, in one of two compact forms:
+
+- a token id (`jti` claim), e.g. on logout, kept until the token expires
+- a per-user "issued before" time (`uid` and `iat` claims), e.g. when a user
+  is deactivated, deleted or changes password, kept for the refresh token
+  lifetime (every older token has expired by then)
+
+Entries are kept in process and, with Redis (`core.cache`), shared by all
+workers. A check is a dictionary lookup, plus one MGET when Redis is
+configured. If Redis fails, only this process's entries are checked.
+'''
+import time
+from threading import Lock
+from typing import Any
+from .cache import ERRORS as REDIS_ERRORS, client as redis_client
+from .config import settings
+from .logger import log_exception
+
+_PREFIX = 'revoked:'
+
+_tokens: dict[str, float] = {}  # jti -> expiry (epoch seconds)
+_users: dict[int, tuple[float, float]] = {}  # user id -> (tokens issued before, entry expiry)
+_lock = Lock()
+
+def _token_key(jti: str) -> str:
+    return f'{_PREFIX}jti:{jti}'
+
+def _user_key(user_id: int) -> str:
+    return f'{_PREFIX}user:{user_id}'
+
+def _purge(now: float) -> None:
+    for jti in [jti for jti, expires in _tokens.items() if expires <= now]:
+        del _tokens[jti]
+    for user_id in [user_id for user_id, (_, expires) in _users.items() if expires <= now]:
+        del _users[user_id]
+
+# Revoke the token `jti`, which expires at `expires_at` (epoch seconds)
+def revoke_token(jti: str, expires_at: float) -> None:
+    now = time.time()
+    if expires_at <= now:
+        return
+    with _lock:
+        _purge(now)
+        _tokens[jti] = expires_at
+    client = redis_client()
+    if client is None:
+        return
+    try:
+        client.set(_token_key(jti), b'1', ex=max(1, int(expires_at - now) + 1))
+    except REDIS_ERRORS as exc:
+        log_exception(exc, 'revocation list (token)')
+
+# Revoke every token of the user issued until now
+def revoke_user(user_id: int) -> None:
+    now = time.time()
+    lifetime = settings.jwt_refresh_token_expire_days * 86400
+    with _lock:
+        _purge(now)
+        _users[user_id] = (now, now + lifetime)
+    client = redis_client()
+    if client is None:
+        return
+    try:
+        client.set(_user_key(user_id), repr(now).encode(), ex=lifetime)
+    except REDIS_ERRORS as exc:
+        log_exception(exc, 'revocation list (user)')
+
+# Whether a decoded token (its jti, uid and iat claims) is revoked
+def is_revoked(claims: dict[str, Any]) -> bool:
+    jti, user_id, issued_at = claims.get('jti'), claims.get('uid'), claims.get('iat', 0)
+    with _lock:
+        if jti is not None and jti in _tokens:
+            return True
+        if user_id is not None and user_id in _users and issued_at <= _users[user_id][0]:
+            return True
+    client = redis_client()
+    if client is None or (jti is None and user_id is None):
+        return False
+    try:
+        token_revoked, revoked_before = client.mget([
+            _token_key(jti) if jti is not None else f'{_PREFIX}none',
+            _user_key(user_id) if user_id is not None else f'{_PREFIX}none',
+        ])
+    except REDIS_ERRORS as exc:
+        log_exception(exc, 'revocation list (check)')
+        return False
+    return token_revoked is not None or (revoked_before is not None and issued_at <= float(revoked_before))
+
+def clear() -> None:
+    with _lock:
+        _tokens.clear()
+        _users.clear()
@@ -1,12 +1,64 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, TypeVar
 from passlib.context import CryptContext
+from .config import settings
 
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+T = TypeVar('T')
+
+# Raising password_bcrypt_rounds makes older hashes need an update (rehashed on login)
+pwd_context = CryptContext(
+    schemes=['bcrypt'],
+    deprecated='auto',
+    bcrypt__default_rounds=settings.password_bcrypt_rounds,
+    bcrypt__min_rounds=settings.password_bcrypt_rounds,
+)
+
+# bcrypt releases the GIL, so hashing runs in a bounded thread pool: a burst of logins queues
+# there instead of occupying every worker thread. Sync callers wait for the result (blocking
+# their thread); routes on the event loop await the `*_async` variants, which hold no thread
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = Lock()
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix='password-hash')
+    return _pool
+
+def _run(fn: Callable[..., T], *args: Any) -> T:
+    return _executor().submit(fn, *args).result()
+
+async def _run_async(fn: Callable[..., T], *args: Any) -> T:
+    return await asyncio.get_running_loop().run_in_executor(_executor(), fn, *args)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _run(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_async(pwd_context.verify, plain_password, hashed_password)
+
+def get_password_hash(password: str) -> str:
+    return _run(pwd_context.hash, password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_async(pwd_context.hash, password)
+
+def _verify_and_rehash(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    if not pwd_context.verify(plain_password, hashed_password):
+        return False, None
+    return True, pwd_context.hash(plain_password) if pwd_context.needs_update(hashed_password) else None
+
+# Verify the password, and hash it again when its hash uses outdated settings:
+# (verified, new hash or None)
+def verify_and_rehash(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return _run(_verify_and_rehash, plain_password, hashed_password)
 
-def get_password_hash(password: str) :
-    return pwd_context.hash(password)
+async def verify_and_rehash_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await _run_async(_verify_and_rehash, plain_password, hashed_password)
 
 # Stub for future use
 def authorize_access():
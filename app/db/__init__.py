@@ -3,7 +3,8 @@ from .base import Base
 from .mixins import CommonMixins
 from .resource import ResourceBase
 from .polymorphic import PolymorphicBase
-from .session import engine, SessionLocal, get_db
+from .session import engine, SessionLocal, get_db, async_engine, AsyncSessionLocal, get_async_db, pool_stats
+from . import routing
 from . import mixins
 from . import models
 
@@ -19,6 +20,11 @@ __all__ = [
     'engine',
     'SessionLocal',
     'get_db',
+    'async_engine',
+    'AsyncSessionLocal',
+    'get_async_db',
+    'pool_stats',
+    'routing',
     'models',
     'mixins',  # Usage ex: mixins.AutoIdMixin
 ]
@@ -0,0 +1,125 @@
+'''
+Loader profiles: derive the eager-loading options for a query from the
+Pydantic schema its rows will be serialized with.
+
+Relationships are declared with lazy='raise' on the models, so every query
+must say up front which part of the object graph it needs. Instead of each
+controller hand-writing `options(...)`, `loader_options(Model, Schema)` walks
+the schema's fields:
+
+- a field named after a relationship is loaded (joinedload for many-to-one,
+  selectinload for collections) and the nested schema is followed recursively
+- a field listed in the model's `_loader_dependencies` (computed properties)
+  pulls in the relationship paths or deferred columns it reads, e.g.
+  'units.leases' or 'unit_count'
+- a field backed by a deferred column is undeferred
+
+For sparse schemas (`load_only_fields`, generated for `?fields=`), the SELECT is
+also narrowed to the columns those fields need (plus the keys of the loaded
+relationships) with `load_only`.
+
+Anything else stays unloaded, and touching it raises instead of silently
+issuing extra queries.
+
+`loaded_tables(Model, Schema)` walks the same fields and returns the tables
+such a query reads (used to version responses, see controllers/versions.py).
+'''
+import types
+from functools import lru_cache
+from typing import Any, Type, Union, get_args, get_origin
+from pydantic import BaseModel as PydanticBaseModel
+from sqlalchemy import Table, inspect
+from sqlalchemy.orm import joinedload, load_only, selectinload, undefer
+from sqlalchemy.orm.interfaces import LoaderOption
+from sqlalchemy.sql.util import find_tables
+from core import settings
+from .base import Base
+
+# Unwrap list[X], X | None, etc. to the nested schema class (if any)
+def _nested_schema(annotation: Any) -> Type[PydanticBaseModel] | None:
+    if isinstance(annotation, type) and issubclass(annotation, PydanticBaseModel):
+        return annotation
+    if get_origin(annotation) in (list, tuple, set, Union, types.UnionType):
+        for arg in get_args(annotation):
+            if (nested := _nested_schema(arg)) is not None:
+                return nested
+    return None
+
+# What loading `model` rows for `schema` needs: relationship name -> [nested schema, dotted paths needed
+# below it], the deferred columns to undefer and every column read
+def _walk(
+    model: Type[Base],
+    schema: Type[PydanticBaseModel] | None,
+    extra_paths: tuple[str, ...] = (),
+) -> tuple[dict[str, list[Any]], dict[str, None], dict[str, None]]:
+    mapper = inspect(model)
+    dependencies: dict[str, tuple[str, ...]] = getattr(model, '_loader_dependencies', {})
+
+    wanted: dict[str, list[Any]] = {}
+    undeferred: dict[str, None] = {}
+    columns: dict[str, None] = {}
+    def want(path: str, nested: Type[PydanticBaseModel] | None = None) -> None:
+        head, _, rest = path.partition('.')
+        if head in mapper.column_attrs:
+            columns[head] = None
+            if mapper.column_attrs[head].deferred:
+                undeferred[head] = None
+            return
+        entry = wanted.setdefault(head, [None, []])
+        entry[0] = entry[0] or nested
+        if rest:
+            entry[1].append(rest)
+
+    for name, field in (schema.model_fields.items() if schema else ()):
+        if name in mapper.relationships:
+            want(name, _nested_schema(field.annotation))
+        elif name in mapper.column_attrs:
+            want(name)
+        for path in dependencies.get(name, ()):
+            want(path)
+    for path in extra_paths:
+        want(path)
+    return wanted, undeferred, columns
+
+def _build_options(
+    model: Type[Base],
+    schema: Type[PydanticBaseModel] | None,
+    extra_paths: tuple[str, ...] = (),
+) -> list[LoaderOption]:
+    mapper = inspect(model)
+    wanted, undeferred, columns = _walk(model, schema, extra_paths)
+
+    options: list[LoaderOption] = [undefer(getattr(model, name)) for name in undeferred]
+    if getattr(schema, 'load_only_fields', False):
+        for name in wanted:
+            columns.update((mapper.get_property_by_column(column).key, None) for column in mapper.relationships[name].local_columns)
+        options.append(load_only(*(getattr(model, name) for name in columns), raiseload=True))
+    for name, (nested, paths) in wanted.items():
+        relationship = mapper.relationships[name]
+        loader = selectinload if relationship.uselist else joinedload
+        load = loader(getattr(model, name))
+        nested_options = _build_options(relationship.mapper.class_, nested, tuple(paths))
+        options.append(load.options(*nested_options) if nested_options else load)
+    return options
+
+# Loader options for querying `model` rows that will be serialized with `schema`
+@lru_cache(maxsize=settings.api_schema_cache_max_entries)
+def loader_options(model: Type[Base], schema: Type[PydanticBaseModel] | None) -> tuple[LoaderOption, ...]:
+    return tuple(_build_options(model, schema))
+
+def _collect_tables(model: Type[Base], schema: Type[PydanticBaseModel] | None, extra_paths: tuple[str, ...] = ()) -> set[Table]:
+    mapper = inspect(model)
+    wanted, _, columns = _walk(model, schema, extra_paths)
+    tables: set[Table] = {mapper.local_table}  # type: ignore[arg-type]
+    for name in columns:
+        for column in mapper.column_attrs[name].columns:
+            tables.update(table for table in find_tables(column) if isinstance(table, Table))
+    for name, (nested, paths) in wanted.items():
+        tables |= _collect_tables(mapper.relationships[name].mapper.class_, nested, tuple(paths))
+    return tables
+
+# Tables read when loading `model` rows for `schema`: the model's own, those of the loaded
+# relationships and those the loaded column expressions select from (e.g. a unit aggregate)
+@lru_cache(maxsize=settings.api_schema_cache_max_entries)
+def loaded_tables(model: Type[Base], schema: Type[PydanticBaseModel] | None) -> frozenset[Table]:
+    return frozenset(_collect_tables(model, schema))
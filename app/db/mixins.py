@@ -7,8 +7,7 @@ from core import settings
 class AutoIdMixin:
     id: Mapped[int] = mapped_column(
         Integer,
-        primary_key=True,
-        index=True,
+        primary_key=True,  # The primary key index already covers lookups by id
         autoincrement=True,
     )
 
@@ -19,11 +18,13 @@ class TimestampMixin:
         nullable=False,
         server_default=text(settings.database_timestamp_utc)
     )
-    # This column is managed by a database trigger and handled by db migrations (defined in /alembic/env.py)
+    # This column is managed by a database trigger and handled by db migrations (defined in /alembic/env.py).
+    # The ORM also sets it on UPDATE, so it stays current where the trigger is missing (response versions rely on it).
     updated_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True),
         nullable=False,
-        server_default=text(settings.database_timestamp_utc)
+        server_default=text(settings.database_timestamp_utc),
+        onupdate=text(settings.database_timestamp_utc),
     )
 
 class ActiveFlaggedMixin:
@@ -5,6 +5,9 @@ from .unit import Unit
 from .lease import Lease
 from .tenant import Tenant
 from .insurance import Insurance
+from .counter import RowCounter
+from .property_summary import PropertySummary
+from .search_document import SearchDocument
 
 __all__ = [
     'User',
@@ -13,5 +16,8 @@ __all__ = [
     'Unit',
     'Lease',
     'Tenant',
-    'Insurance'
+    'Insurance',
+    'RowCounter',
+    'PropertySummary',
+    'SearchDocument',
 ]
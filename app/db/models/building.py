@@ -1,15 +1,25 @@
-from sqlalchemy import Integer, String, ForeignKey, Boolean
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from sqlalchemy import Integer, String, ForeignKey, Boolean, ColumnElement, Index, ScalarSelect, select, func, true
+from sqlalchemy.orm import relationship, Mapped, mapped_column, column_property, ColumnProperty
 from functools import cached_property
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 from db import ResourceBase
+from .unit import Unit
+from .lease import Lease
 if TYPE_CHECKING:
-    from models import Property, Unit
+    from models import Property
 
 class Building(ResourceBase):
     __tablename__ = 'buildings'
     _resource_parent = 'property'
     _resource_child = 'unit'
+    _filterable = ResourceBase._filterable + ('name', 'floor_count', 'has_elevator', 'has_pool', 'has_gym', 'has_parking', 'has_doorman', 'property_id')
+    _sortable = ResourceBase._sortable + ('name', 'floor_count')
+    _searchable = ('name',)
+    __table_args__ = (
+        Index('ix_buildings_owner_id_id', 'owner_id', 'id'),
+        Index('ix_buildings_owner_id_updated_at_id', 'owner_id', 'updated_at', 'id'),
+        Index('ix_buildings_owner_id_property_id_id', 'owner_id', 'property_id', 'id', postgresql_include=['name']),
+    )
 
     name: Mapped[str] = mapped_column(String)
     floor_count: Mapped[int] = mapped_column(Integer)
@@ -18,27 +28,41 @@ class Building(ResourceBase):
     has_gym: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default='false')
     has_parking: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default='false')
     has_doorman: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default='false')
-    property_id: Mapped[int] = mapped_column(ForeignKey('properties.id'), index=True, nullable=False)
+    property_id: Mapped[int] = mapped_column(ForeignKey('properties.id'), nullable=False)
+
+    # Deferred stat columns read by the computed properties below (see db/loaders.py)
+    _loader_dependencies = {
+        'vacancy': ('unit_count', 'vacant_unit_count'),
+        'occupancy': ('unit_count', 'vacant_unit_count'),
+        'average_stats': (
+            'unit_count', 'average_sqft', 'average_bedrooms', 'average_bathrooms',
+            'active_unit_count', 'active_rent_total',
+        ),
+    }
+
+    if TYPE_CHECKING:
+        # Deferred stat columns, mapped below the class
+        unit_count: int
+        vacant_unit_count: int
+        active_unit_count: int
+        average_sqft: float
+        average_bedrooms: float
+        average_bathrooms: float
+        active_rent_total: float
 
     property: Mapped['Property'] = relationship(
         'Property',
         back_populates='buildings',
-        lazy='joined',
+        primaryjoin='and_(Property.id == Building.property_id, Property.owner_id == Building.owner_id)',
+        lazy='raise',
     )
     units: Mapped[list['Unit']] = relationship(
         'Unit',
         back_populates='building',
-        lazy='selectin',
+        primaryjoin='and_(Building.id == Unit.building_id, Building.owner_id == Unit.owner_id)',
+        lazy='raise',
     )
 
-    @cached_property
-    def unit_count(self) -> int:
-        return len(self.units)
-
-    @cached_property
-    def vacant_unit_count(self) -> int:
-        return sum(1 for unit in self.units if unit.is_vacant)
-
     @cached_property
     def vacancy(self) -> dict[str, float | int]:
         return {
@@ -59,15 +83,41 @@ class Building(ResourceBase):
         if not self.unit_count:
             return {'sqft': 0.0, 'bedrooms': 0.0, 'bathrooms': 0.0, 'rent': 0.0}
 
-        active_units = [u for u in self.units if u.is_active]
         return {
-            'sqft': sum(u.sqft for u in self.units) / self.unit_count,
-            'bedrooms': sum(u.bedrooms for u in self.units) / self.unit_count,
-            'bathrooms': sum(u.bathrooms for u in self.units) / self.unit_count,
-            'rent': sum(
-                lease.rent
-                for u in active_units
-                for lease in u.leases
-                if lease.is_active
-            ) / len(active_units)
+            'sqft': float(self.average_sqft),
+            'bedrooms': float(self.average_bedrooms),
+            'bathrooms': float(self.average_bathrooms),
+            'rent': self.active_rent_total / self.active_unit_count if self.active_unit_count else 0.0,
         }
+
+# Unit/lease aggregates as correlated subqueries over the building's rows.
+# They are deferred (and raise if not loaded), so only queries whose schema asks for
+# the stats pay for them, and the cost scales with the page size, not the portfolio.
+def _unit_aggregate(column: ColumnElement[Any], *criteria: ColumnElement[bool]) -> ScalarSelect[Any]:
+    return (
+        select(column)
+        .where(*criteria)
+        .correlate_except(Unit)
+        .scalar_subquery()
+    )
+
+# The building's units, matched on the owner too (it leads the units' (owner_id, building_id, id) index)
+_BUILDING_UNITS = (Unit.owner_id == Building.owner_id, Unit.building_id == Building.id)
+
+def _stat(expression: ColumnElement[Any]) -> ColumnProperty[Any]:
+    return column_property(expression, deferred=True, raiseload=True)
+
+Building.unit_count = _stat(_unit_aggregate(func.count(Unit.id), *_BUILDING_UNITS))
+# Served by the partial index of vacant units, which leads with building_id
+Building.vacant_unit_count = _stat(_unit_aggregate(func.count(Unit.id), Unit.building_id == Building.id, Unit.is_vacant == true()))
+Building.active_unit_count = _stat(_unit_aggregate(func.count(Unit.id), *_BUILDING_UNITS, Unit.is_active == true()))
+Building.average_sqft = _stat(_unit_aggregate(func.coalesce(func.avg(Unit.sqft), 0.0), *_BUILDING_UNITS))
+Building.average_bedrooms = _stat(_unit_aggregate(func.coalesce(func.avg(Unit.bedrooms), 0.0), *_BUILDING_UNITS))
+Building.average_bathrooms = _stat(_unit_aggregate(func.coalesce(func.avg(Unit.bathrooms), 0.0), *_BUILDING_UNITS))
+Building.active_rent_total = _stat(
+    select(func.coalesce(func.sum(Lease.rent), 0.0))
+    .join(Unit, Lease.unit_id == Unit.id)
+    .where(*_BUILDING_UNITS, Unit.is_active == true(), Lease.is_active == true())
+    .correlate_except(Unit, Lease)
+    .scalar_subquery()
+)
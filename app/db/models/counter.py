@@ -0,0 +1,13 @@
+from sqlalchemy import BigInteger, Integer, String, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from db import Base
+
+# Exact per-owner row counts for resource tables, maintained by the resource controllers.
+# A parent_id of 0 holds the owner's total for the table, any other value the count below that parent.
+class RowCounter(Base):
+    __tablename__ = 'row_counters'
+
+    owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'), primary_key=True)
+    table_name: Mapped[str] = mapped_column(String(63), primary_key=True)
+    parent_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    row_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default='0')
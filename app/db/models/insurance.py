@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey, Date, Float
+from sqlalchemy import String, ForeignKey, Date, Float, Index, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from typing import TYPE_CHECKING
 from db import ResourceBase
@@ -8,6 +8,21 @@ if TYPE_CHECKING:
 class Insurance(ResourceBase):
     __tablename__ = 'insurances'
     _resource_parent = 'tenant'
+    _filterable = ResourceBase._filterable + ('provider', 'policy_type', 'policy_number', 'premium', 'effective_date', 'expiration_date', 'tenant_id')
+    _sortable = ResourceBase._sortable + ('policy_number', 'expiration_date')
+    _searchable = ('policy_number', 'provider', 'policy_type')
+    __table_args__ = (
+        Index('ix_insurances_owner_id_id', 'owner_id', 'id'),
+        Index('ix_insurances_owner_id_updated_at_id', 'owner_id', 'updated_at', 'id'),
+        Index('ix_insurances_owner_id_tenant_id_id', 'owner_id', 'tenant_id', 'id', postgresql_include=['policy_number']),
+        Index('ix_insurances_owner_id_expiration_date_id', 'owner_id', 'expiration_date', 'id'),
+        # Active policies per tenant (the insured-tenant check)
+        Index(
+            'ix_insurances_active_tenant_id', 'tenant_id',
+            postgresql_where=text('is_active'), sqlite_where=text('is_active = 1'),
+        ),
+        Index('ix_insurances_expiration_date_brin', 'expiration_date', postgresql_using='brin').ddl_if(dialect='postgresql'),
+    )
 
     provider: Mapped[str] = mapped_column(String, nullable=True)
     policy_type: Mapped[str] = mapped_column(String, nullable=True)  # e.g. Renters, Homeowners, Condo, etc.
@@ -15,10 +30,11 @@ class Insurance(ResourceBase):
     premium: Mapped[float] = mapped_column(Float, nullable=True)
     effective_date: Mapped[Date] = mapped_column(Date, nullable=True)
     expiration_date: Mapped[Date] = mapped_column(Date)
-    tenant_id: Mapped[int] = mapped_column(ForeignKey('tenants.id'), index=True, nullable=False)
+    tenant_id: Mapped[int] = mapped_column(ForeignKey('tenants.id'), nullable=False)
 
     tenant: Mapped['Tenant'] = relationship(
         'Tenant',
         back_populates='insurances',
-        lazy='joined',
+        primaryjoin='and_(Tenant.id == Insurance.tenant_id, Tenant.owner_id == Insurance.owner_id)',
+        lazy='raise',
     )
@@ -1,4 +1,4 @@
-from sqlalchemy import Date, ForeignKey, Float
+from sqlalchemy import Date, ForeignKey, Float, Index, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from typing import TYPE_CHECKING
 from db import ResourceBase
@@ -9,20 +9,40 @@ class Lease(ResourceBase):
     __tablename__ = 'leases'
     _resource_parent = 'unit'
     _resource_child = 'tenant'
+    _filterable = ResourceBase._filterable + ('start_date', 'end_date', 'rent', 'deposit', 'unit_id')
+    _sortable = ResourceBase._sortable + ('start_date', 'end_date', 'rent')
+    _searchable = ('start_date', 'end_date')
+    _search_label = 'Unit {unit.unit_number}: {start_date} to {end_date}'
+    __table_args__ = (
+        Index('ix_leases_owner_id_id', 'owner_id', 'id'),
+        Index('ix_leases_owner_id_updated_at_id', 'owner_id', 'updated_at', 'id'),
+        Index('ix_leases_owner_id_unit_id_id', 'owner_id', 'unit_id', 'id', postgresql_include=['start_date', 'end_date', 'rent']),
+        Index('ix_leases_owner_id_end_date_id', 'owner_id', 'end_date', 'id'),
+        # Active leases per unit, with the rent for the building/property rent totals
+        Index(
+            'ix_leases_active_unit_id_rent', 'unit_id', 'rent',
+            postgresql_where=text('is_active'), sqlite_where=text('is_active = 1'),
+        ),
+        # Date ranges across the whole table (dates roughly follow insertion order)
+        Index('ix_leases_start_date_brin', 'start_date', postgresql_using='brin').ddl_if(dialect='postgresql'),
+        Index('ix_leases_end_date_brin', 'end_date', postgresql_using='brin').ddl_if(dialect='postgresql'),
+    )
 
     start_date: Mapped[Date] = mapped_column(Date)
     end_date: Mapped[Date] = mapped_column(Date)
     rent: Mapped[float] = mapped_column(Float)
     deposit: Mapped[float] = mapped_column(Float, nullable=True)
-    unit_id: Mapped[int] = mapped_column(ForeignKey('units.id'), index=True, nullable=False)
+    unit_id: Mapped[int] = mapped_column(ForeignKey('units.id'), nullable=False)
 
     unit: Mapped['Unit'] = relationship(
         'Unit',
         back_populates='leases',
-        lazy='joined',
+        primaryjoin='and_(Unit.id == Lease.unit_id, Unit.owner_id == Lease.owner_id)',
+        lazy='raise',
     )
     tenants: Mapped[list['Tenant']] = relationship(
         'Tenant',
         back_populates='lease',
-        lazy='selectin',
+        primaryjoin='and_(Lease.id == Tenant.lease_id, Lease.owner_id == Tenant.owner_id)',
+        lazy='raise',
     )
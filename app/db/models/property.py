@@ -1,24 +1,75 @@
-from sqlalchemy import String
+from sqlalchemy import String, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
+from functools import cached_property
 from typing import TYPE_CHECKING
 from db import ResourceBase
 if TYPE_CHECKING:
-    from models import Building
+    from models import Building, PropertySummary
 
 class Property(ResourceBase):
     __tablename__ = 'properties'
     _resource_child = 'building'
+    _filterable = ResourceBase._filterable + ('name', 'address', 'city', 'state', 'zip_code', 'type', 'manager')
+    _sortable = ResourceBase._sortable + ('name', 'city', 'state', 'zip_code', 'type')
+    _searchable = ('name', 'address', 'city', 'state', 'zip_code', 'manager')
+    __table_args__ = (
+        Index('ix_properties_owner_id_id', 'owner_id', 'id', postgresql_include=['name']),
+        Index('ix_properties_owner_id_updated_at_id', 'owner_id', 'updated_at', 'id'),
+        Index('ix_properties_owner_id_name_id', 'owner_id', 'name', 'id'),
+        Index('ix_properties_owner_id_type_id', 'owner_id', 'type', 'id'),
+    )
 
     name: Mapped[str] = mapped_column(String)
     address: Mapped[str] = mapped_column(String)
     city: Mapped[str] = mapped_column(String)
     state: Mapped[str] = mapped_column(String)
     zip_code: Mapped[str] = mapped_column(String)
-    type: Mapped[str] = mapped_column(String, index=True)
+    type: Mapped[str] = mapped_column(String)
     manager: Mapped[str] = mapped_column(String, nullable=True)
 
+    # Stats below are read from the summary row, never from the child tables
+    _loader_dependencies = {
+        name: ('summary',) for name in (
+            'building_count', 'unit_count', 'vacant_unit_count',
+            'active_rent_total', 'average_sqft', 'insured_tenant_ratio',
+        )
+    }
+
     buildings: Mapped[list['Building']] = relationship(
         'Building',
         back_populates='property',
-        lazy='subquery',
+        primaryjoin='and_(Property.id == Building.property_id, Property.owner_id == Building.owner_id)',
+        lazy='raise',
+    )
+    summary: Mapped['PropertySummary | None'] = relationship(
+        'PropertySummary',
+        uselist=False,
+        viewonly=True,
+        lazy='raise',
     )
+
+    @cached_property
+    def building_count(self) -> int:
+        return self.summary.building_count if self.summary else 0
+
+    @cached_property
+    def unit_count(self) -> int:
+        return self.summary.unit_count if self.summary else 0
+
+    @cached_property
+    def vacant_unit_count(self) -> int:
+        return self.summary.vacant_unit_count if self.summary else 0
+
+    @cached_property
+    def active_rent_total(self) -> float:
+        return self.summary.active_rent_total if self.summary else 0.0
+
+    @cached_property
+    def average_sqft(self) -> float:
+        return self.summary.average_sqft if self.summary else 0.0
+
+    @cached_property
+    def insured_tenant_ratio(self) -> float:
+        if not self.summary or not self.summary.tenant_count:
+            return 0.0
+        return self.summary.insured_tenant_count / self.summary.tenant_count
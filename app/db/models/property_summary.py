@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import Integer, Float, ForeignKey, TIMESTAMP, text
+from sqlalchemy.orm import Mapped, mapped_column
+from core import settings
+from db import Base
+
+# Per-property rollup of the rows below it, maintained by the resource controllers (see controllers/summary.py)
+class PropertySummary(Base):
+    __tablename__ = 'property_summaries'
+
+    property_id: Mapped[int] = mapped_column(ForeignKey('properties.id', ondelete='CASCADE'), primary_key=True)
+    owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'), index=True, nullable=False)
+    building_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default='0')
+    unit_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default='0')
+    vacant_unit_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default='0')
+    active_rent_total: Mapped[float] = mapped_column(Float, nullable=False, server_default='0')
+    average_sqft: Mapped[float] = mapped_column(Float, nullable=False, server_default='0')
+    tenant_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default='0')
+    insured_tenant_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default='0')
+    refreshed_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=text(settings.database_timestamp_utc)
+    )
@@ -0,0 +1,41 @@
+from sqlalchemy import DDL, Integer, String, Text, ForeignKey, Index, UniqueConstraint, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column
+from db import Base
+
+# One full-text search document per resource row, maintained by the resource controllers (see controllers/search.py)
+class SearchDocument(Base):
+    __tablename__ = 'search_documents'
+    __table_args__ = (
+        UniqueConstraint('resource', 'resource_id', name='uq_search_documents_resource_resource_id'),
+        Index('ix_search_documents_document', 'document', postgresql_using='gin').ddl_if(dialect='postgresql'),
+        # Every search is owner-scoped: PostgreSQL combines it with the GIN index (BitmapAnd)
+        Index('ix_search_documents_owner_id', 'owner_id'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    resource: Mapped[str] = mapped_column(String, nullable=False)  # e.g. 'tenant'
+    resource_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    parent_id: Mapped[int | None] = mapped_column(Integer, nullable=True)  # Id of the parent resource row (for breadcrumbs)
+    owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
+    label: Mapped[str] = mapped_column(String, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    # Weighted tsvector of label + content on PostgreSQL. Other databases (SQLite) use the FTS5 table below instead.
+    document: Mapped[str | None] = mapped_column(TSVECTOR().with_variant(Text(), 'sqlite'), nullable=True)
+
+# SQLite fallback: an external-content FTS5 index over label/content, kept in sync by triggers
+for statement in (
+    "CREATE VIRTUAL TABLE search_documents_fts USING fts5(label, content, content='search_documents', content_rowid='id')",
+    """CREATE TRIGGER search_documents_ai AFTER INSERT ON search_documents BEGIN
+        INSERT INTO search_documents_fts (rowid, label, content) VALUES (new.id, new.label, new.content);
+    END""",
+    """CREATE TRIGGER search_documents_ad AFTER DELETE ON search_documents BEGIN
+        INSERT INTO search_documents_fts (search_documents_fts, rowid, label, content) VALUES ('delete', old.id, old.label, old.content);
+    END""",
+    """CREATE TRIGGER search_documents_au AFTER UPDATE ON search_documents BEGIN
+        INSERT INTO search_documents_fts (search_documents_fts, rowid, label, content) VALUES ('delete', old.id, old.label, old.content);
+        INSERT INTO search_documents_fts (rowid, label, content) VALUES (new.id, new.label, new.content);
+    END""",
+):
+    event.listen(SearchDocument.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(SearchDocument.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS search_documents_fts').execute_if(dialect='sqlite'))
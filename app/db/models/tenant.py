@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from typing import TYPE_CHECKING
 from db import ResourceBase
@@ -9,19 +9,29 @@ class Tenant(ResourceBase):
     __tablename__ = 'tenants'
     _resource_parent = 'lease'
     _resource_child = 'insurance'
+    _filterable = ResourceBase._filterable + ('name', 'email', 'phone', 'lease_id')
+    _sortable = ResourceBase._sortable + ('name', 'email')
+    _searchable = ('name', 'email', 'phone')
+    __table_args__ = (
+        Index('ix_tenants_owner_id_id', 'owner_id', 'id'),
+        Index('ix_tenants_owner_id_updated_at_id', 'owner_id', 'updated_at', 'id'),
+        Index('ix_tenants_owner_id_lease_id_id', 'owner_id', 'lease_id', 'id', postgresql_include=['name']),
+    )
 
     name: Mapped[str] = mapped_column(String)
     email: Mapped[str] = mapped_column(String)
     phone: Mapped[str] = mapped_column(String)
-    lease_id: Mapped[int] = mapped_column(ForeignKey('leases.id'), index=True, nullable=False)
+    lease_id: Mapped[int] = mapped_column(ForeignKey('leases.id'), nullable=False)
 
     lease: Mapped['Lease'] = relationship(
         'Lease',
         back_populates='tenants',
-        lazy='joined',
+        primaryjoin='and_(Lease.id == Tenant.lease_id, Lease.owner_id == Tenant.owner_id)',
+        lazy='raise',
     )
     insurances: Mapped[list['Insurance']] = relationship(
         'Insurance',
         back_populates='tenant',
-        lazy='selectin',
+        primaryjoin='and_(Tenant.id == Insurance.tenant_id, Tenant.owner_id == Insurance.owner_id)',
+        lazy='raise',
     )
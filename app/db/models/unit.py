@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, ForeignKey, Boolean, Float
+from sqlalchemy import Integer, String, ForeignKey, Boolean, Float, Index, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from typing import TYPE_CHECKING
 from db import ResourceBase
@@ -9,22 +9,38 @@ class Unit(ResourceBase):
     __tablename__ = 'units'
     _resource_parent = 'building'
     _resource_child = 'lease'
+    _filterable = ResourceBase._filterable + ('unit_number', 'floor_number', 'bedrooms', 'bathrooms', 'sqft', 'is_vacant', 'building_id')
+    _sortable = ResourceBase._sortable + ('unit_number', 'floor_number', 'bedrooms', 'bathrooms', 'sqft')
+    _searchable = ('unit_number',)
+    __table_args__ = (
+        Index('ix_units_owner_id_id', 'owner_id', 'id'),
+        Index('ix_units_owner_id_updated_at_id', 'owner_id', 'updated_at', 'id'),
+        Index('ix_units_owner_id_building_id_id', 'owner_id', 'building_id', 'id', postgresql_include=['unit_number', 'is_vacant']),
+        # Vacant units only (usually a small share of the table), by building: serves the building
+        # vacancy stats (Building.vacant_unit_count) and the vacant unit lists of a building
+        Index(
+            'ix_units_vacant_building_id_id', 'building_id', 'id',
+            postgresql_where=text('is_vacant'), sqlite_where=text('is_vacant = 1'),
+        ),
+    )
 
     unit_number: Mapped[int] = mapped_column(String, nullable=False)
     floor_number: Mapped[int] = mapped_column(Integer, nullable=False)
     bedrooms: Mapped[int] = mapped_column(Integer)
     bathrooms: Mapped[float] = mapped_column(Float)
     sqft: Mapped[int] = mapped_column(Integer)
-    is_vacant: Mapped[bool] = mapped_column(Boolean, index=True, nullable=False, server_default='true')
-    building_id: Mapped[int] = mapped_column(ForeignKey('buildings.id'), index=True, nullable=False)
+    is_vacant: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default='true')
+    building_id: Mapped[int] = mapped_column(ForeignKey('buildings.id'), nullable=False)
 
     building: Mapped['Building'] = relationship(
         'Building',
         back_populates='units',
-        lazy='joined',
+        primaryjoin='and_(Building.id == Unit.building_id, Building.owner_id == Unit.owner_id)',
+        lazy='raise',
     )
     leases: Mapped[list['Lease']] = relationship(
         'Lease',
         back_populates='unit',
-        lazy='selectin',
+        primaryjoin='and_(Unit.id == Lease.unit_id, Unit.owner_id == Lease.owner_id)',
+        lazy='raise',
     )
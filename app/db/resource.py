@@ -8,10 +8,43 @@ from .mixins import CommonMixins
 class ResourceBase(CommonMixins, Base):
     __abstract__ = True
 
-    owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'), index=True, nullable=False)
+    # Leads the composite indexes in each model's __table_args__. The parent/child relationships join on the owner
+    # as well as the foreign key, so loading a row's children is served by the children's (owner_id, parent key, id)
+    # index (the foreign keys have no index of their own).
+    owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
 
     _resource_parent: str | None = None
     _resource_child: str | None = None
+    # Columns that index endpoints may filter / sort by (see controllers/filtering.py)
+    _filterable: tuple[str, ...] = ('id', 'is_active', 'is_flagged', 'created_at', 'updated_at')
+    _sortable: tuple[str, ...] = ('id', 'created_at', 'updated_at')
+    # Columns indexed for full-text search, the first one being the result label unless `_search_label` is set
+    # (see controllers/search.py)
+    _searchable: tuple[str, ...] = ()
+    # Template of the search result label, with columns (or columns of the parent, e.g. '{unit.unit_number}') as fields
+    _search_label: str | None = None
+    # Schema field -> relationship paths / deferred columns it needs loaded, for computed properties (see db/loaders.py)
+    _loader_dependencies: dict[str, tuple[str, ...]] = {}
+
+    # Foreign key column pointing at the parent resource (e.g. 'building_id' for units)
+    @classmethod
+    def _resource_parent_key(cls) -> str | None:
+        return f'{cls._resource_parent}_id' if cls._resource_parent else None
+
+    # Model of the parent resource (e.g. Building for units), found through the relationship named after it
+    @classmethod
+    def _resource_parent_model(cls) -> 'type[ResourceBase] | None':
+        return cls.__mapper__.relationships[cls._resource_parent].mapper.class_ if cls._resource_parent else None
+
+    # Model of the child resource (e.g. Unit for buildings), found through the collection relationship to it
+    @classmethod
+    def _resource_child_model(cls) -> 'type[ResourceBase] | None':
+        if not cls._resource_child:
+            return None
+        return next(
+            rel.mapper.class_ for rel in cls.__mapper__.relationships
+            if rel.uselist and rel.mapper.class_.__name__.lower() == cls._resource_child
+        )
 
     @cached_property
     def _resource(self) -> str:
@@ -0,0 +1,164 @@
+'''
+Read-replica routing with read-your-writes stickiness
+
+`RoutingSession` runs everything on the primary (its `bind`), except inside
+`read_only()`. There, plain SELECTs go to one of its `replicas`, round-robin.
+The read-only controller calls (get/list/search/typeahead) wrap their queries
+in it. Writes, flushes, `SELECT ... FOR UPDATE` and anything in a transaction
+that already wrote stay on the primary.
+
+After a session commits a write, the user's reads stick to the primary for
+`postgres_replica_sticky_seconds`. On PostgreSQL they return to the replicas
+earlier once the chosen replica has replayed the primary's WAL position taken
+after the commit. That position is read on the write's own connection, right
+after its COMMIT and before the connection goes back to the pool. Each
+replica's replay position is cached for `postgres_replica_lsn_cache_seconds`,
+so sticky reads do not query the replica each time: until the cached position
+passes the write, they run on the primary. The user is attached to the session
+with `bind_user()`. Stickiness is tracked per process.
+'''
+import time
+from contextlib import contextmanager
+from itertools import count
+from threading import Lock
+from typing import Any, Iterator, Sequence
+from sqlalchemy import Connection, Engine, Select, event, text
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
+from sqlalchemy.pool import QueuePool
+from core import settings
+
+_USER_ID = 'routing_user_id'
+_REPLICA = 'routing_replica'
+_WROTE = 'routing_wrote'
+_CONNECTION = 'routing_connection'
+
+_last_writes: dict[int, tuple[float, int | None]] = {}  # user id -> (monotonic time, primary WAL LSN) of the last write
+_replays: dict[Engine, tuple[float, int | None]] = {}  # replica -> (monotonic time, WAL LSN) of its last replay position read
+_lock = Lock()
+_turns = count()
+
+class RoutingSession(Session):
+    def __init__(self, *args: Any, replicas: Sequence[Engine] = (), **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.replicas = list(replicas)
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Any:
+        replica = self.info.get(_REPLICA)
+        if replica is not None and not self._flushing and isinstance(clause, Select) and clause._for_update_arg is None:
+            return replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    # New session on the same engines, for the same user (e.g. for work that outlives this session)
+    def fork(self) -> 'RoutingSession':
+        session = RoutingSession(bind=self.bind, replicas=self.replicas, autoflush=False)
+        if _USER_ID in self.info:
+            session.info[_USER_ID] = self.info[_USER_ID]
+        return session
+
+# Attach the request's user to the session (used for stickiness after its writes)
+def bind_user(session: Session, user_id: int) -> None:
+    session.info[_USER_ID] = user_id
+
+# A WAL position as an integer (from its 'X/Y' text form)
+def _lsn(value: str | None) -> int | None:
+    if value is None:
+        return None
+    high, low = value.split('/')
+    return int(high, 16) << 32 | int(low, 16)
+
+def _caught_up(replica: Engine, lsn: int | None) -> bool:
+    if lsn is None or replica.dialect.name != 'postgresql':
+        return False
+    with _lock:
+        read_at, replayed = _replays.get(replica, (None, None))
+    if read_at is None or time.monotonic() - read_at >= settings.postgres_replica_lsn_cache_seconds:
+        with replica.connect() as conn:
+            replayed = _lsn(conn.scalar(text('SELECT pg_last_wal_replay_lsn()::text')))
+        with _lock:
+            _replays[replica] = (time.monotonic(), replayed)
+    return replayed is not None and replayed >= lsn
+
+# The replica for a read-only call, or None when it must run on the primary
+def _choose_replica(session: RoutingSession, user_id: int) -> Engine | None:
+    if not session.replicas or session.info.get(_WROTE):
+        return None
+    replica = session.replicas[next(_turns) % len(session.replicas)]
+    with _lock:
+        last_write = _last_writes.get(user_id)
+    if last_write is not None:
+        written_at, lsn = last_write
+        if time.monotonic() - written_at < settings.postgres_replica_sticky_seconds and not _caught_up(replica, lsn):
+            return None
+        with _lock:
+            if _last_writes.get(user_id) == last_write:
+                del _last_writes[user_id]
+    return replica
+
+# Route the plain SELECTs run inside the block to a replica (when the session has any and the user is not sticky)
+@contextmanager
+def read_only(session: Session) -> Iterator[None]:
+    if not isinstance(session, RoutingSession) or _REPLICA in session.info:
+        yield
+        return
+    replica = _choose_replica(session, session.info.get(_USER_ID, 0))
+    if replica is None:
+        yield
+        return
+    session.info[_REPLICA] = replica
+    try:
+        yield
+    finally:
+        session.info.pop(_REPLICA, None)
+
+# Note the write, and keep its primary connection to read the WAL position after COMMIT (the session still holds it then)
+def _note_write(session: Session) -> None:
+    session.info[_WROTE] = True
+    if (_CONNECTION not in session.info and isinstance(session, RoutingSession) and session.replicas
+            and session.info.get(_USER_ID) is not None and session.get_bind().dialect.name == 'postgresql'):
+        session.info[_CONNECTION] = session.connection()
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _note_statement_write(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        _note_write(state.session)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _note_flush_write(session: Session, flush_context: Any) -> None:
+    _note_write(session)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_to_primary(session: Session) -> None:
+    conn: Connection | None = session.info.pop(_CONNECTION, None)
+    if not session.info.pop(_WROTE, False) or not isinstance(session, RoutingSession) or not session.replicas:
+        return
+    user_id = session.info.get(_USER_ID)
+    if user_id is not None:
+        lsn = _lsn(conn.scalar(text('SELECT pg_current_wal_lsn()::text'))) if conn is not None else None
+        with _lock:
+            _last_writes[user_id] = (time.monotonic(), lsn)
+
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def _forget_write(session: Session, previous_transaction: SessionTransaction) -> None:
+    session.info.pop(_WROTE, None)
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _release_write_connection(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_CONNECTION, None)
+
+def clear() -> None:
+    with _lock:
+        _last_writes.clear()
+        _replays.clear()
+
+# Connection pool usage of an engine (QueuePool figures; other pools only report their status line)
+def pool_stats(engine: Engine) -> dict[str, Any]:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {'status': pool.status()}
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+    }
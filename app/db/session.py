@@ -1,23 +1,31 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from core import settings
-from typing import Generator
-
-engine = create_engine(
-    settings.postgres_url,
-    pool_size=settings.postgres_pool_size,
-    max_overflow=settings.postgres_max_overflow,
-    pool_timeout=settings.postgres_pool_timeout,
-    future=settings.sqlalchemy_future,
-    echo=settings.sqlalchemy_echo,
-    pool_pre_ping=True,  # Ensure that connections are alive
-)
+from typing import Any, AsyncGenerator, Generator
+from .routing import RoutingSession, pool_stats as engine_pool_stats
+
+def _create_engine(url: str) -> Engine:
+    return create_engine(
+        url,
+        pool_size=settings.postgres_pool_size,
+        max_overflow=settings.postgres_max_overflow,
+        pool_timeout=settings.postgres_pool_timeout,
+        future=settings.sqlalchemy_future,
+        echo=settings.sqlalchemy_echo,
+        pool_pre_ping=True,  # Ensure that connections are alive
+    )
+
+engine = _create_engine(settings.postgres_url)
+replica_engines = [_create_engine(url) for url in settings.postgres_replica_urls]
 
-# Create database session factory
+# Create database session factory (read-only controller calls go to the replicas, if any: see db.routing)
 SessionLocal = sessionmaker(
+    class_=RoutingSession,
     autocommit=False,
     autoflush=False,
     bind=engine,
+    replicas=replica_engines,
 )
 
 # Create new database session
@@ -27,3 +35,42 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+# Async engines for the routers running on the event loop (same URLs: psycopg provides both drivers).
+# They have their own pools, sized like the sync ones.
+def _create_async_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        pool_size=settings.postgres_pool_size,
+        max_overflow=settings.postgres_max_overflow,
+        pool_timeout=settings.postgres_pool_timeout,
+        echo=settings.sqlalchemy_echo,
+        pool_pre_ping=True,
+    )
+
+async_engine = _create_async_engine(settings.postgres_url)
+async_replica_engines = [_create_async_engine(url) for url in settings.postgres_replica_urls]
+
+# Rows are not expired on commit: reloading them lazily would need IO outside of an awaited call
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=async_engine,
+    replicas=[replica.sync_engine for replica in async_replica_engines],
+)
+
+# Create new async database session
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Connection pool usage of every engine, by role
+def pool_stats() -> dict[str, dict[str, Any]]:
+    engines = {
+        'primary': engine,
+        **{f'replica_{i}': replica for i, replica in enumerate(replica_engines)},
+        'async_primary': async_engine.sync_engine,
+        **{f'async_replica_{i}': replica.sync_engine for i, replica in enumerate(async_replica_engines)},
+    }
+    return {name: engine_pool_stats(pooled) for name, pooled in engines.items()}
@@ -24,6 +24,13 @@ __all__ = [
 
 # Resolve forward references (while avoiding circular imports)
 resource.BaseResourceModel.model_rebuild()
+BuildingSchema.Read.model_rebuild()
+BuildingSchema.ReadWithStats.model_rebuild()
+PropertySchema.ReadWithStats.model_rebuild()
+UnitSchema.Read.model_rebuild()
+LeaseSchema.Read.model_rebuild()
+TenantSchema.Read.model_rebuild()
+InsuranceSchema.Read.model_rebuild()
 PropertySchema.ReadFull.model_rebuild()
 BuildingSchema.ReadFull.model_rebuild()
 UnitSchema.ReadFull.model_rebuild()
@@ -31,3 +38,4 @@ LeaseSchema.ReadFull.model_rebuild()
 TenantSchema.ReadFull.model_rebuild()
 InsuranceSchema.ReadFull.model_rebuild()
 RequestSchema.RequestContext.model_rebuild()
+RequestSchema.AsyncRequestContext.model_rebuild()
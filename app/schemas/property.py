@@ -31,5 +31,13 @@ class Update(make_partial_model(Base)):
 class Read(Base):
     pass
 
+class ReadWithStats(Read):
+    building_count: int = 0
+    unit_count: int = 0
+    vacant_unit_count: int = 0
+    active_rent_total: float = 0.0
+    average_sqft: float = 0.0
+    insured_tenant_ratio: float = 0.0
+
 class ReadFull(Read):
     buildings: list['BuildingSchema.Read'] = Field(default_factory=list)
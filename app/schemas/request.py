@@ -1,13 +1,13 @@
 from pydantic import ConfigDict, BaseModel as PydanticBaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import TYPE_CHECKING, Any, Sequence
+from typing import TYPE_CHECKING, Any, Generic, Literal, NamedTuple, Sequence, TypeVar
 from .base import BaseModelConfig
 if TYPE_CHECKING:
     from schemas import UserSchema
 
-class RequestContext(PydanticBaseModel):
-    current_user: 'UserSchema.Read | None'
-    db: Session
+class UserContext(PydanticBaseModel):
+    current_user: 'UserSchema.Read | UserSchema.Identity | None'
 
     def get_user_id(self) -> int:
         return self.current_user.id if self.current_user and self.current_user.id else 0
@@ -22,10 +22,73 @@ class RequestContext(PydanticBaseModel):
         arbitrary_types_allowed=True,
     )
 
-class AllResults(BaseModelConfig):
-    rows: Sequence[Any]
+class RequestContext(UserContext):
+    db: Session
+
+# Context of the routers running on the event loop (see controllers.async_base)
+class AsyncRequestContext(UserContext):
+    db: AsyncSession
+
+    # Same user, with the sync Session that `AsyncSession.run_sync` hands to its callable
+    def bind(self, db: Session) -> RequestContext:
+        return RequestContext(db=db, current_user=self.current_user)
+
+# How rowCount is computed for paginated results: exactly, or from the query planner's estimate
+CountMode = Literal['exact', 'estimate']
+
+# Encoding of the export endpoints: one JSON object per line, or CSV with a header row
+ExportFormat = Literal['ndjson', 'csv']
+
+# One `filter[field][op]=value` query parameter (op defaults to 'eq')
+class FilterParam(NamedTuple):
+    field: str
+    op: str
+    value: str
+
+# Type of the rows: unparametrized results hold any rows (e.g. ORM rows from the controllers),
+# `PaginatedResults[UnitSchema.Read]` validates and serializes them with that schema
+R = TypeVar('R')
+
+class AllResults(BaseModelConfig, Generic[R]):
+    rows: Sequence[R]
     rowCount: int
+    rowCountExact: bool = True  # False when rowCount is the planner's estimate
 
-class PaginatedResults(AllResults):
+class PaginatedResults(AllResults[R], Generic[R]):
     pageStart: int
     pageEnd: int
+    nextCursor: str | None = None  # Opaque keyset cursor for the following page (None on the last page)
+    prevCursor: str | None = None  # Opaque keyset cursor for the preceding page (None on the first page)
+
+class BatchResults(BaseModelConfig):
+    rows: Sequence[Any]  # In the order the ids were requested
+    missing: list[int]   # Requested ids that do not exist (or belong to another owner)
+
+class BulkRowError(BaseModelConfig):
+    index: int          # Position of the row in the request body
+    errors: list[str]   # e.g. 'sqft: Input should be a valid integer'
+
+class BulkResults(BaseModelConfig):
+    ids: list[int | None]     # Id of each row in request order (None for rows that failed)
+    count: int                # Number of rows written
+    errors: list[BulkRowError] = []
+
+class BulkUpdateResults(BulkResults):
+    rows: Sequence[Any] = []  # Updated rows (as returned by the UPDATE), in request order
+
+class SubtreeResults(BaseModelConfig):
+    id: int                 # Root of the subtree
+    archived: bool          # True when the rows were soft-deleted (is_active = false)
+    counts: dict[str, int]  # Rows affected per table, from the root down
+
+class SearchCrumb(BaseModelConfig):
+    resource: str  # e.g. 'building'
+    id: int
+    label: str
+
+class SearchHit(SearchCrumb):
+    rank: float                    # Higher is a better match
+    breadcrumb: list[SearchCrumb]  # Ancestors of the row, from the property down
+
+class SearchResults(BaseModelConfig):
+    rows: list[SearchHit]  # Best matches first
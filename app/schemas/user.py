@@ -1,23 +1,27 @@
-from pydantic import EmailStr, Field, field_validator
+from pydantic import EmailStr, Field
 from typing import Annotated
-from core import security
-from .base import BaseModel
+from .base import BaseModel, BaseModelConfig
 from .utils.partial_models import make_partial_model
 
+# The password of Create/Update is plain text: UserController hashes it when it is written,
+# so validating a Read (e.g. of the authenticated user) never runs bcrypt
 class Base(BaseModel):
     name: str
     email: EmailStr
     password: Annotated[str, Field(min_length=8)]
 
-    @field_validator('password')
-    def hashed_password(cls, password: str) -> str:
-        return security.get_password_hash(password)
-
 class Create(Base):
     pass
 
 class Update(make_partial_model(Base)):
     pass
 
+# `password` holds the stored hash
 class Read(Base):
     password: Annotated[str, Field(exclude=True)]
+
+# Identity carried by the access token claims (what the request context needs, without a user lookup)
+class Identity(BaseModelConfig):
+    id: int
+    email: EmailStr
+    is_active: bool = True
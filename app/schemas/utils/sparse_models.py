@@ -0,0 +1,75 @@
+import types
+from functools import lru_cache
+from typing import Any, ClassVar, Iterable, Type, Union, get_args, get_origin
+from pydantic import BaseModel as PydanticBaseModel, create_model
+from core import settings
+from schemas.base import BaseModelConfig
+
+# Base of the generated subset schemas. The loaders (db/loaders.py) select only the columns their fields need.
+class SparseModel(BaseModelConfig):
+    load_only_fields: ClassVar[bool] = True
+
+# Replace the schema class inside `annotation` (X, list[X], X | None...) with `replacement`
+def _replace_nested(annotation: Any, replacement: Type[PydanticBaseModel]) -> Any:
+    if isinstance(annotation, type) and issubclass(annotation, PydanticBaseModel):
+        return replacement
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin in (Union, types.UnionType):
+        return Union[tuple(_replace_nested(arg, replacement) for arg in args)]
+    if origin in (list, tuple, set):
+        return origin[tuple(_replace_nested(arg, replacement) for arg in args)]
+    return annotation
+
+def _nested_schema(annotation: Any) -> Type[PydanticBaseModel] | None:
+    if isinstance(annotation, type) and issubclass(annotation, PydanticBaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        if (nested := _nested_schema(arg)) is not None:
+            return nested
+    return None
+
+# Bounded: every distinct field set a client sends is a new class (and a new key in the caches keyed by schema)
+@lru_cache(maxsize=settings.api_schema_cache_max_entries)
+def _sparse_model(model: Type[PydanticBaseModel], fields: tuple[str, ...]) -> Type[SparseModel]:
+    # field -> paths requested below it ('building.name' -> 'building': ['name']), None for the whole field
+    requested: dict[str, list[str] | None] = {}
+    for path in fields:
+        head, _, rest = path.partition('.')
+        below = requested.setdefault(head, [])
+        if not rest:
+            requested[head] = None
+        elif below is not None:
+            below.append(rest)
+
+    definitions: dict[str, Any] = {}
+    for name, paths in requested.items():
+        field = model.model_fields[name]
+        annotation = field.annotation
+        if paths:
+            nested = _nested_schema(annotation)
+            assert nested is not None  # Checked by make_sparse_model
+            nested_paths = {*paths, 'id'} if 'id' in nested.model_fields else set(paths)
+            annotation = _replace_nested(annotation, _sparse_model(nested, tuple(sorted(nested_paths))))
+        definitions[name] = (annotation, field)
+    return create_model(f'Sparse{model.__name__}', __base__=SparseModel, __module__=model.__module__, **definitions)
+
+def _check_path(model: Type[PydanticBaseModel], path: str) -> None:
+    head, _, rest = path.partition('.')
+    if head not in model.model_fields:
+        raise ValueError(f"Unknown field '{head}' (available: {', '.join(model.model_fields)})")
+    if rest:
+        nested = _nested_schema(model.model_fields[head].annotation)
+        if nested is None:
+            raise ValueError(f"Field '{head}' has no nested fields")
+        _check_path(nested, rest)
+
+# Schema with only the requested fields of `model` (plus 'id'), e.g. ('name', 'building.name').
+# A nested field keeps its whole nested schema unless subfields are named. Raises ValueError for unknown fields.
+def make_sparse_model(model: Type[PydanticBaseModel], fields: Iterable[str]) -> Type[SparseModel]:
+    paths = {path.strip() for path in fields if path.strip()}
+    if 'id' in model.model_fields:
+        paths.add('id')
+    for path in paths:
+        _check_path(model, path)
+    # Generated once per distinct field set
+    return _sparse_model(model, tuple(sorted(paths)))
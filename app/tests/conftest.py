@@ -0,0 +1,142 @@
+from datetime import date
+from typing import Any, Callable, Generator
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool, StaticPool
+from controllers import counter, search, summary
+from core import settings
+from db import Base
+from db.models import User, Property, Building, Unit, Lease, Tenant, Insurance
+from schemas import UserSchema
+from schemas.request import AsyncRequestContext, RequestContext
+
+# Shared fixtures for tests that run against an in-memory SQLite database
+
+@pytest.fixture
+def sqlite_engine() -> Generator[Engine, None, None]:
+    engine = create_engine(
+        'sqlite://',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,  # Share the single in-memory connection
+    )
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+@pytest.fixture
+def sqlite_db(sqlite_engine: Engine) -> Generator[Session, None, None]:
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sqlite_engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Tests of PostgreSQL-only behavior (planner estimates, row locks) run against the PostgreSQL test database,
+# and are skipped when it is not reachable
+@pytest.fixture
+def postgres_engine() -> Generator[Engine, None, None]:
+    engine = create_engine(settings.postgres_test_url, poolclass=NullPool)
+    try:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+    except (OSError, OperationalError) as exc:
+        engine.dispose()
+        pytest.skip(f'PostgreSQL test database not available: {exc}')
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+def make_user(db: Session, email: str = 'owner@example.com') -> User:
+    user = User(name='Owner', email=email, password='not-a-real-hash')
+    db.add(user)
+    db.commit()
+    return user
+
+def make_context(db: Session, user: User) -> RequestContext:
+    return RequestContext(db=db, current_user=UserSchema.Read.model_construct(
+        id=user.id, name=user.name, email=user.email, password=user.password, is_active=user.is_active,
+    ))
+
+@pytest.fixture
+def owner(sqlite_db: Session) -> User:
+    return make_user(sqlite_db)
+
+@pytest.fixture
+def context(sqlite_db: Session, owner: User) -> RequestContext:
+    return make_context(sqlite_db, owner)
+
+# Stands in for the AsyncSession of the async routers: SQLite has no async driver here, so `run_sync` runs the
+# operation on the test session (the async path itself is covered against PostgreSQL in test_async)
+class SyncSessionRunner:
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def run_sync(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return fn(self.db, *args, **kwargs)
+
+# API client authenticated as `owner`, sharing the test session
+@pytest.fixture
+def api_client(context: RequestContext) -> Generator[TestClient, None, None]:
+    from main import app
+    from app.api.v1.deps import get_async_request_context, get_request_context
+    app.dependency_overrides[get_request_context] = lambda: context
+    app.dependency_overrides[get_async_request_context] = lambda: AsyncRequestContext.model_construct(
+        db=SyncSessionRunner(context.db), current_user=context.current_user,
+    )
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+# Insert a full Property -> Building -> Unit(s) -> Lease -> Tenant -> Insurance chain
+def make_portfolio(db: Session, owner_id: int, units: int = 1, **unit_fields: Any) -> dict[str, Any]:
+    property_ = Property(
+        owner_id=owner_id, name='Property', address='1 Main St', city='Springfield',
+        state='IL', zip_code='62701', type='residential',
+    )
+    db.add(property_)
+    db.flush()
+    building = Building(owner_id=owner_id, name='Building', floor_count=3, property_id=property_.id)
+    db.add(building)
+    db.flush()
+    unit_rows = [
+        Unit(
+            owner_id=owner_id, building_id=building.id,
+            **{'unit_number': str(100 + i), 'floor_number': 1, 'bedrooms': 1 + i % 3,
+               'bathrooms': 1.0, 'sqft': 500 + i, 'is_vacant': True, **unit_fields},
+        )
+        for i in range(units)
+    ]
+    db.add_all(unit_rows)
+    db.flush()
+    lease = Lease(
+        owner_id=owner_id, unit_id=unit_rows[0].id, rent=1000.0,
+        start_date=date(2024, 1, 1), end_date=date(2024, 12, 31),
+    )
+    db.add(lease)
+    db.flush()
+    tenant = Tenant(owner_id=owner_id, lease_id=lease.id, name='Tenant', email='tenant@example.com', phone='555')
+    db.add(tenant)
+    db.flush()
+    insurance = Insurance(
+        owner_id=owner_id, tenant_id=tenant.id, policy_number='P-1', expiration_date=date(2025, 1, 1),
+    )
+    db.add(insurance)
+    db.commit()
+    # Rows were inserted directly, bypassing the controllers
+    counter.rebuild(db, owner_id=owner_id)
+    summary.rebuild(db, owner_id=owner_id)
+    search.rebuild(db, owner_id=owner_id)
+    return {
+        'property': property_, 'building': building, 'units': unit_rows,
+        'lease': lease, 'tenant': tenant, 'insurance': insurance,
+    }
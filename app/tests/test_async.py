@@ -0,0 +1,89 @@
+from typing import AsyncGenerator
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from controllers import PropertyController, async_base, search
+from core import settings
+from db import Base
+from db.models import Property, User
+from schemas import PropertySchema, UserSchema
+from schemas.request import AsyncRequestContext
+
+# The async path needs an async driver: these tests run against the PostgreSQL test database (skipped when it is not reachable)
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return 'asyncio'
+
+@pytest.fixture
+async def async_engine() -> AsyncGenerator[AsyncEngine, None]:
+    engine = create_async_engine(settings.postgres_test_url, poolclass=NullPool)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+    except (OSError, OperationalError) as exc:
+        await engine.dispose()
+        pytest.skip(f'PostgreSQL test database not available: {exc}')
+    try:
+        yield engine
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+@pytest.fixture
+async def async_context(async_engine: AsyncEngine) -> AsyncGenerator[AsyncRequestContext, None]:
+    async with async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)() as db:
+        user = User(name='Owner', email='owner@example.com', password='not-a-real-hash')
+        db.add(user)
+        await db.commit()
+        yield AsyncRequestContext(db=db, current_user=UserSchema.Read.model_construct(
+            id=user.id, name=user.name, email=user.email, password=user.password, is_active=user.is_active,
+        ))
+
+def property_schema(context: AsyncRequestContext, name: str) -> PropertySchema.Create:
+    return PropertySchema.Create(
+        owner_id=context.get_user_id(), name=name, address='1 Main St', city='Springfield',
+        state='IL', zip_code='62701', type='residential', manager=None,
+    )
+
+@pytest.mark.anyio
+async def test_async_operations(async_context: AsyncRequestContext):
+    created = await async_base.create_and_commit(
+        context=async_context, model=Property, schema=property_schema(async_context, 'Elm Court'),
+        parent_key=None, parent_value=None, read_schema=PropertySchema.Read,
+    )
+    assert created is not None and created.name == 'Elm Court'
+    await async_base.run(async_context, PropertyController.create_and_commit, schema=property_schema(async_context, 'Oak Plaza'))
+
+    page = await async_base.get_all(context=async_context, model=Property, limit=1)
+    assert (page.rowCount, len(page.rows), page.nextCursor is not None) == (2, 1, True)
+    assert await async_base.exists_where(context=async_context, model=Property, key='name', val='Oak Plaza')
+    hits = await async_base.run(async_context, search.search, q='oak')
+    assert [hit.label for hit in hits.rows] == ['Oak Plaza']
+
+    updated = await async_base.update_and_commit(
+        context=async_context, model=Property, schema=PropertySchema.Update(name='Elm Court West'), id=created.id,
+    )
+    assert updated is not None and updated.name == 'Elm Court West'
+    results = await async_base.delete_subtree_and_commit(context=async_context, model=Property, id=created.id)
+    assert results is not None and results.counts['properties'] == 1
+    assert await async_base.get_by_id(context=async_context, model=Property, id=created.id) is None
+
+@pytest.mark.anyio
+async def test_async_endpoints(async_context: AsyncRequestContext):
+    from main import app
+    from app.api.v1.deps import get_async_request_context
+    await async_base.run(async_context, PropertyController.create_and_commit, schema=property_schema(async_context, 'Elm Court'))
+    app.dependency_overrides[get_async_request_context] = lambda: async_context
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as client:
+            response = await client.get('/api/v1/properties/')
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert [row['name'] for row in response.json()['rows']] == ['Elm Court']
@@ -0,0 +1,39 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from core import settings
+from core.exceptions import InvalidQueryError
+from controllers import UnitController
+from schemas.request import RequestContext
+from .conftest import make_context, make_portfolio, make_user
+
+def test_get_by_ids_keeps_order_and_reports_missing(sqlite_db: Session, context: RequestContext):
+    units = make_portfolio(sqlite_db, context.get_user_id(), units=4)['units']
+    ids = [units[2].id, 9999, units[0].id, units[2].id]
+    results = UnitController.get_by_ids(context=context, ids=ids)
+    assert [u.id for u in results.rows] == [units[2].id, units[0].id]
+    assert results.missing == [9999]
+
+def test_get_by_ids_is_owner_scoped(sqlite_db: Session, context: RequestContext):
+    units = make_portfolio(sqlite_db, context.get_user_id(), units=2)['units']
+    ids = [u.id for u in units]
+    other = make_context(sqlite_db, make_user(sqlite_db, email='other@example.com'))
+    results = UnitController.get_by_ids(context=other, ids=ids)
+    assert results.rows == []
+    assert results.missing == ids
+
+def test_get_by_ids_limit(context: RequestContext):
+    with pytest.raises(InvalidQueryError):
+        UnitController.get_by_ids(context=context, ids=range(settings.api_batch_max_size + 1))
+
+def test_batch_endpoint(sqlite_db: Session, context: RequestContext, api_client: TestClient):
+    units = make_portfolio(sqlite_db, context.get_user_id(), units=3)['units']
+    ids = [units[1].id, units[0].id]
+    response = api_client.get('/api/v1/units/batch', params={'ids': f'{ids[0]},{ids[1]},12345'})
+    assert response.status_code == 200
+    body = response.json()
+    assert [row['id'] for row in body['rows']] == ids
+    assert body['rows'][0]['building']['unit_count'] == 3
+    assert body['missing'] == [12345]
+
+    assert api_client.get('/api/v1/units/batch', params={'ids': '1,x'}).status_code == 400
@@ -0,0 +1,75 @@
+from datetime import date
+from typing import Any
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from controllers import BuildingController
+from db.models import Lease
+from schemas import BuildingSchema
+from schemas.request import RequestContext
+from .conftest import make_portfolio
+
+def test_stats_computed_in_sql(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=4)
+    units = portfolio['units']
+    units[1].is_vacant = False
+    units[3].is_active = False
+    sqlite_db.add(Lease(
+        owner_id=context.get_user_id(), unit_id=units[1].id, rent=2000.0,
+        start_date=date(2024, 1, 1), end_date=date(2024, 12, 31),
+    ))
+    sqlite_db.add(Lease(
+        owner_id=context.get_user_id(), unit_id=units[3].id, rent=9999.0,  # Inactive unit, ignored
+        start_date=date(2024, 1, 1), end_date=date(2024, 12, 31),
+    ))
+    sqlite_db.commit()
+    building_id = portfolio['building'].id
+    sqlite_db.expunge_all()
+
+    building = BuildingController.get_by_id(
+        context=context, id=building_id, read_schema=BuildingSchema.ReadWithStats,
+    )
+    stats = BuildingSchema.ReadWithStats.model_validate(building)
+
+    assert stats.unit_count == 4
+    assert stats.vacancy == {'units': 3, 'rate': 0.75}
+    assert stats.occupancy == {'units': 1, 'rate': 0.25}
+    assert stats.average_stats == {
+        'sqft': 501.5,
+        'bedrooms': 1.75,
+        'bathrooms': 1.0,
+        'rent': 1000.0,  # (1000 + 2000) / 3 active units
+    }
+
+def test_empty_building_stats(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=1)
+    for row in (portfolio['insurance'], portfolio['tenant'], portfolio['lease'], portfolio['units'][0]):
+        sqlite_db.delete(row)
+    sqlite_db.commit()
+    building_id = portfolio['building'].id
+    sqlite_db.expunge_all()
+
+    building = BuildingController.get_by_id(
+        context=context, id=building_id, read_schema=BuildingSchema.ReadWithStats,
+    )
+    stats = BuildingSchema.ReadWithStats.model_validate(building)
+    assert stats.unit_count == 0
+    assert stats.vacancy == {'units': 0, 'rate': 0.0}
+    assert stats.average_stats['rent'] == 0.0
+
+def test_page_stats_do_not_load_units(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=50)
+    sqlite_db.expunge_all()
+    statements: list[str] = []
+    def capture(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    event.listen(sqlite_db.get_bind(), 'before_cursor_execute', capture)
+    try:
+        page = BuildingController.get_all(context=context, read_schema=BuildingSchema.ReadWithStats)
+        rows = [BuildingSchema.ReadWithStats.model_validate(row) for row in page.rows]
+    finally:
+        event.remove(sqlite_db.get_bind(), 'before_cursor_execute', capture)
+
+    assert rows[0].unit_count == 50
+    assert rows[0].vacancy['units'] == 50
+    assert len(statements) == 1  # Stats ride along with the page query as subqueries
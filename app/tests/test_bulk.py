@@ -0,0 +1,156 @@
+from typing import Any
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from controllers import UnitController, PropertyController, counter, search
+from db.models import Unit, Building, PropertySummary
+from schemas import PropertySchema, UnitSchema
+from schemas.request import RequestContext
+from .conftest import make_context, make_portfolio, make_user
+
+def unit_row(number: int, **fields: Any) -> dict[str, Any]:
+    return {'unit_number': str(number), 'floor_number': 1, 'bedrooms': 2, 'bathrooms': 1.0, 'sqft': 600, **fields}
+
+def unit_create(context: RequestContext, number: int, building_id: int, **fields: Any) -> UnitSchema.Create:
+    return UnitSchema.Create(**unit_row(number, **{'owner_id': context.get_user_id(), 'building_id': building_id, **fields}))
+
+def test_bulk_create_in_one_transaction(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=1)
+    building_id = portfolio['building'].id
+    property_id = portfolio['property'].id
+    commits: list[Any] = []
+    def on_commit(session: Session) -> None:
+        commits.append(session)
+
+    event.listen(sqlite_db, 'after_commit', on_commit)
+    try:
+        results = UnitController.bulk_create_and_commit(
+            context=context, rows=[unit_create(context, 200 + i, building_id) for i in range(50)], parent_id=building_id,
+        )
+    finally:
+        event.remove(sqlite_db, 'after_commit', on_commit)
+
+    assert results.count == 50
+    assert results.errors == []
+    assert len(commits) == 1
+    numbers = dict(sqlite_db.execute(select(Unit.id, Unit.unit_number).where(Unit.id.in_(results.ids))).tuples().all())
+    assert [numbers[id] for id in results.ids] == [str(200 + i) for i in range(50)]  # type: ignore
+    assert counter.get_count(sqlite_db, Unit, context.get_user_id(), building_id) == 51
+    assert sqlite_db.get(PropertySummary, property_id).unit_count == 51  # type: ignore
+
+def test_bulk_create_reports_errors_per_row(sqlite_db: Session, context: RequestContext):
+    building_id = make_portfolio(sqlite_db, context.get_user_id(), units=1)['building'].id
+    other = make_user(sqlite_db, email='other@example.com')
+    foreign_building = make_portfolio(sqlite_db, other.id, units=1)['building'].id
+
+    results = UnitController.bulk_create_and_commit(context=context, rows=[
+        unit_create(context, 1, building_id),
+        unit_create(context, 3, foreign_building),
+        unit_create(context, 4, building_id, owner_id=other.id),  # The owner is set server-side
+    ])
+
+    assert results.count == 2
+    assert results.ids[1] is None
+    assert [error.index for error in results.errors] == [1]
+    assert 'not found' in results.errors[0].errors[0]
+    inserted = sqlite_db.scalars(select(Unit).where(Unit.id.in_([results.ids[0], results.ids[2]]))).all()
+    assert {unit.owner_id for unit in inserted} == {context.get_user_id()}
+    assert sqlite_db.scalar(select(func.count()).select_from(Unit).where(Unit.building_id == foreign_building)) == 1
+
+def test_bulk_create_root_resource(sqlite_db: Session, context: RequestContext):
+    rows = [
+        PropertySchema.Create(
+            owner_id=context.get_user_id(), name=f'P{i}', address=f'{i} Main St', city='springfield', state='IL',
+            zip_code='62701', type='Residential', manager=None,
+        )
+        for i in range(3)
+    ]
+    results = PropertyController.bulk_create_and_commit(context=context, rows=rows)
+    assert results.count == 3
+    assert sqlite_db.scalar(select(func.count()).select_from(PropertySummary)) == 3
+
+def test_bulk_endpoint(sqlite_db: Session, context: RequestContext, api_client: TestClient):
+    building_id = make_portfolio(sqlite_db, context.get_user_id(), units=1)['building'].id
+    response = api_client.post(f'/api/v1/units/bulk?building_id={building_id}', json=[
+        unit_row(7, owner_id=0, building_id=building_id), unit_row(8, owner_id=0, building_id=0),
+    ])
+    assert response.status_code == 200
+    assert response.json()['count'] == 2
+    assert counter.get_count(sqlite_db, Unit, context.get_user_id(), building_id) == 3
+
+    # Rows are validated with the Create schema before anything is written
+    invalid = api_client.post('/api/v1/units/bulk', json=[unit_row(9, owner_id=0, building_id=building_id), {'unit_number': '10'}])
+    assert invalid.status_code == 422
+    assert invalid.json()['detail'][0]['loc'][:2] == ['body', 1]
+    assert counter.get_count(sqlite_db, Unit, context.get_user_id(), building_id) == 3
+
+    other_context = make_context(sqlite_db, make_user(sqlite_db, email='other@example.com'))
+    assert UnitController.bulk_create_and_commit(context=other_context, rows=[unit_create(other_context, 9, building_id)], parent_id=building_id).count == 0
+    assert sqlite_db.get(Building, building_id) is not None
+
+def test_bulk_create_rolls_back_on_database_errors(sqlite_db: Session, context: RequestContext, monkeypatch: pytest.MonkeyPatch):
+    building_id = make_portfolio(sqlite_db, context.get_user_id(), units=1)['building'].id
+    def fail(*args: Any, **kwargs: Any) -> None:
+        raise OperationalError('INSERT', {}, Exception('database is locked'))
+    monkeypatch.setattr(search, 'refresh', fail)
+
+    results = UnitController.bulk_create_and_commit(context=context, rows=[unit_create(context, 7, building_id)], parent_id=building_id)
+
+    assert (results.ids, [error.index for error in results.errors]) == ([None], [0])
+    assert sqlite_db.scalar(select(func.count()).select_from(Unit)) == 1
+    assert counter.get_count(sqlite_db, Unit, context.get_user_id(), building_id) == 1
+
+def test_bulk_update_groups_by_column_set(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=6)
+    ids = [unit.id for unit in portfolio['units']]
+    property_id = portfolio['property'].id
+    statements: list[str] = []
+    def capture(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    event.listen(sqlite_db.get_bind(), 'before_cursor_execute', capture)
+    try:
+        results = UnitController.bulk_update_and_commit(context=context, rows=[
+            *({'id': id, 'is_vacant': False} for id in ids[:4]),
+            {'id': ids[4], 'is_flagged': True, 'notes': 'Leak'},
+            {'id': ids[5], 'building_id': 999, 'sqft': 900},  # Foreign key is ignored
+        ])
+    finally:
+        event.remove(sqlite_db.get_bind(), 'before_cursor_execute', capture)
+
+    assert results.count == 6
+    assert results.errors == []
+    assert [row.id for row in results.rows] == ids
+    assert sum(s.lstrip().upper().startswith('UPDATE UNITS') for s in statements) == 3
+    assert results.rows[0].is_vacant is False
+    assert results.rows[4].notes == 'Leak'
+    assert results.rows[5].sqft == 900 and results.rows[5].building_id == portfolio['building'].id
+    assert sqlite_db.get(PropertySummary, property_id).vacant_unit_count == 2  # type: ignore
+
+def test_bulk_update_reports_errors_per_row(sqlite_db: Session, context: RequestContext):
+    units = make_portfolio(sqlite_db, context.get_user_id(), units=2)['units']
+    ids = [unit.id for unit in units]
+    foreign_unit = make_portfolio(sqlite_db, make_user(sqlite_db, email='other@example.com').id, units=1)['units'][0]
+
+    results = UnitController.bulk_update_and_commit(context=context, rows=[
+        {'id': ids[0], 'sqft': 'huge'},
+        {'sqft': 700},
+        {'id': foreign_unit.id, 'sqft': 1},
+        {'id': ids[1], 'sqft': 750},
+        {'id': ids[1], 'sqft': 760},
+        {'id': ids[0]},
+    ])
+
+    assert results.ids == [None, None, None, ids[1], None, None]
+    assert [error.index for error in results.errors] == [0, 1, 2, 4, 5]
+    assert 'not found' in results.errors[2].errors[0]
+    sqlite_db.refresh(foreign_unit)
+    assert foreign_unit.sqft != 1
+
+def test_bulk_update_endpoint(sqlite_db: Session, context: RequestContext, api_client: TestClient):
+    unit_id = make_portfolio(sqlite_db, context.get_user_id(), units=1)['units'][0].id
+    response = api_client.patch('/api/v1/units/bulk', json=[{'id': unit_id, 'is_vacant': False}])
+    assert response.status_code == 200
+    assert response.json()['rows'][0]['is_vacant'] is False
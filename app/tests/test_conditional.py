@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from fastapi import Request, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.api.v1.deps import not_modified
+from controllers import PropertyController, UnitController
+from controllers.versions import Version
+from db.models import Building, Unit
+from schemas import PropertySchema
+from schemas.request import RequestContext
+from .conftest import make_portfolio
+from .test_sparse_fields import selects
+
+def touch(db: Session, model: type, id: int) -> None:
+    # Stands in for the updated_at trigger (SQLite timestamps only have a one-second resolution)
+    db.execute(update(model).where(model.id == id).values(updated_at=datetime.now(timezone.utc) + timedelta(minutes=1)))
+    db.commit()
+
+def test_unchanged_list_short_circuits(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=3)
+
+    first = api_client.get('/api/v1/units/')
+    assert first.status_code == 200 and first.headers['etag'].startswith('W/"')
+    assert 'last-modified' in first.headers
+
+    response, statements = selects(sqlite_db, lambda: api_client.get('/api/v1/units/', headers={'If-None-Match': first.headers['etag']}))
+
+    assert response.status_code == 304 and response.content == b''
+    assert response.headers['etag'] == first.headers['etag']
+    assert len(statements) == 1  # Only the probe: no row was loaded
+
+def test_list_etag_follows_changes(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=2)
+    etag = api_client.get('/api/v1/units/').headers['etag']
+
+    touch(sqlite_db, Building, portfolio['building'].id)  # Units embed their building
+    assert api_client.get('/api/v1/units/', headers={'If-None-Match': etag}).status_code == 200
+
+    etag = api_client.get('/api/v1/units/').headers['etag']
+    UnitController.delete_and_commit(context=context, id=portfolio['units'][1].id)  # Counted in row_counters
+    assert api_client.get('/api/v1/units/', headers={'If-None-Match': etag}).status_code == 200
+
+def test_etag_depends_on_query(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=2)
+    etag = api_client.get('/api/v1/units/').headers['etag']
+
+    assert api_client.get('/api/v1/units/', params={'limit': 1}, headers={'If-None-Match': etag}).status_code == 200
+    assert api_client.get('/api/v1/units/', params={'filter[sqft]': 500}).headers['etag'] != etag
+
+def test_read_validators(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    unit = make_portfolio(sqlite_db, context.get_user_id())['units'][0]
+    first = api_client.get(f'/api/v1/units/{unit.id}')
+
+    assert api_client.get(f'/api/v1/units/{unit.id}', headers={'If-None-Match': f'"x", {first.headers["etag"]}'}).status_code == 304
+    assert api_client.get(f'/api/v1/units/{unit.id}', headers={'If-Modified-Since': first.headers['last-modified']}).status_code == 304
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(days=1), usegmt=True)
+    assert api_client.get(f'/api/v1/units/{unit.id}', headers={'If-Modified-Since': earlier}).status_code == 200
+
+    touch(sqlite_db, Unit, unit.id)
+    assert api_client.get(f'/api/v1/units/{unit.id}', headers={'If-None-Match': first.headers['etag']}).status_code == 200
+    assert api_client.get(f'/api/v1/units/{unit.id}', headers={'If-Modified-Since': first.headers['last-modified']}).status_code == 200
+
+def test_sparse_read_keeps_validators(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    unit = make_portfolio(sqlite_db, context.get_user_id())['units'][0]
+
+    response = api_client.get(f'/api/v1/units/{unit.id}', params={'fields': 'sqft'})
+
+    assert response.json() == {'id': unit.id, 'sqft': 500}
+    assert response.headers['etag'] != api_client.get(f'/api/v1/units/{unit.id}').headers['etag']
+
+def test_versions_cover_loaded_tables(sqlite_db: Session, context: RequestContext):
+    property_ = make_portfolio(sqlite_db, context.get_user_id())['property']
+
+    assert PropertyController.get_version(context=context, id=property_.id) is not None
+    # The summary table has no updated_at: stats responses are never answered with 304
+    assert PropertyController.get_version(context=context, id=property_.id, read_schema=PropertySchema.ReadWithStats) is None
+    assert UnitController.get_version(context=context).tag != UnitController.get_version(context=context, id=0).tag
+
+def test_not_modified_keeps_response_headers():
+    version = Version(tag='1', last_modified=datetime(2026, 1, 1, tzinfo=timezone.utc))
+    first = Response()
+    not_modified(Request({'type': 'http', 'path': '/api/v1/units/', 'query_string': b'', 'headers': []}), first, version)
+    request = Request({
+        'type': 'http', 'path': '/api/v1/units/', 'query_string': b'',
+        'headers': [(b'if-none-match', first.headers['etag'].encode())],
+    })
+    response = Response()
+    response.set_cookie('access_token', 'refreshed')  # e.g. by the token refresh flow
+
+    unchanged = not_modified(request, response, version)
+
+    assert unchanged is not None and unchanged.status_code == 304
+    assert 'access_token=refreshed' in unchanged.headers['set-cookie']
@@ -0,0 +1,39 @@
+from sqlalchemy.orm import Session
+from controllers import counter, base, BuildingController, UnitController
+from db.models import Building, Unit
+from schemas import BuildingSchema
+from schemas.request import RequestContext
+from .conftest import make_portfolio
+
+def test_counters_follow_creates_and_deletes(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=3)
+    property_id = portfolio['property'].id
+    owner_id = context.get_user_id()
+
+    schema = BuildingSchema.Create(name='Annex', floor_count=2, property_id=property_id, owner_id=owner_id)
+    building = BuildingController.create_and_commit(context=context, schema=schema, parent_id=property_id)
+    assert building is not None
+    assert counter.get_count(sqlite_db, Building, owner_id) == 2
+    assert counter.get_count(sqlite_db, Building, owner_id, parent_id=property_id) == 2
+    assert BuildingController.get_all(context=context).rowCount == 2
+
+    assert base.delete_and_commit(context=context, model=Building, id=building.id)
+    assert counter.get_count(sqlite_db, Building, owner_id) == 1
+    assert BuildingController.get_all_from_parent(context=context, parent_id=property_id).rowCount == 1
+
+def test_rebuild_reconciles_counters(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=4)
+    owner_id = context.get_user_id()
+    building_id = portfolio['building'].id
+
+    # Simulate a bulk load that bypassed the controllers
+    sqlite_db.add(Unit(
+        owner_id=owner_id, building_id=building_id, unit_number='999',
+        floor_number=9, bedrooms=1, bathrooms=1.0, sqft=400,
+    ))
+    sqlite_db.commit()
+    assert UnitController.get_all(context=context).rowCount == 4
+
+    counter.rebuild(sqlite_db, owner_id=owner_id)
+    assert UnitController.get_all(context=context).rowCount == 5
+    assert UnitController.get_all_from_parent(context=context, parent_id=building_id).rowCount == 5
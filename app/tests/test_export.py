@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.api.v1.deps import _stream_chunks
+from controllers import UnitController
+from core import settings
+from schemas.request import FilterParam, RequestContext
+from .conftest import make_portfolio
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return 'asyncio'
+
+def test_export_ndjson(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=5)
+
+    response = api_client.get('/api/v1/units/export')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['id'] for row in rows] == [unit.id for unit in portfolio['units']]
+    assert rows[0]['unit_number'] == '100' and rows[0]['building_id'] == portfolio['building'].id
+
+def test_export_csv_with_filters(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=5)
+
+    response = api_client.get('/api/v1/units/export', params={'format': 'csv', 'filter[sqft][gte]': '503'})
+
+    assert response.status_code == 200
+    assert response.headers['content-disposition'] == 'attachment; filename="units.csv"'
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert [row[header.index('unit_number')] for row in rows] == ['103', '104']
+    assert api_client.get('/api/v1/units/export', params={'filter[nope]': '1'}).status_code == 400
+
+def test_export_is_chunked(sqlite_db: Session, context: RequestContext, monkeypatch: pytest.MonkeyPatch):
+    make_portfolio(sqlite_db, context.get_user_id(), units=5)
+    monkeypatch.setattr(settings, 'api_export_chunk_rows', 2)
+
+    chunks = list(UnitController.export(context=context, filters=[FilterParam(field='is_vacant', op='eq', value='true')]))
+
+    assert [chunk.count(b'\n') for chunk in chunks] == [2, 2, 1]
+
+@pytest.mark.anyio
+async def test_stream_stops_early(sqlite_db: Session, context: RequestContext, monkeypatch: pytest.MonkeyPatch):
+    make_portfolio(sqlite_db, context.get_user_id(), units=5)
+    monkeypatch.setattr(settings, 'api_export_chunk_rows', 1)
+    chunks = UnitController.export(context=context)
+    stream = _stream_chunks(chunks)
+
+    assert (await anext(stream)).count(b'\n') == 1
+    await stream.aclose()  # As when the response is cancelled on disconnect
+
+    assert chunks.gi_frame is None  # type: ignore (closed: the cursor and the export session are released)
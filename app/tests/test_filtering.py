@@ -0,0 +1,77 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from core import settings
+from core.exceptions import InvalidQueryError
+from controllers import UnitController, PropertyController
+from schemas.request import FilterParam, RequestContext
+from .conftest import make_portfolio
+
+def test_filters_compile_to_predicates(sqlite_db: Session, context: RequestContext):
+    units = make_portfolio(sqlite_db, context.get_user_id(), units=9)['units']
+    units[0].is_vacant = False
+    sqlite_db.commit()
+
+    page = UnitController.get_all(context=context, limit=20, filters=[
+        FilterParam('is_vacant', 'eq', 'true'),
+        FilterParam('bedrooms', 'gte', '2'),
+    ])
+    expected = [u.id for u in units if u.is_vacant and u.bedrooms >= 2]
+    assert [u.id for u in page.rows] == expected
+    assert page.rowCount == len(expected)
+
+    page = UnitController.get_all(context=context, filters=[FilterParam('unit_number', 'in', '100,101,999')])
+    assert page.rowCount == 2
+    page = UnitController.get_all(context=context, filters=[FilterParam('unit_number', 'prefix', '10')])
+    assert page.rowCount == 9
+
+def test_sort_with_cursor_pages(sqlite_db: Session, context: RequestContext):
+    units = make_portfolio(sqlite_db, context.get_user_id(), units=12)['units']
+    expected = [u.id for u in sorted(units, key=lambda u: (-u.bedrooms, -u.id))]
+
+    seen: list[int] = []
+    page = UnitController.get_all(context=context, limit=5, sort='-bedrooms')
+    while True:
+        seen.extend(u.id for u in page.rows)
+        if page.nextCursor is None:
+            break
+        page = UnitController.get_all(context=context, limit=5, sort='-bedrooms', cursor=page.nextCursor)
+    assert seen == expected
+
+    back = UnitController.get_all(context=context, limit=5, sort='-bedrooms', cursor=page.prevCursor)
+    assert [u.id for u in back.rows] == expected[5:10]
+    with pytest.raises(InvalidQueryError):
+        UnitController.get_all(context=context, limit=5, sort='sqft', cursor=page.prevCursor)
+
+@pytest.mark.parametrize('filters, sort', [
+    ([FilterParam('password', 'eq', 'x')], None),
+    ([FilterParam('bedrooms', 'gte', 'two')], None),
+    ([FilterParam('bedrooms', 'between', '1')], None),
+    ([FilterParam('bedrooms', 'prefix', '1')], None),
+    ([], 'notes'),
+    ([], 'sqft,bedrooms'),
+])
+def test_invalid_filters_rejected(context: RequestContext, filters: list[FilterParam], sort: str | None):
+    with pytest.raises(InvalidQueryError):
+        UnitController.get_all(context=context, filters=filters, sort=sort)
+
+def test_unindexed_sort_rejected_on_large_results(sqlite_db: Session, context: RequestContext, monkeypatch: pytest.MonkeyPatch):
+    make_portfolio(sqlite_db, context.get_user_id(), units=6)
+    monkeypatch.setattr(settings, 'api_unindexed_sort_max_rows', 3)
+
+    with pytest.raises(InvalidQueryError):
+        UnitController.get_all(context=context, sort='sqft')
+    # Narrowed below the limit by a filter, or served by an index
+    assert len(UnitController.get_all(context=context, sort='sqft', filters=[FilterParam('bedrooms', 'eq', '1')]).rows) == 2
+    assert len(UnitController.get_all(context=context, sort='-id').rows) == 6
+    assert len(PropertyController.get_all(context=context, sort='type').rows) == 1
+
+def test_filter_query_params(sqlite_db: Session, context: RequestContext, api_client: TestClient):
+    make_portfolio(sqlite_db, context.get_user_id(), units=4)
+    response = api_client.get('/api/v1/units/?filter[bedrooms][lte]=2&filter[is_vacant]=true&sort=-sqft')
+    assert response.status_code == 200
+    assert [row['sqft'] for row in response.json()['rows']] == [503, 501, 500]
+
+    assert api_client.get('/api/v1/units/?filter[bedrooms][gte]=x').status_code == 400
+    assert api_client.get('/api/v1/units/?filter=1').status_code == 400
+    assert api_client.get('/api/v1/leases/?filter[end_date][lte]=2024-12-31').json()['rowCount'] == 1
@@ -0,0 +1,116 @@
+from datetime import date
+from typing import Any, Callable
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from controllers import BuildingController, LeaseController, UnitController, filtering
+from db.models import Property, Building, Unit, Lease, Tenant, Insurance
+from schemas import BuildingSchema, UnitSchema
+from schemas.request import FilterParam, RequestContext
+from .conftest import make_portfolio
+
+# Run `action` and return the query plan (EXPLAIN QUERY PLAN) of every SELECT it issued
+def query_plans(db: Session, action: Callable[[], Any]) -> list[str]:
+    captured: list[tuple[str, Any]] = []
+    def capture(conn: Any, cursor: Any, statement: str, parameters: Any, *args: Any) -> None:
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    event.listen(db.get_bind(), 'before_cursor_execute', capture)
+    try:
+        action()
+    finally:
+        event.remove(db.get_bind(), 'before_cursor_execute', capture)
+    connection = db.connection()
+    return [
+        ' / '.join(row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters))
+        for statement, parameters in captured
+    ]
+
+# Plan of the page subquery of an index page (the outer ORDER BY only sorts the rows of the page)
+def page_plan(plan: str) -> str:
+    return plan.partition('MATERIALIZE page / ')[2].partition(' / SCAN counts')[0]
+
+def test_owner_list_uses_owner_index(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=5)
+    plans = query_plans(sqlite_db, lambda: UnitController.get_all(context=context))
+    assert 'ix_units_owner_id_id' in page_plan(plans[0])
+    assert 'TEMP B-TREE' not in page_plan(plans[0])  # Rows come out in keyset order, no sort step
+
+def test_parent_list_uses_composite_index(sqlite_db: Session, context: RequestContext):
+    building_id = make_portfolio(sqlite_db, context.get_user_id(), units=5)['building'].id
+    plans = query_plans(sqlite_db, lambda: UnitController.get_all_from_parent(context=context, parent_id=building_id))
+    assert 'ix_units_owner_id_building_id_id (owner_id=? AND building_id=?)' in page_plan(plans[0])
+    assert 'TEMP B-TREE' not in page_plan(plans[0])
+
+def test_vacant_filter_uses_partial_index(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=20)
+    building_id = portfolio['building'].id
+    for unit in portfolio['units'][4:]:
+        unit.is_vacant = False
+    sqlite_db.commit()
+    sqlite_db.execute(text('ANALYZE'))
+    plans = query_plans(sqlite_db, lambda: UnitController.get_all_from_parent(
+        context=context, parent_id=building_id, filters=[FilterParam('is_vacant', 'eq', 'true')],
+    ))
+    assert 'ix_units_vacant_building_id_id' in plans[0]
+
+def test_vacancy_stats_use_partial_index(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=20)
+    building_id = portfolio['building'].id
+    for unit in portfolio['units'][4:]:
+        unit.is_vacant = False
+    sqlite_db.commit()
+    sqlite_db.execute(text('ANALYZE'))
+    sqlite_db.expunge_all()
+    plans = query_plans(sqlite_db, lambda: BuildingController.get_by_id(
+        context=context, id=building_id, read_schema=BuildingSchema.ReadWithStats,
+    ))
+    assert 'ix_units_vacant_building_id_id' in plans[0]
+
+def test_sorted_list_uses_sort_index(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=5)
+    plans = query_plans(sqlite_db, lambda: LeaseController.get_all(context=context, sort='-end_date'))
+    assert 'ix_leases_owner_id_end_date_id' in page_plan(plans[0])
+    assert 'TEMP B-TREE' not in page_plan(plans[0])
+
+def test_rent_total_uses_active_lease_index(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=5)
+    building_id = portfolio['building'].id
+    # Lease history: mostly ended leases, which the partial index leaves out
+    sqlite_db.add_all(
+        Lease(
+            owner_id=context.get_user_id(), unit_id=unit.id, rent=900.0, is_active=False,
+            start_date=date(2020, 1, 1), end_date=date(2020, 12, 31),
+        )
+        for unit in portfolio['units'] for _ in range(10)
+    )
+    sqlite_db.commit()
+    sqlite_db.execute(text('ANALYZE'))  # Let the planner see how selective each index is
+    sqlite_db.expunge_all()
+    plans = query_plans(sqlite_db, lambda: BuildingController.get_by_id(
+        context=context, id=building_id, read_schema=BuildingSchema.ReadWithStats,
+    ))
+    assert 'ix_leases_active_unit_id_rent' in plans[0]
+
+def test_child_collections_use_composite_index(sqlite_db: Session, context: RequestContext):
+    unit_id = make_portfolio(sqlite_db, context.get_user_id(), units=5)['units'][0].id
+    sqlite_db.expunge_all()
+    plans = query_plans(sqlite_db, lambda: UnitController.get_by_id(context=context, id=unit_id, read_schema=UnitSchema.ReadFull))
+    assert any('ix_leases_owner_id_unit_id_id (owner_id=? AND unit_id=?)' in plan for plan in plans[1:])
+
+def test_composites_replace_single_column_indexes():
+    for model in (Building, Unit, Lease, Tenant, Insurance):
+        assert not model.__table__.c[model._resource_parent_key()].index
+    assert not Property.__table__.c.type.index
+    assert filtering.is_indexed(Property, Property.type, {'owner_id'})
+
+def test_brin_indexes_do_not_count_for_sorting():
+    assert filtering.is_indexed(Lease, Lease.end_date, {'owner_id'})
+    assert not filtering.is_indexed(Lease, Lease.start_date, {'owner_id'})  # BRIN only
+    assert not filtering.is_indexed(Lease, Lease.rent, {'owner_id', 'unit_id'})  # Only the partial index has rent after unit_id
+
+def test_version_probe_reads_indexes_and_counters(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=5)
+    plan = query_plans(sqlite_db, lambda: UnitController.get_version(context=context, read_schema=UnitSchema.Read))[0]
+    assert 'ix_units_owner_id_updated_at_id' in plan and 'ix_buildings_owner_id_updated_at_id' in plan
+    assert 'row_counters' in plan
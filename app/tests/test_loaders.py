@@ -0,0 +1,53 @@
+from typing import Any
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+from controllers import UnitController, PropertyController
+from db.loaders import loader_options
+from db.models import Building, Property, Unit
+from schemas import BuildingSchema, PropertySchema, UnitSchema
+from schemas.request import RequestContext
+from .conftest import make_portfolio
+
+def count_statements(db: Session) -> list[str]:
+    statements: list[str] = []
+    def capture(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+    event.listen(db.get_bind(), 'before_cursor_execute', capture)
+    return statements
+
+def test_profiles_follow_schema_fields():
+    assert loader_options(Property, PropertySchema.Read) == ()
+    assert len(loader_options(Property, PropertySchema.ReadFull)) == 1
+    paths = [str(opt.path) for opt in loader_options(Building, BuildingSchema.ReadWithStats)]  # type: ignore
+    assert any('property' in path for path in paths)
+    assert not any('units' in path for path in paths)  # Stats are aggregated in SQL, units stay unloaded
+
+def test_list_loads_only_serialized_graph(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=20)
+    sqlite_db.expunge_all()
+    statements = count_statements(sqlite_db)
+
+    page = UnitController.get_all(context=context, limit=20)
+    rows = [UnitSchema.Read.model_validate(row) for row in page.rows]
+
+    assert len(rows) == 20
+    assert rows[0].building.unit_count == 20
+    assert not any('FROM leases' in s for s in statements)  # Unit.leases is not part of UnitSchema.Read
+    assert len(statements) <= 2  # Page (+ building/property joins), then the units of those buildings
+
+def test_unprofiled_relationship_access_raises(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=1)
+    sqlite_db.expunge_all()
+    page = PropertyController.get_all(context=context)
+    with pytest.raises(InvalidRequestError):
+        page.rows[0].buildings
+    unit_page = UnitController.get_all(context=context, read_schema=PropertySchema.Read)
+    with pytest.raises(InvalidRequestError):
+        getattr(unit_page.rows[0], 'building')
+
+def test_model_relationships_default_to_raise():
+    for model in (Property, Building, Unit):
+        for relationship in model.__mapper__.relationships:
+            assert relationship.lazy == 'raise'
@@ -0,0 +1,139 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Any, Callable
+import pytest
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from core.exceptions import InvalidQueryError
+from controllers import UnitController, UserController
+from schemas.request import FilterParam, RequestContext
+from .conftest import make_context, make_portfolio, make_user
+
+def test_cursor_pages_cover_all_rows_in_order(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=23)
+    expected = [u.id for u in portfolio['units']]
+
+    seen: list[int] = []
+    page = UnitController.get_all(context=context, limit=10)
+    while True:
+        seen.extend(u.id for u in page.rows)
+        if page.nextCursor is None:
+            break
+        page = UnitController.get_all(context=context, limit=10, cursor=page.nextCursor)
+
+    assert seen == expected
+    assert page.pageStart == 20
+
+def test_prev_cursor_returns_previous_page(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=15)
+    first = UnitController.get_all(context=context, limit=5)
+    second = UnitController.get_all(context=context, limit=5, cursor=first.nextCursor)
+    assert first.prevCursor is None
+    assert second.prevCursor is not None
+
+    back = UnitController.get_all(context=context, limit=5, cursor=second.prevCursor)
+    assert [u.id for u in back.rows] == [u.id for u in first.rows]
+    assert back.pageStart == 0
+    assert back.prevCursor is None
+
+def test_prev_cursor_with_a_different_limit(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=15)
+    ids = [u.id for u in portfolio['units']]
+    first = UnitController.get_all(context=context, limit=10)
+    second = UnitController.get_all(context=context, limit=5, cursor=first.nextCursor)
+
+    back = UnitController.get_all(context=context, limit=3, cursor=second.prevCursor)
+
+    assert [u.id for u in back.rows] == ids[7:10]
+    assert (back.pageStart, back.pageEnd, back.rowCount) == (7, 10, 15)
+
+def test_tampered_cursor_rejected(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=8)
+    data, _, signature = UnitController.get_all(context=context, limit=5).nextCursor.partition('.')
+    payload = json.loads(urlsafe_b64decode(data + '=' * (-len(data) % 4)))
+    forged = urlsafe_b64encode(json.dumps({**payload, 'o': -100}).encode()).decode().rstrip('=')
+
+    with pytest.raises(InvalidQueryError):
+        UnitController.get_all(context=context, limit=5, cursor=f'{forged}.{signature}')
+
+def test_offset_mode_still_supported(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=8)
+    by_offset = UnitController.get_all(context=context, skip=5, limit=5)
+    first = UnitController.get_all(context=context, limit=5)
+    by_cursor = UnitController.get_all(context=context, limit=5, cursor=first.nextCursor)
+    assert [u.id for u in by_offset.rows] == [u.id for u in by_cursor.rows]
+    assert by_offset.nextCursor is None
+
+def test_subindex_cursor(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=7)
+    building_id = portfolio['building'].id
+    first = UnitController.get_all_from_parent(context=context, parent_id=building_id, limit=4)
+    rest = UnitController.get_all_from_parent(context=context, parent_id=building_id, limit=4, cursor=first.nextCursor)
+    assert len(first.rows) == 4
+    assert len(rest.rows) == 3
+    assert rest.nextCursor is None
+
+def test_invalid_cursor_rejected(context: RequestContext):
+    with pytest.raises(InvalidQueryError):
+        UnitController.get_all(context=context, limit=5, cursor='not-a-cursor')
+
+# Run `action` and return the SQL statements it issued
+def executed(db: Session, action: Callable[[], Any]) -> tuple[Any, list[str]]:
+    statements: list[str] = []
+    def capture(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    event.listen(db.get_bind(), 'before_cursor_execute', capture)
+    try:
+        return action(), statements
+    finally:
+        event.remove(db.get_bind(), 'before_cursor_execute', capture)
+
+def test_page_and_count_share_one_statement(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=12)
+
+    page, statements = executed(sqlite_db, lambda: UnitController.get_all(context=context, skip=10, limit=5))
+
+    assert page.rowCount == 12
+    assert page.rowCountExact
+    assert 'row_count' in statements[0]
+    assert not any(s.lstrip().upper().startswith(('SELECT COUNT', 'SELECT COALESCE')) for s in statements)
+
+def test_every_page_is_one_statement(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=12)
+    second = UnitController.get_all(context=context, limit=5, cursor=UnitController.get_all(context=context, limit=5).nextCursor)
+    filters = [FilterParam('bedrooms', 'eq', '1')]
+
+    for action, row_count in [
+        (lambda: UnitController.get_all(context=context, limit=5, cursor=second.prevCursor), 12),
+        (lambda: UnitController.get_all(context=context, skip=20, limit=5), 12),  # Empty page past the end
+        (lambda: UnitController.get_all(context=context, filters=filters, skip=20, limit=5), 4),
+        (lambda: UnitController.get_all(context=context, sort='-updated_at', limit=5), 12),  # Unindexed sort, counter knows the size
+    ]:
+        page, statements = executed(sqlite_db, action)
+        assert page.rowCount == row_count
+        assert len(statements) == 1
+
+def test_users_window_count(sqlite_db: Session, context: RequestContext):
+    for i in range(4):
+        make_user(sqlite_db, email=f'user{i}@example.com')
+    page = UserController.get_all_paginated(db=sqlite_db, skip=2, limit=2)
+    assert page.rowCount == 5
+    assert page.pageStart == 2
+    assert UserController.get_all_paginated(db=sqlite_db, skip=10, limit=2).rowCount == 5
+
+def test_estimate_falls_back_to_exact_without_planner(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=3)
+    page = UnitController.get_all(context=context, count='estimate')
+    assert page.rowCount == 3
+    assert page.rowCountExact
+
+def test_estimate_with_an_in_filter(postgres_engine: Engine):
+    with sessionmaker(bind=postgres_engine, autoflush=False)() as db:
+        context = make_context(db, make_user(db))
+        ids = [u.id for u in make_portfolio(db, context.get_user_id(), units=5)['units']]
+
+        page = UnitController.get_all(context=context, count='estimate', filters=[FilterParam('id', 'in', f'{ids[0]},{ids[1]}')])
+
+        assert [u.id for u in page.rows] == ids[:2]
+        assert not page.rowCountExact and page.rowCount >= 0
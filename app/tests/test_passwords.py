@@ -0,0 +1,76 @@
+import asyncio
+import time
+import pytest
+from fastapi import Response
+from fastapi.security import OAuth2PasswordRequestForm
+from passlib.context import CryptContext
+from sqlalchemy.orm import Session
+from api.v1.endpoints.auth import login_for_access_token
+from controllers import UserController
+from core import security
+from db.models import User
+from schemas import UserSchema
+from .conftest import SyncSessionRunner
+
+def crypt_context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=['bcrypt'], deprecated='auto', bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+@pytest.fixture(autouse=True)
+def fast_hashes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(security, 'pwd_context', crypt_context(4))
+
+def test_read_validation_costs_microseconds(sqlite_db: Session, owner: User):
+    owner.password = security.get_password_hash('correct horse')
+    sqlite_db.commit()
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        user = UserSchema.Read.model_validate(owner)
+    elapsed = (time.perf_counter() - started) / 1000
+
+    assert user.password == owner.password  # The stored hash, not hashed again
+    assert elapsed < 0.0002
+
+def test_writes_hash_the_password(sqlite_db: Session):
+    user = UserController.create_and_commit(
+        db=sqlite_db, schema=UserSchema.Create(name='New', email='new@example.com', password='first password'),
+    )
+    assert user is not None and security.verify_password('first password', user.password)
+
+    UserController.update_and_commit(db=sqlite_db, schema=UserSchema.Update(password='second password'), id=user.id)
+
+    assert security.verify_password('second password', user.password)
+    assert not security.verify_password('first password', user.password)
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return 'asyncio'
+
+@pytest.mark.anyio
+async def test_login_rehashes_outdated_hashes(sqlite_db: Session, owner: User, monkeypatch: pytest.MonkeyPatch):
+    owner.password = await security.get_password_hash_async('correct horse')
+    sqlite_db.commit()
+    outdated = owner.password
+    monkeypatch.setattr(security, 'pwd_context', crypt_context(5))
+
+    await login_for_access_token(Response(), SyncSessionRunner(sqlite_db), OAuth2PasswordRequestForm(username=owner.email, password='correct horse'))  # type: ignore
+
+    sqlite_db.refresh(owner)
+    assert owner.password != outdated and owner.password.startswith('$2b$05$')
+    assert security.verify_and_rehash('correct horse', owner.password) == (True, None)
+
+@pytest.mark.anyio
+async def test_async_hashing_leaves_the_event_loop_free():
+    ticks = 0
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    ticker = asyncio.create_task(tick())
+    hashed = await security.get_password_hash_async('correct horse')
+    ticker.cancel()
+
+    assert ticks > 1  # The loop ran other tasks while bcrypt worked
+    assert await security.verify_password_async('correct horse', hashed)
@@ -0,0 +1,127 @@
+from datetime import date
+from threading import Thread
+from typing import Any
+import pytest
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from controllers import PropertyController, UnitController, LeaseController, InsuranceController, base, summary
+from db.models import Insurance, PropertySummary, Unit
+from schemas import PropertySchema, UnitSchema, LeaseSchema, InsuranceSchema
+from schemas.request import RequestContext
+from .conftest import make_portfolio, make_user
+
+def read_stats(context: RequestContext, property_id: int) -> PropertySchema.ReadWithStats:
+    context.db.expunge_all()
+    row = PropertyController.get_by_id(context=context, id=property_id, read_schema=PropertySchema.ReadWithStats)
+    return PropertySchema.ReadWithStats.model_validate(row)
+
+def test_summary_rebuilt_from_rows(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=3)
+    stats = read_stats(context, portfolio['property'].id)
+    assert stats.building_count == 1
+    assert stats.unit_count == 3
+    assert stats.vacant_unit_count == 3
+    assert stats.active_rent_total == 1000.0
+    assert stats.average_sqft == 501.0
+    assert stats.insured_tenant_ratio == 1.0
+
+def test_controller_writes_refresh_summary(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=1)
+    property_id = portfolio['property'].id
+    building_id = portfolio['building'].id
+    tenant_id = portfolio['tenant'].id
+    insurance_id = portfolio['insurance'].id
+    owner_id = context.get_user_id()
+
+    unit = UnitController.create_and_commit(context=context, parent_id=building_id, schema=UnitSchema.Create(
+        owner_id=owner_id, building_id=building_id, unit_number='200', floor_number=2, bedrooms=2, bathrooms=1.0, sqft=700, is_vacant=False,
+    ))
+    assert unit is not None
+    LeaseController.create_and_commit(context=context, parent_id=unit.id, schema=LeaseSchema.Create(
+        owner_id=owner_id, unit_id=unit.id, rent=1500.0, start_date=date(2024, 1, 1), end_date=date(2024, 12, 31),
+    ))
+    stats = read_stats(context, property_id)
+    assert stats.unit_count == 2
+    assert stats.vacant_unit_count == 1
+    assert stats.active_rent_total == 2500.0
+    assert stats.average_sqft == 600.0
+
+    UnitController.update_and_commit(context=context, id=unit.id, schema=UnitSchema.Update(is_vacant=True))
+    assert read_stats(context, property_id).vacant_unit_count == 2
+
+    assert base.delete_and_commit(context=context, model=Insurance, id=insurance_id)
+    assert read_stats(context, property_id).insured_tenant_ratio == 0.0
+    InsuranceController.create_and_commit(context=context, parent_id=tenant_id, schema=InsuranceSchema.Create(
+        owner_id=owner_id, tenant_id=tenant_id, policy_number='P-2', expiration_date=date(2026, 1, 1),
+    ))
+    assert read_stats(context, property_id).insured_tenant_ratio == 1.0
+
+def test_new_property_gets_empty_summary(sqlite_db: Session, context: RequestContext):
+    created = PropertyController.create_and_commit(context=context, schema=PropertySchema.Create(
+        owner_id=context.get_user_id(), name='New', address='2 Main St', city='springfield',
+        state='IL', zip_code='62701', type='residential', manager=None,
+    ))
+    assert created is not None
+    assert sqlite_db.get(PropertySummary, created.id) is not None
+    stats = read_stats(context, created.id)
+    assert stats.building_count == 0
+    assert stats.insured_tenant_ratio == 0.0
+
+def test_reading_stats_does_not_touch_child_tables(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=5)
+    property_id = portfolio['property'].id
+    sqlite_db.expunge_all()
+    statements: list[str] = []
+    def capture(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    event.listen(sqlite_db.get_bind(), 'before_cursor_execute', capture)
+    try:
+        read_stats(context, property_id)
+    finally:
+        event.remove(sqlite_db.get_bind(), 'before_cursor_execute', capture)
+
+    assert len(statements) == 1
+    assert not any(table in statements[0] for table in ('buildings', 'units', 'leases', 'tenants'))
+
+def test_rebuild_is_scoped_to_owner(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=2)
+    assert summary.rebuild(sqlite_db, owner_id=context.get_user_id() + 1) == 0
+    assert sqlite_db.query(PropertySummary).count() == 1
+
+# Row locks only matter on PostgreSQL (skipped when the test database is not reachable)
+def test_interleaved_refreshes_of_one_property(postgres_engine: Engine):
+    SessionLocal = sessionmaker(bind=postgres_engine, autoflush=False)
+    with SessionLocal() as db:
+        owner = make_user(db)
+        portfolio = make_portfolio(db, owner.id, units=1)
+        owner_id, property_id, building_id = owner.id, portfolio['property'].id, portfolio['building'].id
+
+    def add_unit(db: Session, number: str) -> None:
+        db.add(Unit(owner_id=owner_id, building_id=building_id, unit_number=number, floor_number=1, bedrooms=1, bathrooms=1.0, sqft=500, is_vacant=True))
+        summary.refresh(db, {property_id})
+
+    first, second = SessionLocal(), SessionLocal()
+    errors: list[Exception] = []
+    def write_second() -> None:
+        try:
+            add_unit(second, '201')
+            second.commit()
+        except Exception as exc:
+            errors.append(exc)
+
+    try:
+        add_unit(first, '200')
+        thread = Thread(target=write_second)
+        thread.start()
+        thread.join(0.5)
+        assert thread.is_alive()  # Waiting for the first transaction's lock on the property
+        first.commit()
+        thread.join(10)
+    finally:
+        first.close()
+        second.close()
+
+    assert errors == []
+    with SessionLocal() as db:
+        assert db.get(PropertySummary, property_id).unit_count == 3  # type: ignore
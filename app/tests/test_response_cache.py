@@ -0,0 +1,137 @@
+from typing import Any, Generator
+import pytest
+from fastapi import Request, Response
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.api.v1.deps import cached_response
+from controllers import BuildingController, UnitController, response_cache
+from core import cache, settings
+from db.models import Unit
+from schemas import BuildingSchema
+from schemas.request import RequestContext
+from .conftest import make_context, make_portfolio, make_user
+
+# Local stand-in for Redis, with the commands the cache uses
+class FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+        self.failing = False
+
+    def _check(self) -> None:
+        if self.failing:
+            raise ConnectionError('Redis is down')
+
+    def get(self, name: str) -> bytes | None:
+        self._check()
+        return self.data.get(name)
+
+    def mget(self, names: list[str]) -> list[bytes | None]:
+        self._check()
+        return [self.data.get(name) for name in names]
+
+    def set(self, name: str, value: bytes, ex: int | None = None) -> None:
+        self._check()
+        self.data[name] = value
+
+    def delete(self, *names: str) -> int:
+        self._check()
+        return sum(self.data.pop(name, None) is not None for name in names)
+
+    def incr(self, name: str) -> int:
+        self._check()
+        self.data[name] = str(int(self.data.get(name, b'0')) + 1).encode()
+        return int(self.data[name])
+
+@pytest.fixture
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> Generator[FakeRedis, None, None]:
+    client = FakeRedis()
+    monkeypatch.setattr(settings, 'api_response_cache_enabled', True)
+    response_cache.clear()
+    cache.use_client(client)
+    try:
+        yield client
+    finally:
+        cache.use_client(None)
+        response_cache.clear()
+
+def test_disabled_by_default(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id())
+
+    api_client.get('/api/v1/units/')
+
+    assert response_cache.key(context.get_user_id(), '/api/v1/units/?', UnitController.get_tables()) is None
+    assert response_cache.stats()['stores'] == 0
+
+def test_tiers(api_client: TestClient, sqlite_db: Session, context: RequestContext, fake_redis: FakeRedis, monkeypatch: pytest.MonkeyPatch):
+    make_portfolio(sqlite_db, context.get_user_id(), units=2)
+
+    first = api_client.get('/api/v1/units/', params={'limit': 1})
+    second = api_client.get('/api/v1/units/', params={'limit': 1})
+    response_cache.clear()  # Another worker: empty tier 1, shared tier 2
+    third = api_client.get('/api/v1/units/', params={'limit': 1})
+
+    assert first.json() == second.json() == third.json()
+    monkeypatch.setattr(settings, 'api_response_cache_enabled', False)
+    assert api_client.get('/api/v1/units/', params={'limit': 1}).json() == first.json()  # Same body as without the cache
+    monkeypatch.setattr(settings, 'api_response_cache_enabled', True)
+    assert len(first.json()['rows']) == 1
+    assert second.headers['etag'] == first.headers['etag']
+    assert response_cache.stats()['l2_hits'] == 1 and response_cache.stats()['misses'] == 0
+    assert api_client.get('/api/v1/units/', params={'limit': 1}, headers={'If-None-Match': first.headers['etag']}).status_code == 304
+    assert response_cache.stats()['l1_hits'] == 1
+
+def test_writes_invalidate_the_tables_they_touch(api_client: TestClient, sqlite_db: Session, context: RequestContext, fake_redis: FakeRedis):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id())
+    unit, building = portfolio['units'][0], portfolio['building']
+    api_client.get('/api/v1/units/')
+    api_client.get(f'/api/v1/units/{unit.id}')
+
+    api_client.put(f'/api/v1/units/{unit.id}', json={'sqft': 900})
+    assert api_client.get(f'/api/v1/units/{unit.id}').json()['sqft'] == 900
+    assert api_client.get('/api/v1/units/').json()['rows'][0]['sqft'] == 900
+
+    # Tenants are not read by the unit responses
+    hits = response_cache.stats()['l1_hits']
+    api_client.put(f'/api/v1/tenants/{portfolio["tenant"].id}', json={'name': 'Renamed'})
+    api_client.get('/api/v1/units/')
+    assert response_cache.stats()['l1_hits'] == hits + 1
+
+    # Units embed their building
+    BuildingController.update_and_commit(context=context, schema=BuildingSchema.Update(name='Renamed'), id=building.id)
+    assert api_client.get('/api/v1/units/').json()['rows'][0]['building']['name'] == 'Renamed'
+
+def test_entries_are_per_owner(sqlite_db: Session, context: RequestContext, fake_redis: FakeRedis):
+    other = make_context(sqlite_db, make_user(sqlite_db, 'other@example.com'))
+    tables = UnitController.get_tables()
+
+    key = response_cache.key(context.get_user_id(), '/api/v1/units/?', tables)
+    assert key != response_cache.key(other.get_user_id(), '/api/v1/units/?', tables)
+    response_cache.invalidate(other.get_user_id(), Unit)
+    assert response_cache.key(context.get_user_id(), '/api/v1/units/?', tables) == key
+    response_cache.invalidate(context.get_user_id(), Unit)
+    assert response_cache.key(context.get_user_id(), '/api/v1/units/?', tables) != key
+
+def test_redis_errors_bypass_the_cache(api_client: TestClient, sqlite_db: Session, context: RequestContext, fake_redis: FakeRedis):
+    make_portfolio(sqlite_db, context.get_user_id())
+    fake_redis.failing = True
+
+    response: Any = api_client.get('/api/v1/units/')
+
+    assert response.status_code == 200 and response.json()['rowCount'] == 1
+    assert response_cache.stats()['errors'] == 1
+    assert response_cache.stats()['stores'] == 0
+
+def test_hits_keep_response_headers(context: RequestContext, fake_redis: FakeRedis):
+    tables = UnitController.get_tables()
+    response_cache.store(response_cache.key(context.get_user_id(), '/api/v1/units/?', tables), b'{}', {'etag': 'W/"tag"'})
+    def lookup(*headers: tuple[bytes, bytes]) -> Any:
+        response = Response()
+        response.set_cookie('access_token', 'refreshed')  # e.g. by the token refresh flow
+        request = Request({'type': 'http', 'path': '/api/v1/units/', 'query_string': b'', 'headers': list(headers)})
+        return cached_response(request, response, context, tables)[1]
+
+    hit, unchanged = lookup(), lookup((b'if-none-match', b'W/"tag"'))
+
+    assert hit.body == b'{}' and hit.headers['etag'] == 'W/"tag"'
+    assert unchanged.status_code == 304
+    assert all('access_token=refreshed' in result.headers['set-cookie'] for result in (hit, unchanged))
@@ -0,0 +1,128 @@
+from pathlib import Path
+from typing import Generator
+import pytest
+from sqlalchemy import create_engine, event, Engine
+from sqlalchemy.orm import Session, sessionmaker
+from controllers import PropertyController
+from core import settings
+from db import Base, routing
+from db.models import Property
+from schemas import PropertySchema
+from schemas.request import RequestContext
+from .conftest import make_context, make_portfolio, make_user
+
+# Two local SQLite databases stand in for the primary and its replica. The replica is not
+# replicated to, so a read that finds only the rows written to the primary ran on the primary.
+
+@pytest.fixture(autouse=True)
+def clear_routing() -> Generator[None, None, None]:
+    routing.clear()
+    yield
+    routing.clear()
+
+@pytest.fixture
+def engines(tmp_path: Path) -> Generator[tuple[Engine, Engine], None, None]:
+    primary = create_engine(f'sqlite:///{tmp_path / "primary.db"}')
+    replica = create_engine(f'sqlite:///{tmp_path / "replica.db"}')
+    for engine in (primary, replica):
+        Base.metadata.create_all(bind=engine)
+    try:
+        yield primary, replica
+    finally:
+        primary.dispose()
+        replica.dispose()
+
+@pytest.fixture
+def routing_db(engines: tuple[Engine, Engine]) -> Generator[Session, None, None]:
+    primary, replica = engines
+    db = sessionmaker(class_=routing.RoutingSession, autoflush=False, bind=primary, replicas=[replica])()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def routed_context(routing_db: Session, engines: tuple[Engine, Engine], email: str = 'owner@example.com') -> RequestContext:
+    # Same user (and id) on both databases
+    with Session(engines[1]) as replica_db:
+        make_user(replica_db, email=email)
+    context = make_context(routing_db, make_user(routing_db, email=email))
+    routing.bind_user(routing_db, context.get_user_id())
+    return context
+
+def create_property(context: RequestContext, name: str) -> Property:
+    created = PropertyController.create_and_commit(context=context, schema=PropertySchema.Create(
+        owner_id=context.get_user_id(), name=name, address='1 Main St', city='Springfield', state='IL', zip_code='62701', type='residential', manager=None,
+    ))
+    assert created is not None
+    return created
+
+def test_reads_go_to_replica(routing_db: Session, engines: tuple[Engine, Engine]):
+    context = routed_context(routing_db, engines)
+    with Session(engines[1]) as replica_db:
+        on_replica = make_portfolio(replica_db, context.get_user_id())['property'].id
+
+    assert [row.id for row in PropertyController.get_all(context=context).rows] == [on_replica]
+    assert PropertyController.get_by_id(context=context, id=on_replica) is not None
+
+def test_reads_stick_to_primary_after_write(routing_db: Session, engines: tuple[Engine, Engine], monkeypatch: pytest.MonkeyPatch):
+    context = routed_context(routing_db, engines)
+    other = routed_context(routing_db, engines, email='other@example.com')
+    monkeypatch.setattr(settings, 'postgres_replica_sticky_seconds', 60)
+
+    created = create_property(context, 'Elm Court')
+    assert PropertyController.get_by_id(context=context, id=created.id) is not None       # Sticky: read from the primary
+    assert [row.id for row in PropertyController.get_all(context=context).rows] == [created.id]
+    assert PropertyController.get_by_id(context=other, id=created.id) is None             # Other users read the replica
+
+    monkeypatch.setattr(settings, 'postgres_replica_sticky_seconds', 0)                   # Window elapsed
+    assert PropertyController.get_by_id(context=context, id=created.id) is None
+
+def test_reads_in_writing_transaction_stay_on_primary(routing_db: Session, engines: tuple[Engine, Engine]):
+    context = routed_context(routing_db, engines)
+    pending = Property(
+        owner_id=context.get_user_id(), name='Pending', address='2 Main St', city='Springfield', state='IL', zip_code='62701', type='residential',
+    )
+    routing_db.add(pending)
+    routing_db.flush()
+
+    assert PropertyController.get_by_id(context=context, id=pending.id) is not None
+    routing_db.rollback()
+    assert PropertyController.get_by_id(context=context, id=pending.id) is None
+
+def test_pool_stats(routing_db: Session, engines: tuple[Engine, Engine]):
+    primary, replica = engines
+    context = routed_context(routing_db, engines)
+    routing_db.close()
+
+    PropertyController.get_all(context=context)
+    assert routing.pool_stats(replica)['checked_out'] == 1  # Held by the session until it ends its transaction
+    assert routing.pool_stats(primary)['checked_out'] == 0
+    routing_db.close()
+    assert routing.pool_stats(replica)['checked_out'] == 0
+    assert set(routing.pool_stats(primary)) == {'size', 'checked_in', 'checked_out', 'overflow'}
+
+def test_write_position_is_read_on_the_write_connection(postgres_engine: Engine, monkeypatch: pytest.MonkeyPatch):
+    # The primary stands in for its own replica: it reports no replay position, so its reads stay sticky
+    monkeypatch.setattr(settings, 'postgres_replica_sticky_seconds', 60)
+    monkeypatch.setattr(settings, 'postgres_replica_lsn_cache_seconds', 60)
+    checkouts: list[object] = []
+    event.listen(postgres_engine, 'checkout', lambda *args: checkouts.append(args))
+    with sessionmaker(class_=routing.RoutingSession, autoflush=False, bind=postgres_engine, replicas=[postgres_engine])() as db:
+        context = make_context(db, make_user(db))
+        routing.bind_user(db, context.get_user_id())
+        db.close()
+        checkouts.clear()
+
+        db.add(Property(
+            owner_id=context.get_user_id(), name='Elm Court', address='1 Main St', city='Springfield', state='IL', zip_code='62701', type='residential',
+        ))
+        db.commit()
+        assert len(checkouts) == 1  # No other connection for the WAL position
+        assert routing._last_writes[context.get_user_id()][1] is not None
+
+        db.close()
+        PropertyController.get_all(context=context)
+        read_at = routing._replays[postgres_engine][0]
+        db.close()
+        PropertyController.get_all(context=context)
+        assert routing._replays[postgres_engine][0] == read_at  # Cached replay position
@@ -0,0 +1,78 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from controllers import BuildingController, PropertyController, TenantController, SearchController, UnitController
+from db.models import SearchDocument
+from schemas import PropertySchema, TenantSchema, UnitSchema
+from schemas.request import RequestContext
+from .conftest import make_context, make_portfolio, make_user
+
+def test_search_returns_breadcrumb(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=2)
+
+    results = SearchController.search(context=context, q='tena')
+
+    assert [(hit.resource, hit.id, hit.label) for hit in results.rows] == [('tenant', portfolio['tenant'].id, 'Tenant')]
+    assert [(crumb.resource, crumb.id) for crumb in results.rows[0].breadcrumb] == [
+        ('property', portfolio['property'].id),
+        ('building', portfolio['building'].id),
+        ('unit', portfolio['units'][0].id),
+        ('lease', portfolio['lease'].id),
+    ]
+    assert [crumb.label for crumb in results.rows[0].breadcrumb[2:]] == ['100', 'Unit 100: 2024-01-01 to 2024-12-31']
+
+def test_lease_label_follows_its_unit(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id())
+
+    UnitController.update_and_commit(context=context, schema=UnitSchema.Update(unit_number='4B'), id=portfolio['units'][0].id)
+
+    assert [hit.label for hit in SearchController.search(context=context, q='2024').rows] == ['Unit 4B: 2024-01-01 to 2024-12-31']
+
+def test_search_is_owner_scoped_and_ranked(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id())
+    other = make_user(sqlite_db, email='other@example.com')
+    make_portfolio(sqlite_db, other.id)
+    for name, address in (('Main Plaza', '9 Elm St'), ('Elm Court', '2 Oak Ave')):
+        PropertyController.create_and_commit(context=context, schema=PropertySchema.Create(
+            owner_id=context.get_user_id(), name=name, address=address, city='springfield', state='IL', zip_code='62701', type='residential', manager=None,
+        ))
+
+    results = SearchController.search(context=context, q='elm')
+    assert [hit.label for hit in results.rows] == ['Elm Court', 'Main Plaza']  # Label matches rank above address matches
+    assert len(SearchController.search(context=context, q='property').rows) == 1
+    assert len(SearchController.search(context=make_context(sqlite_db, other), q='elm').rows) == 0
+    assert SearchController.search(context=context, q='  ').rows == []
+
+def test_writes_keep_index_current(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=3)
+    tenant_id = portfolio['tenant'].id
+
+    TenantController.update_and_commit(context=context, schema=TenantSchema.Update(name='Jordan Reyes'), id=tenant_id)
+    assert [hit.id for hit in SearchController.search(context=context, q='jordan rey').rows] == [tenant_id]
+    assert [hit.label for hit in SearchController.search(context=context, q='tenant').rows] == ['Jordan Reyes']  # Via the email
+
+    PropertyController.delete_and_commit(context=context, id=portfolio['property'].id)
+    assert sqlite_db.scalar(select(func.count()).select_from(SearchDocument)) == 0
+
+def test_archived_subtree_leaves_search(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=2)
+
+    BuildingController.archive_and_commit(context=context, id=portfolio['building'].id)
+    assert SearchController.search(context=context, q='tenant').rows == []
+    assert [hit.resource for hit in SearchController.search(context=context, q='property').rows] == ['property']
+
+    # Writes to an archived row keep it out of the index, reactivating it brings it back
+    TenantController.update_and_commit(context=context, schema=TenantSchema.Update(name='Tenant Two'), id=portfolio['tenant'].id)
+    assert SearchController.search(context=context, q='tenant').rows == []
+    TenantController.update_and_commit(context=context, schema=TenantSchema.Update(is_active=True), id=portfolio['tenant'].id)
+    assert [hit.label for hit in SearchController.search(context=context, q='tenant').rows] == ['Tenant Two']
+
+def test_search_endpoint(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id())
+
+    response = api_client.get('/api/v1/search/', params={'q': 'P-1'})
+
+    assert response.status_code == 200
+    hit = response.json()['rows'][0]
+    assert (hit['resource'], hit['id'], hit['label']) == ('insurance', portfolio['insurance'].id, 'P-1')
+    assert [crumb['resource'] for crumb in hit['breadcrumb']] == ['property', 'building', 'unit', 'lease', 'tenant']
@@ -0,0 +1,50 @@
+from typing import Any
+import pytest
+import fastapi.routing
+from fastapi import Response
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.api.v1.deps import model_response, serialize_results
+from controllers import UnitController
+from schemas import UnitSchema
+from schemas.request import PaginatedResults, RequestContext
+from .conftest import make_portfolio
+
+def test_results_are_typed(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=2)
+
+    results = serialize_results(UnitController.get_all(context=context, skip=0, limit=10), UnitSchema.Read)
+
+    assert isinstance(results, PaginatedResults[UnitSchema.Read])
+    assert all(isinstance(row, UnitSchema.Read) for row in results.rows)
+
+def test_index_is_encoded_once(api_client: TestClient, sqlite_db: Session, context: RequestContext, monkeypatch: pytest.MonkeyPatch):
+    make_portfolio(sqlite_db, context.get_user_id(), units=2)
+    expected = api_client.get('/api/v1/units/', params={'fields': 'id,sqft'}).json()
+
+    def serialize_response(*args: Any, **kwargs: Any) -> Any:
+        pytest.fail('response_model validated and encoded again')
+    monkeypatch.setattr(fastapi.routing, 'serialize_response', serialize_response)
+
+    response = api_client.get('/api/v1/units/')
+
+    assert response.status_code == 200 and response.headers['content-type'] == 'application/json'
+    assert response.json()['rowCount'] == 2
+    assert [{'id': row['id'], 'sqft': row['sqft']} for row in response.json()['rows']] == expected['rows']
+
+def test_response_headers_are_kept():
+    response = Response()
+    response.set_cookie('access_token', 'refreshed')
+    response.headers['etag'] = 'W/"tag"'
+
+    result = model_response(b'{}', response)
+
+    assert result.body == b'{}'
+    assert 'access_token=refreshed' in result.headers['set-cookie'] and result.headers['etag'] == 'W/"tag"'
+
+def test_index_schema_is_typed(api_client: TestClient):
+    openapi = api_client.get('/openapi.json').json()
+    ref = openapi['paths']['/api/v1/units/']['get']['responses']['200']['content']['application/json']['schema']['$ref']
+
+    rows = openapi['components']['schemas'][ref.split('/')[-1]]['properties']['rows']
+    assert rows['items']['$ref'].endswith('unit__Read')
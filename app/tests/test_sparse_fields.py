@@ -0,0 +1,79 @@
+from itertools import combinations, islice
+from typing import Any, Callable
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from controllers import response_cache
+from core import settings
+from db.loaders import loaded_tables, loader_options
+from schemas import UnitSchema
+from schemas.request import RequestContext
+from schemas.utils.sparse_models import _sparse_model, make_sparse_model
+from .conftest import make_portfolio
+
+def selects(db: Session, action: Callable[[], Any]) -> tuple[Any, list[str]]:
+    statements: list[str] = []
+    def capture(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+    event.listen(db.get_bind(), 'before_cursor_execute', capture)
+    try:
+        return action(), statements
+    finally:
+        event.remove(db.get_bind(), 'before_cursor_execute', capture)
+
+def test_index_projects_requested_columns(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=3)
+
+    response, statements = selects(sqlite_db, lambda: api_client.get('/api/v1/units/', params={'fields': 'unit_number,is_vacant'}))
+
+    assert response.status_code == 200
+    assert [sorted(row) for row in response.json()['rows']] == [['id', 'is_vacant', 'unit_number']] * 3
+    page_select = statements[1].split(' FROM ')[0]  # After the version probe
+    assert 'units.unit_number' in page_select and 'units.is_vacant' in page_select
+    assert 'units.notes' not in page_select and 'units.sqft' not in page_select
+    assert not any('buildings' in statement for statement in statements)  # No relationship loading
+
+def test_nested_fields(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=2)
+
+    response, statements = selects(sqlite_db, lambda: api_client.get('/api/v1/units/', params={'fields': 'unit_number,building.name'}))
+
+    assert response.json()['rows'][0] == {'id': portfolio['units'][0].id, 'unit_number': '100', 'building': {'id': portfolio['building'].id, 'name': 'Building'}}
+    assert 'buildings.floor_count' not in statements[0]
+    assert not any('properties' in statement for statement in statements)
+
+def test_sorted_sparse_page(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=4)
+
+    first = api_client.get('/api/v1/units/', params={'fields': 'unit_number', 'sort': '-sqft', 'limit': 2}).json()
+    second = api_client.get('/api/v1/units/', params={'fields': 'unit_number', 'sort': '-sqft', 'limit': 2, 'cursor': first['nextCursor']}).json()
+
+    assert [row['unit_number'] for row in first['rows'] + second['rows']] == ['103', '102', '101', '100']
+
+def test_read_and_batch_with_fields(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    unit = make_portfolio(sqlite_db, context.get_user_id())['units'][0]
+
+    assert api_client.get(f'/api/v1/units/{unit.id}', params={'fields': 'sqft'}).json() == {'id': unit.id, 'sqft': 500}
+    assert api_client.get('/api/v1/units/batch', params={'ids': str(unit.id), 'fields': 'sqft'}).json()['rows'] == [{'id': unit.id, 'sqft': 500}]
+    assert 'building' in api_client.get(f'/api/v1/units/{unit.id}').json()  # Full schema without `fields`
+    assert api_client.get(f'/api/v1/units/{unit.id}', params={'fields': 'sqft,nope'}).status_code == 400
+    assert api_client.get(f'/api/v1/units/{unit.id}', params={'fields': 'sqft.value'}).status_code == 400
+
+def test_sparse_models_are_generated_once():
+    assert make_sparse_model(UnitSchema.Read, ['sqft', 'id']) is make_sparse_model(UnitSchema.Read, [' sqft'])
+    assert set(make_sparse_model(UnitSchema.Read, ['building']).model_fields) == {'id', 'building'}
+
+def test_generated_schemas_are_capped(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id())
+    limit = settings.api_schema_cache_max_entries
+    field_sets = islice(combinations(sorted(set(UnitSchema.Read.model_fields) - {'id', 'building'}), 3), limit + 20)
+
+    for fields in field_sets:
+        make_sparse_model(UnitSchema.Read, fields)
+    api_client.get('/api/v1/units/', params={'fields': 'unit_number,sqft'})
+
+    # Every cache keyed by the generated schemas stays bounded
+    assert _sparse_model.cache_info().currsize == limit
+    for cached in (loader_options, loaded_tables, response_cache.tables):
+        assert cached.cache_info().maxsize == limit
@@ -0,0 +1,78 @@
+from threading import Thread
+from typing import Generator
+import pytest
+from sqlalchemy.orm import Session
+from controllers import UnitController, statements
+from controllers.base import exists_where
+from core import settings
+from db.models import Unit
+from schemas.request import FilterParam, RequestContext
+from .conftest import make_portfolio
+
+@pytest.fixture(autouse=True)
+def clear_statements() -> Generator[None, None, None]:
+    statements.clear()
+    yield
+    statements.clear()
+
+def hot_paths(context: RequestContext, unit_ids: list[int], building_id: int) -> None:
+    UnitController.get_by_id(context=context, id=unit_ids[0])
+    UnitController.get_by_ids(context=context, ids=unit_ids)
+    exists_where(context=context, model=Unit, key='unit_number', val='100')
+    page = UnitController.get_all(context=context, limit=2)
+    UnitController.get_all(context=context, limit=2, cursor=page.nextCursor)
+    UnitController.get_all_from_parent(context=context, parent_id=building_id, skip=1, limit=2)
+
+def test_hot_paths_reuse_statements(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=5)
+    unit_ids = [unit.id for unit in portfolio['units']]
+    building_id = portfolio['building'].id
+
+    hot_paths(context, unit_ids, building_id)
+    warm = statements.stats()
+    assert warm['statements'] == warm['misses'] == 6
+
+    hot_paths(context, unit_ids[1:], building_id)
+    stats = statements.stats()
+    assert stats['misses'] == warm['misses'] and stats['hits'] == warm['hits'] + 6
+    assert stats['compiled_misses'] == warm['compiled_misses']  # Nothing was compiled again
+    assert stats['compiled_hits'] > warm['compiled_hits']
+
+def test_compiled_cache_counts_every_thread(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id())
+    UnitController.get_by_id(context=context, id=portfolio['units'][0].id)
+    before = statements.stats()['compiled_hits']
+
+    worker = Thread(target=UnitController.get_by_id, kwargs={'context': context, 'id': portfolio['units'][0].id})
+    worker.start()
+    worker.join()
+
+    assert statements.stats()['compiled_hits'] > before
+
+def test_parameters_are_not_shared(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=3)
+    first, second = portfolio['units'][:2]
+
+    assert UnitController.get_by_id(context=context, id=first.id).id == first.id
+    assert UnitController.get_by_id(context=context, id=second.id).id == second.id
+    assert exists_where(context=context, model=Unit, key='unit_number', val='100')
+    assert not exists_where(context=context, model=Unit, key='unit_number', val='999')
+
+def test_filtered_pages_are_built_per_request(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id(), units=3)
+
+    page = UnitController.get_all(context=context, filters=[FilterParam(field='unit_number', op='eq', value='101')])
+
+    assert [unit.unit_number for unit in page.rows] == ['101']
+    assert statements.stats()['statements'] == 0
+
+def test_registry_keeps_the_most_recently_used(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, 'api_statement_registry_max_entries', 2)
+
+    for key in ('a', 'b', 'a', 'c'):
+        statements.statement(key, object)
+
+    assert statements.stats()['statements'] == 2 and statements.stats()['evictions'] == 1
+    assert statements.stats()['hits'] == 1
+    statements.statement('a', object)
+    assert statements.stats()['hits'] == 2  # 'b' was the least recently used
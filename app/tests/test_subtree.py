@@ -0,0 +1,68 @@
+from typing import Any
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from controllers import PropertyController, BuildingController, UnitController, counter
+from db.models import Property, Building, Unit, Lease, Tenant, Insurance, PropertySummary
+from schemas.request import RequestContext
+from .conftest import make_context, make_portfolio, make_user
+
+def row_count(db: Session, model: Any) -> int:
+    return db.scalar(select(func.count()).select_from(model)) or 0
+
+def test_delete_property_subtree(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=5)
+    property_id = portfolio['property'].id
+    statements: list[str] = []
+    def capture(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    event.listen(sqlite_db.get_bind(), 'before_cursor_execute', capture)
+    try:
+        results = PropertyController.delete_and_commit(context=context, id=property_id)
+    finally:
+        event.remove(sqlite_db.get_bind(), 'before_cursor_execute', capture)
+
+    assert results is not None
+    assert results.counts == {
+        'properties': 1, 'buildings': 1, 'units': 5, 'leases': 1, 'tenants': 1, 'insurances': 1,
+    }
+    assert sum(s.lstrip().upper().startswith('DELETE FROM') for s in statements) <= 8  # One per level (+ summary, search index)
+    for model in (Property, Building, Unit, Lease, Tenant, Insurance, PropertySummary):
+        assert row_count(sqlite_db, model) == 0
+    assert counter.get_count(sqlite_db, Unit, context.get_user_id()) == 0
+
+def test_delete_unit_subtree_keeps_siblings(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=3)
+    unit_id = portfolio['units'][0].id
+    building_id = portfolio['building'].id
+    property_id = portfolio['property'].id
+
+    results = UnitController.delete_and_commit(context=context, id=unit_id)
+    assert results is not None
+    assert results.counts == {'units': 1, 'leases': 1, 'tenants': 1, 'insurances': 1}
+    assert row_count(sqlite_db, Unit) == 2
+    assert counter.get_count(sqlite_db, Unit, context.get_user_id(), building_id) == 2
+    assert sqlite_db.get(PropertySummary, property_id).unit_count == 2  # type: ignore
+
+def test_archive_building_subtree(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id(), units=2)
+    property_id = portfolio['property'].id
+    results = BuildingController.archive_and_commit(context=context, id=portfolio['building'].id)
+    assert results is not None and results.archived
+    assert results.counts == {'buildings': 1, 'units': 2, 'leases': 1, 'tenants': 1, 'insurances': 1}
+    assert row_count(sqlite_db, Unit) == 2
+    assert sqlite_db.scalar(select(func.count()).select_from(Unit).where(Unit.is_active.is_(True))) == 0
+    sqlite_db.expire_all()
+    assert sqlite_db.get(PropertySummary, property_id).active_rent_total == 0.0  # type: ignore
+
+def test_subtree_is_owner_scoped(sqlite_db: Session, context: RequestContext, api_client: TestClient):
+    property_id = make_portfolio(sqlite_db, context.get_user_id(), units=1)['property'].id
+    other = make_context(sqlite_db, make_user(sqlite_db, email='other@example.com'))
+    assert PropertyController.delete_and_commit(context=other, id=property_id) is None
+    assert row_count(sqlite_db, Property) == 1
+
+    assert api_client.delete('/api/v1/properties/12345').status_code == 404
+    response = api_client.delete(f'/api/v1/properties/{property_id}')
+    assert response.status_code == 200
+    assert response.json()['counts']['units'] == 1
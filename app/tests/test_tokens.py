@@ -0,0 +1,137 @@
+import threading
+from typing import Generator
+import pytest
+from fastapi import HTTPException, Response
+from jose import ExpiredSignatureError
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from controllers import UserController, user_cache
+from core import cache, oauth2, revocation, settings
+from core.oauth2 import (
+    create_token, decode_token, get_current_identity, get_current_identity_async, token_claims, verify_access_token,
+)
+from db.models import User
+from schemas import UserSchema
+from .test_response_cache import FakeRedis
+from .test_sparse_fields import selects
+
+@pytest.fixture(autouse=True)
+def clean_state() -> Generator[None, None, None]:
+    oauth2.clear_claims_cache()
+    revocation.clear()
+    user_cache.clear()
+    try:
+        yield
+    finally:
+        cache.use_client(None)
+        oauth2.clear_claims_cache()
+        revocation.clear()
+        user_cache.clear()
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return 'asyncio'
+
+def request_with(**cookies: str) -> Request:
+    header = '; '.join(f'{name}={value}' for name, value in cookies.items())
+    return Request({'type': 'http', 'headers': [(b'cookie', header.encode())]})
+
+def access_token(user: User) -> str:
+    return create_token(token_claims(user, 'access'), 'access')
+
+def expired_access_token(user: User, monkeypatch: pytest.MonkeyPatch) -> str:
+    with monkeypatch.context() as patch:
+        patch.setattr(settings, 'jwt_access_token_expire_minutes', -1)
+        return access_token(user)
+
+def test_identity_skips_the_database(sqlite_db: Session, owner: User):
+    token = access_token(owner)
+
+    identity, statements = selects(sqlite_db, lambda: verify_access_token(sqlite_db, token, Response()))
+
+    assert (identity.id, identity.email, identity.is_active) == (owner.id, owner.email, True)
+    assert statements == []
+
+def test_tokens_without_claims_fall_back_to_the_user(sqlite_db: Session, owner: User):
+    token = create_token({'sub': owner.email}, 'access')
+
+    identity = verify_access_token(sqlite_db, token, Response())
+
+    assert identity.id == owner.id
+
+def test_decoded_claims_are_memoized(monkeypatch: pytest.MonkeyPatch, owner: User):
+    token = access_token(owner)
+    claims = decode_token(token)
+    monkeypatch.setattr(oauth2.jwt, 'decode', lambda *args, **kwargs: pytest.fail('decoded twice'))
+
+    assert decode_token(token) is claims
+
+    # Memoized claims still expire
+    monkeypatch.setitem(claims, 'exp', 0)
+    with pytest.raises(ExpiredSignatureError):
+        decode_token(token)
+
+def test_revoked_token(sqlite_db: Session, owner: User):
+    token = access_token(owner)
+    claims = decode_token(token)
+
+    revocation.revoke_token(claims['jti'], claims['exp'])
+
+    with pytest.raises(HTTPException):
+        verify_access_token(sqlite_db, token, Response())
+    verify_access_token(sqlite_db, access_token(owner), Response())  # Other tokens are unaffected
+
+def test_deactivation_revokes_issued_tokens(sqlite_db: Session, owner: User, monkeypatch: pytest.MonkeyPatch):
+    token, expired = access_token(owner), expired_access_token(owner, monkeypatch)
+    refresh_token = create_token(token_claims(owner, 'refresh'), 'refresh')
+
+    UserController.update_and_commit(db=sqlite_db, schema=UserSchema.Update(is_active=False), id=owner.id)
+
+    with pytest.raises(HTTPException):
+        verify_access_token(sqlite_db, token, Response())
+    with pytest.raises(HTTPException):
+        get_current_identity(request_with(access_token=expired, refresh_token=refresh_token), Response(), sqlite_db)
+    assert verify_access_token(sqlite_db, access_token(owner), Response()).is_active is False
+
+def test_refresh_issues_a_token_with_current_claims(sqlite_db: Session, owner: User, monkeypatch: pytest.MonkeyPatch):
+    expired = expired_access_token(owner, monkeypatch)
+    response = Response()
+    refresh_token = create_token(token_claims(owner, 'refresh'), 'refresh')
+
+    identity = get_current_identity(request_with(access_token=expired, refresh_token=refresh_token), response, sqlite_db)
+
+    assert identity.id == owner.id
+    assert 'access_token=' in response.headers['set-cookie']
+
+def test_shared_revocation_list(sqlite_db: Session, owner: User):
+    shared = FakeRedis()
+    cache.use_client(shared)
+    token = access_token(owner)
+
+    revocation.revoke_user(owner.id)
+    revocation.clear()  # Another worker
+
+    with pytest.raises(HTTPException):
+        verify_access_token(sqlite_db, token, Response())
+
+    shared.failing = True  # Only this worker's entries are checked
+    assert verify_access_token(sqlite_db, token, Response()).id == owner.id
+
+class ThreadRecordingRedis(FakeRedis):
+    def __init__(self) -> None:
+        super().__init__()
+        self.threads: set[int] = set()
+
+    def mget(self, names: list[str]) -> list[bytes | None]:
+        self.threads.add(threading.get_ident())
+        return super().mget(names)
+
+@pytest.mark.anyio
+async def test_async_identity_checks_redis_off_the_event_loop(owner: User):
+    redis = ThreadRecordingRedis()
+    cache.use_client(redis)
+
+    identity = await get_current_identity_async(request_with(access_token=access_token(owner)), Response(), None)
+
+    assert identity.id == owner.id
+    assert redis.threads and threading.get_ident() not in redis.threads
@@ -0,0 +1,104 @@
+import time
+from typing import Any, Generator
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from controllers import BuildingController, PropertyController, TypeaheadController
+from db.models import Building, Property
+from core.exceptions import InvalidQueryError
+from schemas import BuildingSchema
+from schemas.request import RequestContext
+from .conftest import make_context, make_portfolio, make_user
+
+@pytest.fixture(autouse=True)
+def clear_indexes() -> Generator[None, None, None]:
+    TypeaheadController.clear()
+    yield
+    TypeaheadController.clear()
+
+def add_buildings(db: Session, context: RequestContext, property_id: int, names: list[str]) -> None:
+    for name in names:
+        BuildingController.create_and_commit(
+            context=context, schema=BuildingSchema.Create(owner_id=context.get_user_id(), property_id=property_id, name=name, floor_count=1),
+            parent_id=property_id,
+        )
+
+def test_prefix_lookup(sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id())
+    property_id = portfolio['property'].id
+    add_buildings(sqlite_db, context, property_id, ['Oak Tower', 'oakwood', 'Maple', 'Oaks West'])
+
+    pairs = TypeaheadController.lookup(context=context, resource='buildings', prefix='OAK')
+    assert [label for _, label in pairs] == ['Oak Tower', 'Oaks West', 'oakwood']  # Case-insensitive order
+    assert TypeaheadController.lookup(context=context, resource='buildings', prefix='oak', limit=1)[0][1] == 'Oak Tower'
+    assert TypeaheadController.lookup(context=context, resource='buildings', prefix='oak', parent_id=property_id + 1) == []
+    assert TypeaheadController.lookup(context=context, resource='units', prefix='10', limit=2) == [
+        (portfolio['units'][0].id, '100'),
+    ]
+    with pytest.raises(InvalidQueryError):
+        TypeaheadController.lookup(context=context, resource='leases', prefix='')
+
+def test_lookups_are_answered_from_memory(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id())
+    TypeaheadController.lookup(context=context, resource='properties', prefix='p')
+    statements: list[str] = []
+    def capture(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    event.listen(sqlite_db.get_bind(), 'before_cursor_execute', capture)
+    try:
+        started = time.perf_counter()
+        for _ in range(100):
+            pairs = TypeaheadController.lookup(context=context, resource='properties', prefix='prop')
+        elapsed = (time.perf_counter() - started) / 100
+    finally:
+        event.remove(sqlite_db.get_bind(), 'before_cursor_execute', capture)
+
+    assert [label for _, label in pairs] == ['Property']
+    assert statements == []
+    assert elapsed < 0.001
+
+def test_writes_invalidate_index(sqlite_db: Session, context: RequestContext):
+    property_id = make_portfolio(sqlite_db, context.get_user_id())['property'].id
+    assert TypeaheadController.lookup(context=context, resource='buildings', prefix='elm') == []
+
+    add_buildings(sqlite_db, context, property_id, ['Elm House'])
+    assert [label for _, label in TypeaheadController.lookup(context=context, resource='buildings', prefix='elm')] == ['Elm House']
+
+    PropertyController.archive_and_commit(context=context, id=property_id)  # Archived rows drop out of the pickers
+    assert TypeaheadController.lookup(context=context, resource='buildings', prefix='elm') == []
+
+def test_concurrent_writes_only_skip_their_own_index(sqlite_db: Session, context: RequestContext, monkeypatch: pytest.MonkeyPatch):
+    make_portfolio(sqlite_db, context.get_user_id())
+    owner_id = context.get_user_id()
+    writes = [(owner_id, Property), (owner_id + 1, Property), (owner_id, Building)]
+    builds: list[tuple[int, Any]] = []
+    build = TypeaheadController._build
+    def build_during_write(*args: Any) -> Any:
+        index = build(*args)
+        builds.append(writes[len(builds)])
+        TypeaheadController.invalidate(*builds[-1])  # A write committed while the index was loading
+        return index
+    monkeypatch.setattr(TypeaheadController, '_build', build_during_write)
+
+    for _ in range(4):
+        TypeaheadController.lookup(context=context, resource='properties', prefix='')
+
+    # The owner's property write discards the first build, another owner's or another resource's writes do not
+    assert builds == writes[:2]
+
+def test_indexes_are_per_owner(sqlite_db: Session, context: RequestContext):
+    make_portfolio(sqlite_db, context.get_user_id())
+    other = make_user(sqlite_db, email='other@example.com')
+    assert TypeaheadController.lookup(context=make_context(sqlite_db, other), resource='properties', prefix='') == []
+    assert len(TypeaheadController.lookup(context=context, resource='properties', prefix='')) == 1
+
+def test_typeahead_endpoint(api_client: TestClient, sqlite_db: Session, context: RequestContext):
+    portfolio = make_portfolio(sqlite_db, context.get_user_id())
+
+    response = api_client.get('/api/v1/typeahead/tenants', params={'prefix': 'ten'})
+
+    assert response.status_code == 200
+    assert response.json() == [[portfolio['tenant'].id, 'Tenant']]
+    assert api_client.get('/api/v1/typeahead/leases').status_code == 400
@@ -0,0 +1,78 @@
+from typing import Generator
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy.orm import Session
+from controllers import UserController, user_cache
+from core import cache, settings
+from core.oauth2 import create_token, verify_token
+from db.models import User
+from schemas import UserSchema
+from .conftest import make_user
+from .test_response_cache import FakeRedis
+from .test_sparse_fields import selects
+
+@pytest.fixture(autouse=True)
+def clean_cache() -> Generator[None, None, None]:
+    user_cache.clear()
+    try:
+        yield
+    finally:
+        cache.use_client(None)
+        user_cache.clear()
+
+def authenticate(db: Session, user: User) -> UserSchema.Read:
+    return verify_token(db, create_token({'sub': user.email}, 'access'), Response())
+
+def test_hot_session_skips_the_database(sqlite_db: Session, owner: User):
+    authenticate(sqlite_db, owner)
+
+    user, statements = selects(sqlite_db, lambda: authenticate(sqlite_db, owner))
+
+    assert user.id == owner.id
+    assert statements == []
+    assert user_cache.stats()['hit_rate'] == 0.5
+
+def test_updates_and_deletes_invalidate(sqlite_db: Session, owner: User):
+    authenticate(sqlite_db, owner)
+
+    UserController.update_and_commit(db=sqlite_db, schema=UserSchema.Update(is_active=False), id=owner.id)
+    assert authenticate(sqlite_db, owner).is_active is False
+
+    UserController.delete_and_commit(db=sqlite_db, id=owner.id)
+    with pytest.raises(HTTPException):
+        authenticate(sqlite_db, owner)
+
+def test_concurrent_write_is_not_cached(sqlite_db: Session, owner: User):
+    loaded_at = user_cache.generation()
+    user = UserSchema.Read.model_validate(owner)
+    user_cache.invalidate(owner.email)  # A write committed while the user was loading
+
+    user_cache.put(owner.email, user, loaded_at)
+
+    assert user_cache.get(owner.email) is None
+
+def test_ttl(sqlite_db: Session, owner: User, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, 'auth_user_cache_ttl', 0)
+
+    authenticate(sqlite_db, owner)
+    _, statements = selects(sqlite_db, lambda: authenticate(sqlite_db, owner))
+
+    assert len(statements) == 1
+
+def test_shared_tier(sqlite_db: Session, owner: User):
+    shared = FakeRedis()
+    cache.use_client(shared)
+    other = make_user(sqlite_db, 'other@example.com')
+    authenticate(sqlite_db, owner)
+    authenticate(sqlite_db, other)
+    user_cache.clear()  # Another worker
+
+    user, statements = selects(sqlite_db, lambda: authenticate(sqlite_db, owner))
+
+    assert (user.id, user.email) == (owner.id, owner.email)
+    assert statements == [] and user_cache.stats()['l2_hits'] == 1
+    assert all(owner.password not in str(value) for value in shared.data.values())  # No password hash in Redis
+    assert user.password == ''
+
+    UserController.delete_and_commit(db=sqlite_db, id=other.id)
+    assert f'user:{other.email}' not in shared.data
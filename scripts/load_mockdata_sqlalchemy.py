@@ -8,6 +8,7 @@ from typing import Any
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy import create_engine
 from db.models import User, Property, Building, Unit, Tenant, Lease, Insurance
+from controllers import counter, search, summary
 
 # Create database connection
 def connect_to_database(target_database_name: str) -> Session:
@@ -87,6 +88,14 @@ def load_mockdata(data: dict[str, Any], session: Session) -> None:
         # Commit all transactions
         session.commit()
         print("Mock data successfully loaded into the database.")
+
+        # Rows were inserted directly, so the row counters, property summaries and search index must be recomputed
+        written = counter.rebuild(session)
+        print(f'Rebuilt {written} row counters.')
+        written = summary.rebuild(session)
+        print(f'Rebuilt {written} property summaries.')
+        written = search.rebuild(session)
+        print(f'Rebuilt {written} search documents.')
         print(f'Total records loaded: {total_loaded} across {len(data)} tables.')
 
     except Exception as e: